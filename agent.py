@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Режим агента и агрегатор для опроса многих хостов
+# Агент отдает снимки (snapshot.Snapshot) по Unix- или TCP-сокету, агрегатор держит
+# постоянные соединения со всеми агентами и опрашивает их одновременно
+#
+# Протокол строковый: клиент отправляет "GET\n", агент отвечает одной строкой NDJSON
+# Запросы можно отправлять подряд, не дожидаясь ответов (конвейер); ответы идут в том же порядке
+
+import asyncio
+import json
+import os
+import stat
+import sys
+import time
+
+
+# Запрос снимка
+REQUEST = b'GET\n'
+# Сколько секунд агент отдает один и тот же снимок, прежде чем собрать новый
+DEFAULT_MAX_AGE = 1.0
+# Сколько запросов агрегатор держит неотвеченными в одном соединении
+DEFAULT_PIPELINE_DEPTH = 4
+# Сколько запросов агрегатор держит неотвеченными во всех соединениях вместе
+DEFAULT_MAX_IN_FLIGHT = 256
+# Срок ответа агента в секундах
+DEFAULT_TIMEOUT = 5.0
+# Максимальная длина строки ответа (снимок с тысячами дисков)
+LINE_LIMIT = 16 * 1024 * 1024
+
+
+def parse_address(address):
+    """
+    Разбирает адрес агента: "unix:/путь/к/сокету" или "хост:порт"
+    Возвращает кортеж: ("unix", путь) или ("tcp", (хост, порт))
+    Без хоста (":порт") слушается только 127.0.0.1; все интерфейсы - явно "0.0.0.0:порт"
+    """
+    if address.startswith('unix:'):
+        return 'unix', address[5:]
+    host, separator, port = address.rpartition(':')
+    if not separator:
+        raise ValueError(f"Неверный адрес агента: {address}")
+    return 'tcp', (host or '127.0.0.1', int(port))
+
+
+def remove_stale_socket(path):
+    """
+    Удаляет Unix-сокет, оставшийся от прошлого запуска: иначе bind завершится EADDRINUSE
+    Другие файлы по этому пути не удаляются - для них вызывается FileExistsError
+    """
+    try:
+        mode = os.lstat(path).st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(mode):
+        raise FileExistsError(f"{path} существует и не является сокетом")
+    os.unlink(path)
+
+
+class Agent:
+    """
+    Сервер снимков: собирает снимок не чаще раза в max_age секунд и отдает
+    всем клиентам одни и те же заранее закодированные байты
+    """
+
+    def __init__(self, collect, max_age=DEFAULT_MAX_AGE):
+        self.collect = collect  # Функция без аргументов, возвращающая snapshot.Snapshot
+        self.max_age = max_age
+        self.cached = None  # Последний снимок в виде строки NDJSON (bytes)
+        self.cached_at = 0.0  # Когда он был собран (monotonic)
+        self.lock = None  # asyncio.Lock, создается в цикле событий
+        self.requests = 0  # Сколько запросов обслужено
+
+    async def current(self):
+        """
+        Возвращает актуальный снимок; одновременные запросы ждут один общий сбор
+        """
+        async with self.lock:
+            if self.cached is None or time.monotonic() - self.cached_at > self.max_age:
+                # Сбор блокирующий - выполняем его вне цикла событий
+                loop = asyncio.get_running_loop()
+                sample = await loop.run_in_executor(None, self.collect)
+                self.cached = sample.to_ndjson_line().encode('utf-8')
+                self.cached_at = time.monotonic()
+            return self.cached
+
+    async def handle(self, reader, writer):
+        """
+        Обслуживает одно постоянное соединение: по строке ответа на каждый запрос
+        """
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break  # Клиент закрыл соединение
+                if line == REQUEST:
+                    writer.write(await self.current())
+                else:
+                    writer.write(b'{"error":"unknown request"}\n')
+                self.requests += 1
+                # Противодавление: если клиент не успевает читать, перестаем читать его запросы
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, address, ready=None):
+        """
+        Слушает адрес и обслуживает клиентов до остановки
+        ready - необязательный asyncio.Event, устанавливается, когда сокет начал слушать
+        """
+        self.lock = asyncio.Lock()
+        kind, target = parse_address(address)
+        if kind == 'unix':
+            remove_stale_socket(target)
+            server = await asyncio.start_unix_server(self.handle, target, limit=LINE_LIMIT)
+        else:
+            server = await asyncio.start_server(self.handle, *target, limit=LINE_LIMIT)
+        if ready is not None:
+            ready.set()
+        async with server:
+            await server.serve_forever()
+
+
+def serve(collect, address, max_age=DEFAULT_MAX_AGE):
+    """
+    Запускает агент на адресе address (блокирует до Ctrl+C)
+    """
+    try:
+        asyncio.run(Agent(collect, max_age).serve(address))
+    except KeyboardInterrupt:
+        pass
+
+
+class AgentConnection:
+    """
+    Постоянное соединение агрегатора с одним агентом; переподключается после ошибки
+    """
+
+    def __init__(self, address):
+        self.address = address
+        self.reader = None
+        self.writer = None
+        self.errors = 0  # Сколько раз соединение обрывалось
+
+    async def ensure_connected(self, timeout):
+        if self.writer is not None:
+            return
+        kind, target = parse_address(self.address)
+        if kind == 'unix':
+            connecting = asyncio.open_unix_connection(target, limit=LINE_LIMIT)
+        else:
+            connecting = asyncio.open_connection(*target, limit=LINE_LIMIT)
+        self.reader, self.writer = await asyncio.wait_for(connecting, timeout)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+
+class Aggregator:
+    """
+    Опрашивает много агентов одновременно
+    В каждом соединении держится до pipeline_depth неотвеченных запросов, а во всех
+    соединениях вместе - до max_in_flight; когда лимит исчерпан, новые запросы
+    не отправляются, пока не прочитаны ответы (противодавление)
+    """
+
+    def __init__(self, addresses, pipeline_depth=DEFAULT_PIPELINE_DEPTH, max_in_flight=DEFAULT_MAX_IN_FLIGHT,
+                 timeout=DEFAULT_TIMEOUT):
+        self.connections = [AgentConnection(address) for address in addresses]
+        self.pipeline_depth = pipeline_depth
+        self.max_in_flight = max_in_flight
+        self.timeout = timeout
+        self.in_flight = None  # asyncio.Semaphore, создается в цикле событий
+
+    async def poll_connection(self, connection, count, on_snapshot):
+        """
+        Отправляет агенту count запросов конвейером и передает каждый ответ в on_snapshot
+        Возвращает число полученных ответов
+        """
+        try:
+            await connection.ensure_connected(self.timeout)
+        except (OSError, asyncio.TimeoutError):
+            connection.errors += 1
+            connection.close()
+            return 0
+
+        window = asyncio.Semaphore(self.pipeline_depth)  # Окно конвейера этого соединения
+        outstanding = [0]  # Сколько запросов этого соединения ждут ответа
+        writer, reader = connection.writer, connection.reader
+
+        async def send():
+            for _ in range(count):
+                await window.acquire()
+                await self.in_flight.acquire()
+                outstanding[0] += 1
+                writer.write(REQUEST)
+                await writer.drain()
+
+        sender = asyncio.ensure_future(send())
+        received = 0
+        try:
+            for _ in range(count):
+                line = await asyncio.wait_for(reader.readline(), self.timeout)
+                if not line:
+                    raise ConnectionError("агент закрыл соединение")
+                outstanding[0] -= 1
+                window.release()
+                self.in_flight.release()
+                received += 1
+                on_snapshot(connection.address, line)
+            await sender
+        except (OSError, asyncio.TimeoutError, ConnectionError, ValueError):
+            # Соединение сломано: освобождаем занятые им места и переподключимся в следующий раз
+            sender.cancel()
+            connection.errors += 1
+            connection.close()
+            for _ in range(outstanding[0]):
+                self.in_flight.release()
+        return received
+
+    async def poll_async(self, count, on_snapshot):
+        """
+        Опрашивает все агенты одновременно, по count запросов каждому
+        Возвращает общее число полученных снимков
+        """
+        if self.in_flight is None:
+            self.in_flight = asyncio.Semaphore(self.max_in_flight)
+        results = await asyncio.gather(*(self.poll_connection(connection, count, on_snapshot)
+                                         for connection in self.connections))
+        return sum(results)
+
+    async def poll_once_async(self):
+        """
+        Запрашивает по одному снимку у каждого агента
+        Возвращает словарь: адрес -> строка NDJSON (bytes) или None, если агент не ответил
+        """
+        snapshots = {connection.address: None for connection in self.connections}
+
+        def store(address, line):
+            snapshots[address] = line
+
+        await self.poll_async(1, store)
+        return snapshots
+
+    def close(self):
+        for connection in self.connections:
+            connection.close()
+
+
+def poll_once(addresses, timeout=DEFAULT_TIMEOUT):
+    """
+    Однократно опрашивает агентов и возвращает словарь: адрес -> строка NDJSON или None
+    """
+    async def run():
+        aggregator = Aggregator(addresses, timeout=timeout)
+        try:
+            return await aggregator.poll_once_async()
+        finally:
+            aggregator.close()
+    return asyncio.run(run())
+
+
+def write_poll_results(results, stream=None):
+    """
+    Выводит результаты опроса строками NDJSON: {"agent": адрес, "snapshot": снимок}
+    Снимок вставляется в строку как есть, без повторного разбора JSON
+    """
+    stream = stream or sys.stdout
+    for address, line in results.items():
+        snapshot_json = line.decode('utf-8').rstrip('\n') if line else 'null'
+        stream.write(f'{{"agent":{json.dumps(address)},"snapshot":{snapshot_json}}}\n')
+    stream.flush()
+
+
+def benchmark_aggregator(agent_command, agent_count=10, requests_per_agent=200):
+    """
+    Запускает agent_count локальных агентов (agent_command + адрес Unix-сокета)
+    и измеряет, сколько снимков в секунду агрегатор получает от всех вместе
+    Возвращает кортеж: (снимков_в_секунду, получено_снимков)
+    """
+    import subprocess
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as directory:
+        addresses = [f"unix:{os.path.join(directory, f'agent{index}.sock')}" for index in range(agent_count)]
+        agents = [subprocess.Popen(agent_command + [address], stdout=subprocess.DEVNULL)
+                  for address in addresses]
+        try:
+            # Ждем, пока все агенты начнут слушать свои сокеты
+            deadline = time.monotonic() + 30
+            while not all(os.path.exists(address[5:]) for address in addresses):
+                if time.monotonic() > deadline:
+                    raise RuntimeError("агенты не запустились")
+                time.sleep(0.05)
+
+            async def run():
+                aggregator = Aggregator(addresses)
+                try:
+                    await aggregator.poll_async(1, lambda address, line: None)  # Соединения и первый снимок
+                    started = time.perf_counter()
+                    received = await aggregator.poll_async(requests_per_agent, lambda address, line: None)
+                    return received, time.perf_counter() - started
+                finally:
+                    aggregator.close()
+
+            received, elapsed = asyncio.run(run())
+        finally:
+            for process in agents:
+                process.terminate()
+            for process in agents:
+                process.wait()
+    return received / elapsed, received
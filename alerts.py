@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Оповещения по порогам: правила над значениями сборщиков (память, точки монтирования,
+# процессор, ядра) с гистерезисом, таймерами удержания и скоростью изменения
+# Правила один раз компилируются в плоский план - параллельные массивы array,
+# по которым каждый снимок проверяется одним проходом без разбора правил и словарей
+# Цена проверки - около 2 мс на 10 тысяч правил (порядка 200 нс на правило, см. benchmark_engine):
+# основную часть дает выборка значения каждого правила из словаря метрик, поэтому
+# тысячи правил в микросекунды не укладываются
+#
+# Формат правила (одна строка, # - комментарий):
+#   имя метрика > порог [clear уровень] [for секунд] [hold секунд] [severity уровень]
+#   имя rate(метрика) < порог ...
+# Метрика может содержать * в конце (disk_used_percent:*): правило размножается
+# на все метрики с этим префиксом, а имя оповещения получает суффикс ":<ключ>"
+
+import math
+import time
+from array import array
+from itertools import compress, count
+from operator import gt, lt
+
+
+# Правила по умолчанию
+DEFAULT_RULES = """
+# Диск почти заполнен; оповещение снимается, когда занято меньше 85%
+disk_full disk_used_percent:* > 90 clear 85 severity critical
+# Мало доступной памяти (с учетом лимита cgroup)
+memory_low mem_available_percent < 10 clear 15 for 10 severity critical
+# Доступная память быстро уменьшается (МБ в секунду)
+memory_falling rate(mem_available_mb) < -200 for 5 hold 30
+# Очередь на процессор длиннее двух задач на ядро в течение минуты
+load_high load1_per_cpu > 2 clear 1.5 for 60
+# Задачи простаивают в ожидании памяти (PSI some avg10, %)
+memory_pressure psi_some:memory > 10 clear 5 for 10
+"""
+
+# Смещение, с которого начинается необязательная часть правила (после "имя метрика оператор порог")
+RULE_HEAD = 4
+# Значение массива pending_since, означающее "условие сейчас не выполняется"
+NOT_PENDING = -1.0
+
+
+class Rule:
+    """
+    Одно правило в исходном виде (до компиляции)
+    """
+    __slots__ = ('name', 'metric', 'below', 'threshold', 'clear', 'for_seconds', 'hold_seconds',
+                 'rate', 'severity')
+
+    def __init__(self, name, metric, below, threshold, clear=None, for_seconds=0.0, hold_seconds=0.0,
+                 rate=False, severity='warning'):
+        self.name = name  # Имя оповещения
+        self.metric = metric  # Имя метрики или префикс с * в конце
+        self.below = below  # True - срабатывает ниже порога, False - выше
+        self.threshold = threshold  # Порог срабатывания
+        # Уровень снятия (гистерезис); по умолчанию совпадает с порогом
+        self.clear = threshold if clear is None else clear
+        self.for_seconds = for_seconds  # Сколько условие должно держаться до срабатывания
+        self.hold_seconds = hold_seconds  # Сколько оповещение держится после срабатывания, даже если условие ушло
+        self.rate = rate  # Сравнивать скорость изменения метрики (в секунду), а не ее значение
+        self.severity = severity
+
+    def __repr__(self):
+        metric = f"rate({self.metric})" if self.rate else self.metric
+        return f"Rule({self.name} {metric} {'<' if self.below else '>'} {self.threshold})"
+
+
+def parse_rules(text):
+    """
+    Разбирает правила в текстовом формате (см. начало модуля)
+    Возвращает список Rule; при ошибке бросает ValueError с номером строки
+    """
+    rules = []
+    for number, line in enumerate(text.splitlines(), 1):
+        line = line.partition('#')[0].strip()
+        if not line:
+            continue
+        parts = line.split()
+        try:
+            if len(parts) < RULE_HEAD or parts[2] not in ('<', '>') or (len(parts) - RULE_HEAD) % 2:
+                raise ValueError("ожидается: имя метрика >|< порог [ключ значение ...]")
+            name, metric, operator, threshold = parts[:RULE_HEAD]
+            rate = metric.startswith('rate(') and metric.endswith(')')
+            options = dict(zip(parts[RULE_HEAD::2], parts[RULE_HEAD + 1::2]))
+            unknown = set(options) - {'clear', 'for', 'hold', 'severity'}
+            if unknown:
+                raise ValueError(f"неизвестные параметры: {', '.join(sorted(unknown))}")
+            rule = Rule(name, metric[5:-1] if rate else metric, operator == '<', float(threshold),
+                        float(options['clear']) if 'clear' in options else None,
+                        float(options.get('for', 0)), float(options.get('hold', 0)), rate,
+                        options.get('severity', 'warning'))
+        except ValueError as e:
+            raise ValueError(f"Правило в строке {number}: {e}") from None
+        # Уровень снятия должен лежать по ту же сторону от порога, что и норма
+        if (rule.clear < rule.threshold) if rule.below else (rule.clear > rule.threshold):
+            raise ValueError(f"Правило в строке {number}: уровень clear по другую сторону порога")
+        rules.append(rule)
+    return rules
+
+
+def load_rules(path=None):
+    """
+    Читает правила из файла path; без пути возвращает правила по умолчанию (DEFAULT_RULES)
+    """
+    if path is None:
+        return parse_rules(DEFAULT_RULES)
+    with open(path, 'r') as f:
+        return parse_rules(f.read())
+
+
+def metrics_from_snapshot(sample, metrics=None, cores=None):
+    """
+    Заполняет словарь метрик (имя -> число) значениями снимка snapshot.Snapshot:
+    память, нагрузка, давление и заполненность каждой точки монтирования
+    Память и процессоры в снимке уже учитывают лимиты cgroup
+    cores - загрузка ядер в формате CpuStatSampler.cores() (номер, user_%, system_%, iowait_%, steal_%);
+    по ней добавляется занятость каждого ядра cpu_busy:<номер> (user + system). В самом снимке
+    загрузки по ядрам нет: она считается по двум снимкам /proc/stat, поэтому есть только в --watch
+    """
+    metrics = {} if metrics is None else metrics
+    total, available = sample.mem_total_mb, sample.mem_available_mb
+    if total:
+        metrics['mem_available_mb'] = available
+        metrics['mem_available_percent'] = available * 100 / total
+    if sample.swap_total_mb:
+        metrics['swap_used_percent'] = (sample.swap_total_mb - sample.swap_free_mb) * 100 / sample.swap_total_mb
+    if sample.load_avg:
+        metrics['load1'], metrics['load5'], metrics['load15'] = sample.load_avg[:3]
+        cpus = sample.cpu_limit or sample.processor_count
+        if cpus:
+            metrics['load1_per_cpu'] = sample.load_avg[0] / cpus
+    if sample.pressure:
+        for resource, values in sample.pressure.items():
+            metrics[f"psi_some:{resource}"] = values['some'][0]
+    for name, fs_type, free_gb, total_gb in sample.disks:
+        if total_gb:
+            metrics[f"disk_used_percent:{name}"] = (total_gb - free_gb) * 100 / total_gb
+            metrics[f"disk_free_gb:{name}"] = free_gb
+    if cores:
+        for core, user, system, iowait, steal in cores:
+            metrics[f"cpu_busy:{core}"] = user + system
+    return metrics
+
+
+class AlertEngine:
+    """
+    Проверяет правила на каждом снимке метрик
+    План (массивы по одному элементу на развернутое правило) строится заново только
+    когда меняется набор имен метрик (появилась или исчезла точка монтирования)
+    Правила "ниже порога" хранятся с противоположным знаком порога и уровня снятия,
+    поэтому в цикле проверки есть только сравнение "больше"
+    """
+
+    def __init__(self, rules):
+        self.rules = list(rules)
+        self.compiled_names = None  # Набор имен метрик, для которого построен план
+        self.names = []  # Имя оповещения каждого элемента плана
+        self.sources = []  # Индекс исходного правила каждого элемента плана
+        self.metric_names = []  # Имя метрики каждого элемента плана
+        self.split = 0  # Элементы плана до split - правила "выше порога", после - "ниже"
+        self.above_thresholds = []  # Пороги правил "выше порога" (для отбора кандидатов)
+        self.below_thresholds = []  # Пороги правил "ниже порога"
+        self.sign = array('d')  # 1.0 для "выше порога", -1.0 для "ниже"
+        self.threshold = array('d')  # Порог (со знаком sign)
+        self.clear = array('d')  # Уровень снятия (со знаком sign)
+        self.for_seconds = array('d')
+        self.hold_seconds = array('d')
+        self.rate_indices = []  # Элементы плана, для которых проверяется скорость изменения
+        # Состояние элементов плана
+        self.active = bytearray()  # 1 - оповещение сработало
+        self.pending_since = array('d')  # Когда условие начало выполняться (NOT_PENDING - не выполняется)
+        self.fired_at = array('d')  # Когда оповещение сработало
+        self.last_value = array('d')  # Предыдущее значение метрики (для скорости)
+        self.last_time = array('d')  # Время предыдущего значения (NaN - значения еще не было)
+        self.values = []  # Последние проверенные значения (без знака)
+        self.watched = set()  # Элементы, которые сработали или у которых идет таймер for
+        self.last_evaluated = 0.0  # Время последней проверки
+        self.compilations = 0  # Сколько раз строился план
+
+    def compile(self, metric_names):
+        """
+        Строит плоский план для набора имен метрик; состояние сработавших оповещений,
+        которые есть и в новом плане, сохраняется
+        """
+        previous = {name: index for index, name in enumerate(self.names)}
+        old_state = (self.active, self.pending_since, self.fired_at, self.last_value, self.last_time,
+                     self.values)
+
+        rows = []
+        sorted_metrics = sorted(metric_names)
+        for source, rule in enumerate(self.rules):
+            if rule.metric.endswith('*'):
+                prefix = rule.metric[:-1]
+                expanded = [(f"{rule.name}:{metric[len(prefix):]}", metric)
+                            for metric in sorted_metrics if metric.startswith(prefix)]
+            elif rule.metric in metric_names:
+                expanded = [(rule.name, rule.metric)]
+            else:
+                expanded = []  # Метрики нет: правило войдет в план, когда она появится
+            for name, metric in expanded:
+                rows.append((rule.below, name, source, metric, rule.threshold, rule.clear, rule.for_seconds,
+                             rule.hold_seconds, rule.rate))
+        # Сначала правила "выше порога", затем "ниже": каждая группа отбирается одним map
+        rows.sort(key=lambda row: row[0])
+        split = sum(not row[0] for row in rows)
+
+        size = len(rows)
+        self.names = [row[1] for row in rows]
+        self.sources = [row[2] for row in rows]
+        self.metric_names = [row[3] for row in rows]
+        self.split = split
+        self.above_thresholds = [row[4] for row in rows[:split]]
+        self.below_thresholds = [row[4] for row in rows[split:]]
+        self.sign = array('d', (-1.0 if row[0] else 1.0 for row in rows))
+        self.threshold = array('d', (-row[4] if row[0] else row[4] for row in rows))
+        self.clear = array('d', (-row[5] if row[0] else row[5] for row in rows))
+        self.for_seconds = array('d', (row[6] for row in rows))
+        self.hold_seconds = array('d', (row[7] for row in rows))
+        self.rate_indices = [index for index, row in enumerate(rows) if row[8]]
+        self.active = bytearray(size)
+        self.pending_since = array('d', [NOT_PENDING]) * size
+        self.fired_at = array('d', bytes(8 * size))
+        self.last_value = array('d', bytes(8 * size))
+        self.last_time = array('d', [math.nan]) * size
+        self.values = [math.nan] * size
+
+        # Переносим состояние оповещений, которые остались в плане
+        for index, name in enumerate(self.names):
+            old = previous.get(name)
+            if old is not None:
+                for new_array, old_array in zip((self.active, self.pending_since, self.fired_at,
+                                                 self.last_value, self.last_time, self.values), old_state):
+                    new_array[index] = old_array[old]
+        self.watched = {index for index in range(size)
+                        if self.active[index] or self.pending_since[index] != NOT_PENDING}
+
+        self.compiled_names = set(metric_names)
+        self.compilations += 1
+
+    def evaluate(self, metrics, timestamp=None):
+        """
+        Проверяет все правила на словаре метрик (имя -> число)
+        Возвращает список событий (имя, "firing" или "resolved", значение, уровень_важности)
+        только для оповещений, изменивших состояние
+        """
+        now = time.monotonic() if timestamp is None else timestamp
+        self.last_evaluated = now
+        if self.compiled_names is None or metrics.keys() != self.compiled_names:
+            self.compile(metrics.keys())
+
+        # Значения всех элементов плана одним проходом map (без цикла на Python)
+        values = list(map(metrics.__getitem__, self.metric_names))
+        last_time, last_value = self.last_time, self.last_value
+        for index in self.rate_indices:
+            # Скорость изменения в секунду между двумя проверками; NaN - первое значение
+            value, previous_time = values[index], last_time[index]
+            values[index] = ((value - last_value[index]) / (now - previous_time)
+                             if now > previous_time else math.nan)
+            last_time[index], last_value[index] = now, value
+        self.values = values
+
+        # Кандидаты - элементы за порогом (тоже без цикла на Python) и те, у которых уже
+        # идет таймер или которые сработали; остальные не могут изменить состояние
+        split = self.split
+        candidates = self.watched.union(compress(count(), map(gt, values[:split], self.above_thresholds)),
+                                        compress(count(split), map(lt, values[split:], self.below_thresholds)))
+        if not candidates:
+            return []
+
+        events = []
+        sign, threshold, clear = self.sign, self.threshold, self.clear
+        active, pending_since, watched = self.active, self.pending_since, self.watched
+        for index in sorted(candidates):
+            value = values[index] * sign[index]
+            if not active[index]:
+                if not value > threshold[index]:  # Не выполняется (или NaN)
+                    pending_since[index] = NOT_PENDING
+                    watched.discard(index)
+                    continue
+                if pending_since[index] == NOT_PENDING:
+                    pending_since[index] = now
+                    watched.add(index)
+                # Таймер: условие должно продержаться for_seconds
+                if now - pending_since[index] >= self.for_seconds[index]:
+                    active[index] = 1
+                    self.fired_at[index] = now
+                    events.append(self.event(index, 'firing'))
+            elif value < clear[index] and now - self.fired_at[index] >= self.hold_seconds[index]:
+                # Гистерезис: снимаем только за уровнем clear и не раньше, чем истечет hold
+                active[index] = 0
+                pending_since[index] = NOT_PENDING
+                watched.discard(index)
+                events.append(self.event(index, 'resolved'))
+        return events
+
+    def event(self, index, state):
+        return self.names[index], state, self.values[index], self.rules[self.sources[index]].severity
+
+    def firing(self):
+        """
+        Возвращает список сработавших оповещений: (имя, последнее_значение, уровень_важности)
+        """
+        return [(self.names[index], self.values[index], self.rules[self.sources[index]].severity)
+                for index in range(len(self.names)) if self.active[index]]
+
+    def pending(self):
+        """
+        Возвращает оповещения, условие которых выполняется, но таймер for еще не истек:
+        (имя, последнее_значение, уровень_важности, сколько_секунд_осталось)
+        """
+        now = self.last_evaluated
+        return [(self.names[index], self.values[index], self.rules[self.sources[index]].severity,
+                 self.for_seconds[index] - (now - self.pending_since[index]))
+                for index in sorted(self.watched) if not self.active[index]]
+
+
+def benchmark_engine(mount_count=5000, core_count=256, iterations=50):
+    """
+    Измеряет проверку правил на хосте с mount_count точками монтирования и core_count ядрами:
+    по два правила на точку монтирования и по правилу на ядро
+    Метрики строятся так же, как в --watch: metrics_from_snapshot по снимку и загрузке ядер
+    Возвращает кортеж: (правил_в_плане, мкс_на_проверку_всех, нс_на_правило, мс_на_компиляцию)
+    """
+    import snapshot
+
+    rules = parse_rules(DEFAULT_RULES + "disk_low_space disk_free_gb:* < 5 clear 10\n"
+                                        "core_busy cpu_busy:* > 95 clear 80 for 30\n")
+    sample = snapshot.Snapshot(mem_total_mb=10000, mem_available_mb=4000, load_avg=(4.0, 3.0, 2.0),
+                               processor_count=core_count,
+                               pressure={'memory': {'some': [0.0, 0.0, 0.0], 'full': [0.0, 0.0, 0.0]}},
+                               disks=[(f"/mnt/{index}", 'ext4', index % 50, 100) for index in range(mount_count)])
+    cores = [(index, float(index % 100) / 2, float(index % 100) / 2, 0.0, 0.0) for index in range(core_count)]
+    metrics = metrics_from_snapshot(sample, cores=cores)
+
+    engine = AlertEngine(rules)
+    started = time.perf_counter()
+    engine.evaluate(metrics, 0.0)  # Первая проверка строит план
+    compile_ms = (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    for step in range(1, iterations + 1):
+        engine.evaluate(metrics, float(step))
+    per_evaluation = (time.perf_counter() - started) / iterations
+    size = len(engine.names)
+    return size, per_evaluation * 1_000_000, per_evaluation * 1e9 / size, compile_ms
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Воспроизводимый набор бенчмарков сборщика Linux на деревьях тестовых данных (fixtures.py)
+# Для каждого профиля хоста и каждого сборщика измеряются перцентили задержки и объем
+# выделенной памяти; результаты пишутся в JSON-файл, который можно сравнить
+# с результатами другого коммита (--compare)
+#
+# Запуск: python3 benchsuite.py --output results.json [--compare old.json]
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+import fixtures
+import sysinfo
+
+
+# Версия формата файла результатов
+SUITE_VERSION = 1
+# Максимальное число замеров одного сборщика и время, после которого замеры прекращаются
+DEFAULT_ITERATIONS = 200
+DEFAULT_TIME_BUDGET = 2.0
+# Минимальное число замеров, даже если время вышло
+MIN_SAMPLES = 5
+# Во сколько раз должна вырасти задержка (p50), чтобы сравнение считало это регрессией
+DEFAULT_THRESHOLD = 1.25
+# Каталог деревьев тестовых данных по умолчанию (создаются один раз и используются повторно)
+DEFAULT_CORPUS = os.path.join(tempfile.gettempdir(), 'sysinfo-fixtures')
+# Срок statvfs одной точки монтирования в бенчмарке
+MOUNT_TIMEOUT = 1.0
+
+
+def percentile(sorted_values, percent):
+    """
+    Перцентиль отсортированного списка (метод ближайшего ранга, как в timeseries.RollingWindow)
+    """
+    rank = max(0, -(-percent * len(sorted_values) // 100) - 1)
+    return sorted_values[rank]
+
+
+def measure(function, iterations=DEFAULT_ITERATIONS, time_budget=DEFAULT_TIME_BUDGET):
+    """
+    Измеряет задержку function и память, выделяемую одним ее вызовом
+    Возвращает словарь со значениями в микросекундах и байтах
+    """
+    function()  # Прогрев: первые вызовы заполняют кэши и буферы
+    timings = []
+    deadline = time.perf_counter() + time_budget
+    while len(timings) < iterations and (len(timings) < MIN_SAMPLES or time.perf_counter() < deadline):
+        started = time.perf_counter_ns()
+        function()
+        timings.append(time.perf_counter_ns() - started)
+    timings.sort()
+
+    # Память измеряется отдельным вызовом: tracemalloc замедляет выделения в разы
+    import tracemalloc
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        function()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'samples': len(timings),
+        'min_us': timings[0] / 1000,
+        'p50_us': percentile(timings, 50) / 1000,
+        'p95_us': percentile(timings, 95) / 1000,
+        'p99_us': percentile(timings, 99) / 1000,
+        'max_us': timings[-1] / 1000,
+        'mean_us': sum(timings) / len(timings) / 1000,
+        'alloc_peak_bytes': peak - before,
+        'alloc_retained_bytes': current - before,
+    }
+
+
+def profile_cases(backend):
+    """
+    Возвращает пары (имя_сборщика, функция) и список объектов, которые нужно закрыть
+    Сборщики с состоянием (снимки счетчиков) создаются на текущих корнях backend
+    """
+    cpu_sampler = backend.CpuStatSampler()
+    disk_sampler = backend.DiskStatsSampler()
+    net_sampler = backend.NetDevSampler()
+    scanner = backend.ProcessScanner()
+    cgroup_limits = backend.CgroupLimits()
+    topology = backend.CpuTopology()
+
+    def sample_net():
+        net_sampler.sample()
+        return net_sampler.rates(active_only=True)
+
+    cases = [
+        ('distro', backend.resolve_distro_name),
+        ('memory', backend.get_memory_info),
+        ('processor', backend.get_processor_info),
+        ('mounts', lambda: backend.get_mounts_info(MOUNT_TIMEOUT)),
+        ('cpu', cpu_sampler.sample),
+        ('disk_io', disk_sampler.sample),
+        ('net', sample_net),
+        ('processes', scanner.scan),
+        ('cgroup', cgroup_limits.sample),
+        ('topology', topology.sample),
+        ('snapshot', lambda: backend.collect_snapshot(MOUNT_TIMEOUT)),
+    ]
+    return cases, [cpu_sampler, disk_sampler, net_sampler, scanner, cgroup_limits, topology]
+
+
+def run_suite(corpus_directory=DEFAULT_CORPUS, profiles=None, iterations=DEFAULT_ITERATIONS,
+              time_budget=DEFAULT_TIME_BUDGET, collectors=None, progress=None):
+    """
+    Запускает бенчмарки всех сборщиков на деревьях профилей profiles (по умолчанию всех)
+    collectors ограничивает набор сборщиков по именам
+    Возвращает словарь результатов в формате файла (см. write_results)
+    """
+    backend = sysinfo.load_backend('linux')
+    corpus = fixtures.build_corpus(corpus_directory, profiles)
+    results = []
+    try:
+        for profile, roots in corpus.items():
+            backend.set_roots(roots['proc'], roots['sys'], roots['etc'])
+            cases, closables = profile_cases(backend)
+            try:
+                for name, function in cases:
+                    if collectors and name not in collectors:
+                        continue
+                    result = {'profile': profile, 'collector': name}
+                    result.update(measure(function, iterations, time_budget))
+                    results.append(result)
+                    if progress:
+                        progress(result)
+            finally:
+                for closable in closables:
+                    closable.close()
+    finally:
+        backend.set_roots('/proc', '/sys', '/etc')
+
+    return {
+        'suite_version': SUITE_VERSION,
+        'fixture_version': fixtures.FIXTURE_VERSION,
+        'commit': current_commit(),
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'results': results,
+    }
+
+
+def current_commit():
+    """
+    Возвращает идентификатор текущего коммита git или None, если git недоступен
+    """
+    import subprocess
+    try:
+        result = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)), timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return result.stdout.strip() or None
+
+
+def write_results(suite, path):
+    with open(path, 'w') as f:
+        json.dump(suite, f, ensure_ascii=False, indent=2)
+        f.write('\n')
+
+
+def compare_results(baseline, current, threshold=DEFAULT_THRESHOLD):
+    """
+    Сравнивает два набора результатов по совпадающим парам (профиль, сборщик)
+    Возвращает список кортежей: (профиль, сборщик, p50_было_мкс, p50_стало_мкс, отношение, регрессия)
+    """
+    previous = {(row['profile'], row['collector']): row for row in baseline['results']}
+    rows = []
+    for row in current['results']:
+        old = previous.get((row['profile'], row['collector']))
+        if old is None:
+            continue
+        ratio = row['p50_us'] / old['p50_us'] if old['p50_us'] else float('inf')
+        rows.append((row['profile'], row['collector'], old['p50_us'], row['p50_us'], ratio, ratio > threshold))
+    return rows
+
+
+def format_result(result):
+    return (f"{result['profile']:<13} {result['collector']:<10} {result['samples']:>6}"
+            f" {result['p50_us']:>11.1f} {result['p95_us']:>11.1f} {result['p99_us']:>11.1f}"
+            f" {result['alloc_peak_bytes'] / 1024:>10.1f}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Бенчмарки сборщика Linux на деревьях тестовых данных")
+    parser.add_argument('--output', default='benchmark-results.json', metavar='FILE',
+                        help="файл результатов (JSON)")
+    parser.add_argument('--compare', metavar='FILE',
+                        help="сравнить с результатами из FILE; при регрессиях код возврата 1")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="рост p50, считающийся регрессией (по умолчанию 1.25)")
+    parser.add_argument('--corpus', default=DEFAULT_CORPUS, metavar='DIRECTORY',
+                        help="каталог деревьев тестовых данных")
+    parser.add_argument('--profiles', nargs='+', choices=tuple(fixtures.PROFILES), metavar='PROFILE',
+                        help=f"профили хостов: {', '.join(fixtures.PROFILES)}")
+    parser.add_argument('--collectors', nargs='+', metavar='NAME', help="измерять только эти сборщики")
+    parser.add_argument('--iterations', type=int, default=DEFAULT_ITERATIONS,
+                        help="максимальное число замеров одного сборщика")
+    parser.add_argument('--time-budget', type=float, default=DEFAULT_TIME_BUDGET, metavar='SECONDS',
+                        help="время замеров одного сборщика")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    print(f"{'профиль':<13} {'сборщик':<10} {'замеров':>6} {'p50, мкс':>11} {'p95, мкс':>11}"
+          f" {'p99, мкс':>11} {'пик, КБ':>10}")
+    suite = run_suite(args.corpus, args.profiles, args.iterations, args.time_budget, args.collectors,
+                      progress=lambda result: print(format_result(result), flush=True))
+    write_results(suite, args.output)
+    print(f"результаты записаны в {args.output}")
+
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            baseline = json.load(f)
+        regressions = 0
+        print(f"сравнение с {args.compare} (коммит {baseline.get('commit')}):")
+        for profile, collector, old_us, new_us, ratio, regressed in compare_results(baseline, suite,
+                                                                                    args.threshold):
+            regressions += regressed
+            print(f"{profile:<13} {collector:<10} {old_us:>11.1f} -> {new_us:>11.1f} мкс"
+                  f" x{ratio:.2f}{'  РЕГРЕССИЯ' if regressed else ''}")
+        sys.exit(1 if regressions else 0)
@@ -0,0 +1,394 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Анализ занятого места на точке монтирования (аналог du): какие каталоги и файлы
+# занимают больше всего места
+# Дерево делится на поддеревья, которые обходятся os.scandir в пуле процессов;
+# обход не выходит за пределы файловой системы корня, файлы с несколькими жесткими
+# ссылками учитываются один раз
+# Необязательный кэш хранит сводку каждого каталога вместе с его mtime: при повторном
+# обходе каталог с тем же mtime не перечитывается, а берется из кэша
+#
+# Запуск: python3 diskusage.py ТОЧКА_МОНТИРОВАНИЯ [--top 10] [--cache FILE]
+
+import argparse
+import heapq
+import json
+import os
+import stat
+import time
+
+
+# Сколько поддеревьев на один процесс пула стараемся получить при разбиении дерева
+TASKS_PER_WORKER = 4
+# Глубже этого уровня дерево для разбиения не раскрывается
+MAX_SPLIT_DEPTH = 3
+# Версия формата файла кэша; кэш другой версии не используется
+CACHE_VERSION = 2
+# Размер блока, в котором st_blocks считает занятое место
+STAT_BLOCK_SIZE = 512
+# Число наибольших каталогов и файлов по умолчанию
+DEFAULT_TOP = 10
+# Число файлов в дереве benchmark_usage по умолчанию (миллион - только по явному запросу)
+BENCHMARK_FILE_COUNT = 20_000
+
+
+def entry_usage(info, apparent_size):
+    """
+    Занятое файлом место в байтах: по выделенным блокам (как du) или по размеру (как du --apparent-size)
+    """
+    return info.st_size if apparent_size else info.st_blocks * STAT_BLOCK_SIZE
+
+
+def walk_subtree(path, device, top=DEFAULT_TOP, apparent_size=False, cache=None):
+    """
+    Обходит поддерево path, не выходя за пределы устройства device
+    cache - словарь путь_каталога -> сводка из прошлого обхода (или None - без кэша)
+    Возвращает кортеж: (путь -> байт_в_поддереве, файлов, каталогов, наибольшие_файлы,
+                        файлы_с_жесткими_ссылками, ошибок, новый_кэш)
+    Файлы с несколькими жесткими ссылками в суммы не входят, а возвращаются списком
+    (inode, байт, путь): их дубликаты между поддеревьями убирает вызывающий
+    """
+    own = {}  # путь -> байт в файлах самого каталога
+    order = []  # Каталоги в порядке обхода (родитель раньше потомков)
+    parents = {}  # путь -> путь родителя
+    largest = []  # Куча (байт, путь) наибольших файлов
+    links = {}  # inode -> (байт, каталог) для файлов с несколькими ссылками
+    new_cache = {} if cache is not None else None
+    files = errors = 0
+
+    try:
+        info = os.stat(path, follow_symlinks=False)
+    except OSError:
+        return {}, 0, 0, [], [], 1, new_cache
+    # В стеке: (каталог, его mtime, место самого каталога)
+    stack = [(path, info.st_mtime_ns, entry_usage(info, apparent_size))]
+    while stack:
+        directory, mtime, directory_usage = stack.pop()
+        order.append(directory)
+        cached = cache.get(directory) if cache is not None else None
+        if cached is not None and cached[0] == mtime:
+            # Каталог не менялся: сводка из кэша, заново проверяем только mtime подкаталогов
+            mtime, total, count, subdirectories, directory_links, directory_largest = cached
+            for name in subdirectories:
+                child = os.path.join(directory, name)
+                try:
+                    info = os.stat(child, follow_symlinks=False)
+                except OSError:
+                    errors += 1
+                    continue
+                parents[child] = directory
+                stack.append((child, info.st_mtime_ns, entry_usage(info, apparent_size)))
+        else:
+            total = count = 0
+            subdirectories, directory_links, directory_largest = [], [], []
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        try:
+                            info = entry.stat(follow_symlinks=False)
+                        except OSError:
+                            errors += 1
+                            continue
+                        if stat.S_ISDIR(info.st_mode):
+                            if info.st_dev != device:
+                                continue  # Другая файловая система смонтирована внутри
+                            subdirectories.append(entry.name)
+                            parents[entry.path] = directory
+                            stack.append((entry.path, info.st_mtime_ns, entry_usage(info, apparent_size)))
+                            continue
+                        usage = entry_usage(info, apparent_size)
+                        count += 1
+                        if info.st_nlink > 1:
+                            directory_links.append((info.st_ino, usage, entry.name))
+                            continue
+                        total += usage
+                        # Наибольшие файлы этого каталога (для кэша и общего списка)
+                        if len(directory_largest) < top:
+                            heapq.heappush(directory_largest, (usage, entry.name))
+                        elif usage > directory_largest[0][0]:
+                            heapq.heapreplace(directory_largest, (usage, entry.name))
+            except OSError:
+                errors += 1
+        if new_cache is not None:
+            new_cache[directory] = (mtime, total, count, subdirectories, directory_links, directory_largest)
+
+        own[directory] = total + directory_usage  # Как в du, место каталога входит в его сумму
+        files += count
+        for inode, usage, name in directory_links:
+            links.setdefault(inode, (usage, os.path.join(directory, name)))
+        for usage, name in directory_largest:
+            if len(largest) < top:
+                heapq.heappush(largest, (usage, os.path.join(directory, name)))
+            elif usage > largest[0][0]:
+                heapq.heapreplace(largest, (usage, os.path.join(directory, name)))
+
+    # Суммы поддеревьев: обходим каталоги от потомков к родителям
+    totals = dict(own)
+    for directory in reversed(order):
+        parent = parents.get(directory)
+        if parent is not None:
+            totals[parent] += totals[directory]
+    link_list = [(inode, usage, file_path) for inode, (usage, file_path) in links.items()]
+    return totals, files, len(order), largest, link_list, errors, new_cache
+
+
+def split_tree(root, device, workers, apparent_size=False):
+    """
+    Раскрывает верхние уровни дерева, пока поддеревьев не станет хотя бы
+    TASKS_PER_WORKER на процесс (или не будет достигнута глубина MAX_SPLIT_DEPTH)
+    Возвращает кортеж: (поддеревья_для_пула, {каталог: (байт_в_файлах, файлов, родитель)}
+                        раскрытых каталогов, наибольшие_файлы, жесткие_ссылки, ошибок)
+    """
+    tasks = [root]
+    sizes = {root: entry_usage(os.stat(root), apparent_size)}  # Место самих каталогов
+    expanded = {}
+    largest, links = [], []
+    errors = 0
+    depth = 0
+    while tasks and len(tasks) < workers * TASKS_PER_WORKER and depth < MAX_SPLIT_DEPTH:
+        next_tasks = []
+        for directory in tasks:
+            total, count = sizes[directory], 0
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        try:
+                            info = entry.stat(follow_symlinks=False)
+                        except OSError:
+                            errors += 1
+                            continue
+                        usage = entry_usage(info, apparent_size)
+                        if stat.S_ISDIR(info.st_mode):
+                            if info.st_dev == device:
+                                next_tasks.append(entry.path)
+                                sizes[entry.path] = usage
+                            continue
+                        count += 1
+                        if info.st_nlink > 1:
+                            links.append((info.st_ino, usage, entry.path))
+                        else:
+                            total += usage
+                            largest.append((usage, entry.path))
+            except OSError:
+                errors += 1
+            parent = os.path.dirname(directory) if directory != root else None
+            expanded[directory] = (total, count, parent)
+        tasks = next_tasks
+        depth += 1
+    return tasks, expanded, largest, links, errors
+
+
+def load_cache(path):
+    """
+    Читает кэш обхода; отсутствующий, поврежденный или устаревший кэш - пустой словарь
+    Кэш хранится в JSON: путь к нему задается в командной строке, и чужой файл
+    не должен приводить к выполнению кода, как при pickle.load
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            version, cache = json.load(f)
+    except (OSError, ValueError, TypeError):
+        return {}
+    return cache if version == CACHE_VERSION and isinstance(cache, dict) else {}
+
+
+def save_cache(path, cache):
+    # Пишем во временный файл и переименовываем, чтобы прерванная запись не испортила кэш
+    temporary = f"{path}.tmp"
+    with open(temporary, 'w', encoding='utf-8') as f:
+        json.dump((CACHE_VERSION, cache), f, separators=(',', ':'))
+    os.replace(temporary, path)
+
+
+def scan_usage(root, top=DEFAULT_TOP, workers=None, cache_path=None, apparent_size=False):
+    """
+    Считает занятое место в дереве root (в пределах его файловой системы)
+    workers - число процессов пула (по умолчанию os.cpu_count(); 1 - без пула)
+    cache_path - файл кэша сводок каталогов по mtime; рост файла без изменения
+    каталога кэш не замечает, поэтому для точного результата кэш не используют
+    Возвращает кортеж: (всего_байт, файлов, каталогов, [(байт, каталог), ...], [(байт, файл), ...], ошибок)
+    Списки содержат top наибольших каталогов (без самого root) и файлов по убыванию
+    """
+    root = os.path.abspath(root)
+    device = os.stat(root).st_dev
+    workers = workers or os.cpu_count() or 1
+    cache = load_cache(cache_path) if cache_path else None
+
+    tasks, expanded, largest, links, errors = split_tree(root, device, workers, apparent_size)
+    files = sum(count for total, count, parent in expanded.values())
+    directories = len(expanded)
+
+    def subtree_cache(task):
+        # Процессу передается только часть кэша, относящаяся к его поддереву
+        if cache is None:
+            return None
+        prefix = task + os.sep
+        return {path: entry for path, entry in cache.items() if path == task or path.startswith(prefix)}
+
+    arguments = [(task, device, top, apparent_size, subtree_cache(task)) for task in tasks]
+    if workers > 1 and len(tasks) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(walk_subtree, *zip(*arguments)))
+    else:
+        results = [walk_subtree(*task_arguments) for task_arguments in arguments]
+
+    totals = {directory: total for directory, (total, count, parent) in expanded.items()}
+    new_cache = {} if cache is not None else None
+    for subtree_totals, subtree_files, subtree_directories, subtree_largest, subtree_links, subtree_errors, \
+            subtree_cache_entries in results:
+        totals.update(subtree_totals)
+        files += subtree_files
+        directories += subtree_directories
+        largest.extend(subtree_largest)
+        links.extend(subtree_links)
+        errors += subtree_errors
+        if new_cache is not None:
+            new_cache.update(subtree_cache_entries)
+
+    # Суммы раскрытых каталогов: место каждого поддерева пула и файлов каждого раскрытого
+    # каталога добавляется ко всем раскрытым каталогам выше него
+    contributions = [(task, totals[task]) for task in tasks if task in totals]
+    contributions += [(directory, total) for directory, (total, count, parent) in expanded.items()]
+    for directory, total in contributions:
+        parent = os.path.dirname(directory) if directory != root else None
+        while parent is not None:
+            totals[parent] += total
+            parent = expanded[parent][2]
+    # Каждый inode с несколькими жесткими ссылками учитывается один раз - в каталоге первой
+    # встреченной ссылки и во всех каталогах выше
+    seen = set()
+    for inode, usage, file_path in links:
+        if inode in seen:
+            continue
+        seen.add(inode)
+        largest.append((usage, file_path))
+        directory = os.path.dirname(file_path)
+        while directory in totals:
+            totals[directory] += usage
+            if directory == root:
+                break
+            directory = os.path.dirname(directory)
+
+    if new_cache is not None:
+        save_cache(cache_path, new_cache)
+
+    top_directories = heapq.nlargest(top, ((total, path) for path, total in totals.items() if path != root))
+    return (totals.get(root, 0), files, directories, top_directories, heapq.nlargest(top, largest), errors)
+
+
+def format_size(size):
+    """
+    Размер в байтах в читаемом виде (Б, КБ, МБ, ГБ, ТБ)
+    """
+    for unit in ('Б', 'КБ', 'МБ', 'ГБ'):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == 'Б' else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} ТБ"
+
+
+def write_report(root, report, stream=None):
+    """
+    Выводит результат scan_usage
+    """
+    import sys
+    stream = stream or sys.stdout
+    total, files, directories, top_directories, top_files, errors = report
+    stream.write(f"{root}: {format_size(total)} в {files} файлах и {directories} каталогах"
+                 + (f" (ошибок доступа: {errors})" if errors else "") + "\n")
+    stream.write("Наибольшие каталоги:\n")
+    for size, path in top_directories:
+        stream.write(f" {format_size(size):>10}  {path}\n")
+    stream.write("Наибольшие файлы:\n")
+    for size, path in top_files:
+        stream.write(f" {format_size(size):>10}  {path}\n")
+
+
+def build_tree(root, file_count, files_per_directory=100, fanout=10, seed=0):
+    """
+    Создает дерево из file_count пустых файлов (размер задается ftruncate, место на диске не занимается)
+    по files_per_directory в каталоге и по fanout подкаталогов на уровень; часть файлов - жесткие ссылки
+    Готовое дерево с тем же числом файлов используется повторно
+    """
+    import random
+
+    marker = os.path.join(root, '.tree')
+    try:
+        with open(marker, 'r') as f:
+            if f.read() == str(file_count):
+                return
+    except OSError:
+        pass
+    generator = random.Random(seed)
+    directory_count = -(-file_count // files_per_directory)
+    created = 0
+    for index in range(directory_count):
+        # Номер каталога в системе счисления fanout задает его путь: 1234 -> 1/2/3/4
+        parts, number = [], index
+        while True:
+            parts.append(str(number % fanout))
+            number //= fanout
+            if not number:
+                break
+        directory = os.path.join(root, *reversed(parts))
+        os.makedirs(directory, exist_ok=True)
+        for position in range(min(files_per_directory, file_count - created)):
+            path = os.path.join(directory, f"f{position}")
+            if position == 0 and index and index % 50 == 0:
+                # Жесткая ссылка на первый файл первого каталога
+                if not os.path.exists(path):
+                    os.link(os.path.join(root, '0', 'f0'), path)
+            else:
+                fd = os.open(path, os.O_WRONLY | os.O_CREAT, 0o644)
+                os.ftruncate(fd, int(generator.paretovariate(1.2) * 1000))
+                os.close(fd)
+            created += 1
+    with open(marker, 'w') as f:
+        f.write(str(file_count))
+
+
+def benchmark_usage(file_count=BENCHMARK_FILE_COUNT, directory=None, workers=None):
+    """
+    Обходит сгенерированное дерево из file_count файлов
+    Если directory задан, дерево создается в нем один раз и остается для повторных запусков,
+    иначе создается во временном каталоге и удаляется после замера
+    Возвращает кортеж: (секунд_на_обход_без_кэша, секунд_на_повтор_с_кэшем, файлов)
+    """
+    import shutil
+    import tempfile
+
+    # Во временном каталоге лежат кэш и (если directory не задан) само дерево
+    workspace = tempfile.mkdtemp(prefix='diskusage-')
+    try:
+        if directory is None:
+            directory = os.path.join(workspace, 'tree')
+        os.makedirs(directory, exist_ok=True)
+        build_tree(directory, file_count)
+        cache_path = os.path.join(workspace, 'cache.json')
+
+        started = time.perf_counter()
+        report = scan_usage(directory, workers=workers, cache_path=cache_path, apparent_size=True)
+        full_s = time.perf_counter() - started
+        started = time.perf_counter()
+        scan_usage(directory, workers=workers, cache_path=cache_path, apparent_size=True)
+        cached_s = time.perf_counter() - started
+    finally:
+        shutil.rmtree(workspace, ignore_errors=True)
+    return full_s, cached_s, report[1]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Наибольшие каталоги и файлы на точке монтирования")
+    parser.add_argument('root', help="точка монтирования или каталог")
+    parser.add_argument('--top', type=int, default=DEFAULT_TOP, metavar='N', help="сколько каталогов и файлов вывести")
+    parser.add_argument('--workers', type=int, metavar='N', help="число процессов (по умолчанию по числу ядер)")
+    parser.add_argument('--cache', metavar='FILE', help="файл кэша сводок каталогов по mtime")
+    parser.add_argument('--apparent-size', action='store_true', help="считать размер файлов, а не занятые блоки")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    write_report(os.path.abspath(args.root),
+                 scan_usage(args.root, args.top, args.workers, args.cache, args.apparent_size))
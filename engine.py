@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Асинхронный запуск сборщиков: все функции get_*_info() выполняются одновременно,
+# каждая в своем потоке, а общий срок ограничивает время сбора всего отчета
+# asyncio импортируется только при запуске сбора: константы и MISSED нужны сборщику Linux
+# и без него, а импорт asyncio тянет за собой subprocess и concurrent.futures
+
+import threading
+import time
+
+
+# Общий срок сбора отчета по умолчанию в секундах
+DEFAULT_DEADLINE = 10.0
+
+
+class Missed:
+    """
+    Значение сборщика, не успевшего завершиться до общего срока
+    """
+
+    def __repr__(self):
+        return 'MISSED'
+
+    def __bool__(self):
+        # Пропущенное значение ведет себя как отсутствующее в проверках "if info:"
+        return False
+
+
+# Единственный экземпляр метки пропущенного значения
+MISSED = Missed()
+
+
+def run_in_daemon_thread(loop, function):
+    """
+    Выполняет блокирующую функцию в отдельном потоке-демоне и возвращает asyncio.Future
+    Пул потоков (run_in_executor) здесь не подходит: его потоки ожидаются при выходе
+    из программы, и зависший statvfs или чтение /proc не дали бы ей завершиться
+    """
+    future = loop.create_future()
+
+    def deliver(result, error):
+        # Выполняется в потоке цикла событий; отмененную по сроку задачу не трогаем
+        if future.done():
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def worker():
+        try:
+            result, error = function(), None
+        except Exception as exception:
+            result, error = None, exception
+        try:
+            loop.call_soon_threadsafe(deliver, result, error)
+        except RuntimeError:
+            pass  # Цикл событий уже закрыт - результат опоздал и никому не нужен
+
+    threading.Thread(target=worker, daemon=True).start()
+    return future
+
+
+async def collect_async(collectors, deadline=DEFAULT_DEADLINE):
+    """
+    Запускает все сборщики одновременно и ждет их не дольше deadline секунд
+    collectors - словарь: имя -> функция без аргументов
+    Возвращает словарь: имя -> результат; сборщики, не успевшие к сроку, получают MISSED,
+    завершившиеся исключением - None (так же, как сами get_*_info() сообщают об ошибке)
+    """
+    import asyncio
+
+    loop = asyncio.get_running_loop()
+    tasks = {name: run_in_daemon_thread(loop, function) for name, function in collectors.items()}
+    if tasks:
+        await asyncio.wait(tasks.values(), timeout=deadline)
+
+    results = {}
+    for name, task in tasks.items():
+        if not task.done():
+            task.cancel()  # Поток продолжит работу, но его результат будет отброшен
+            results[name] = MISSED
+        elif task.exception() is not None:
+            results[name] = None
+        else:
+            results[name] = task.result()
+    return results
+
+
+def collect(collectors, deadline=DEFAULT_DEADLINE):
+    """
+    Синхронная обертка над collect_async для обычного (не асинхронного) кода
+    """
+    import asyncio
+
+    return asyncio.run(collect_async(collectors, deadline))
+
+
+def benchmark_engine(delays=(0.05, 0.1, 0.02, 0.2, 0.01), deadline=1.0):
+    """
+    Сравнивает последовательный и одновременный запуск сборщиков,
+    которые блокируются на заданное время (delays, секунды)
+    Возвращает кортеж: (секунд_последовательно, секунд_одновременно)
+    """
+    collectors = {f"collector{index}": (lambda delay=delay: time.sleep(delay))
+                  for index, delay in enumerate(delays)}
+
+    started = time.perf_counter()
+    for function in collectors.values():
+        function()
+    sequential = time.perf_counter() - started
+
+    started = time.perf_counter()
+    collect(collectors, deadline)
+    concurrent = time.perf_counter() - started
+    return sequential, concurrent
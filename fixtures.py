@@ -0,0 +1,492 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Генератор деревьев тестовых данных /proc, /sys и /etc для бенчмарков
+# Каждый профиль описывает типичный хост (маленький сервер, 256 ядер, хост контейнеров
+# с тысячами точек монтирования, хост с 10 000 процессов); данные детерминированы,
+# поэтому результаты бенчмарков на разных коммитах можно сравнивать между собой
+# Здесь же поддельный слой Windows API (FakeWindll), на котором сборщик Windows
+# проверяется и измеряется на Linux
+
+import json
+import os
+import random
+
+
+# Версия формата деревьев; при ее изменении готовые деревья пересоздаются
+FIXTURE_VERSION = 3
+# Файл в корне дерева с версией и параметрами профиля
+MARKER_FILE = 'fixture.json'
+
+# Профили хостов: число процессоров, сокетов и потоков на ядро, точек монтирования, процессов,
+# сетевых интерфейсов, блочных устройств, объем памяти в ГБ и лимиты cgroup v2 процесса
+# (None - без лимита); каждый сокет - отдельный узел NUMA
+PROFILES = {
+    'small': {'cpus': 2, 'sockets': 1, 'threads_per_core': 1, 'mounts': 12, 'processes': 80, 'interfaces': 2,
+              'disks': 2, 'memory_gb': 2, 'cgroup_cpus': None, 'cgroup_memory_gb': None},
+    'cores256': {'cpus': 256, 'sockets': 2, 'threads_per_core': 2, 'mounts': 40, 'processes': 1500,
+                 'interfaces': 8, 'disks': 16, 'memory_gb': 1024, 'cgroup_cpus': None, 'cgroup_memory_gb': None},
+    'mounts5000': {'cpus': 32, 'sockets': 1, 'threads_per_core': 2, 'mounts': 5000, 'processes': 800,
+                   'interfaces': 500, 'disks': 8, 'memory_gb': 128, 'cgroup_cpus': 1.5, 'cgroup_memory_gb': 4},
+    'processes10k': {'cpus': 64, 'sockets': 2, 'threads_per_core': 2, 'mounts': 30, 'processes': 10000,
+                     'interfaces': 4, 'disks': 4, 'memory_gb': 256, 'cgroup_cpus': 8, 'cgroup_memory_gb': 32},
+}
+
+# Счетчики сетевого интерфейса, которые создаются в /sys/class/net/*/statistics
+NET_STATISTICS = ('rx_bytes', 'rx_packets', 'rx_errors', 'rx_dropped',
+                  'tx_bytes', 'tx_packets', 'tx_errors', 'tx_dropped')
+# Кэши ядра в /sys/devices/system/cpu/cpuN/cache: (уровень, тип, размер в КБ, общий для всего сокета)
+CPU_CACHES = ((1, 'Data', 48, False), (1, 'Instruction', 32, False), (2, 'Unified', 2048, False),
+              (3, 'Unified', 65536, True))
+# Границы частоты процессоров в кГц (cpuinfo_min_freq и cpuinfo_max_freq)
+CPU_MIN_FREQ_KHZ = 800000
+CPU_MAX_FREQ_KHZ = 3700000
+
+
+def write_file(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        f.write(content)
+
+
+def meminfo_text(memory_gb, rng):
+    """
+    Возвращает содержимое /proc/meminfo с полным набором полей современного ядра
+    """
+    total_kb = memory_gb * 1024 * 1024
+    free_kb = total_kb * rng.randint(5, 30) // 100
+    available_kb = free_kb + total_kb * rng.randint(10, 30) // 100
+    swap_kb = min(total_kb // 4, 8 * 1024 * 1024)
+    fields = [
+        ('MemTotal', total_kb), ('MemFree', free_kb), ('MemAvailable', available_kb),
+        ('Buffers', total_kb // 100), ('Cached', total_kb // 5), ('SwapCached', 0),
+        ('Active', total_kb // 4), ('Inactive', total_kb // 6), ('Active(anon)', total_kb // 8),
+        ('Inactive(anon)', total_kb // 50), ('Active(file)', total_kb // 8), ('Inactive(file)', total_kb // 7),
+        ('Unevictable', 0), ('Mlocked', 0), ('SwapTotal', swap_kb), ('SwapFree', swap_kb * 9 // 10),
+        ('Zswap', 0), ('Zswapped', 0), ('Dirty', 128), ('Writeback', 0), ('AnonPages', total_kb // 9),
+        ('Mapped', total_kb // 40), ('Shmem', total_kb // 200), ('KReclaimable', total_kb // 60),
+        ('Slab', total_kb // 40), ('SReclaimable', total_kb // 60), ('SUnreclaim', total_kb // 120),
+        ('KernelStack', 16384), ('PageTables', total_kb // 500), ('SecPageTables', 0),
+        ('NFS_Unstable', 0), ('Bounce', 0), ('WritebackTmp', 0), ('CommitLimit', total_kb // 2 + swap_kb),
+        ('Committed_AS', total_kb // 3), ('VmallocTotal', 34359738367), ('VmallocUsed', 65536),
+        ('VmallocChunk', 0), ('Percpu', 4096), ('HardwareCorrupted', 0), ('AnonHugePages', 0),
+        ('ShmemHugePages', 0), ('ShmemPmdMapped', 0), ('FileHugePages', 0), ('FilePmdMapped', 0),
+        ('CmaTotal', 0), ('CmaFree', 0), ('Unaccepted', 0),
+    ]
+    lines = [f"{name + ':':<16}{value:>8} kB" for name, value in fields]
+    # Поля HugePages_* указываются в страницах, без единиц измерения
+    lines += ["HugePages_Total:       0", "HugePages_Free:        0", "HugePages_Rsvd:        0",
+              "HugePages_Surp:        0", "Hugepagesize:       2048 kB", "Hugetlb:               0 kB",
+              f"DirectMap4k:     {total_kb // 100:>8} kB", f"DirectMap2M:     {total_kb // 2:>8} kB"]
+    return '\n'.join(lines) + '\n'
+
+
+def cpu_stat_text(cpus, processes, rng):
+    """
+    Возвращает содержимое /proc/stat: общая строка cpu, строки cpuN и служебные строки
+    """
+    rows = []
+    totals = [0] * 10
+    for cpu in range(cpus):
+        values = [rng.randint(10 ** 5, 10 ** 7), rng.randint(0, 10 ** 4), rng.randint(10 ** 4, 10 ** 6),
+                  rng.randint(10 ** 7, 10 ** 8), rng.randint(0, 10 ** 5), 0, rng.randint(0, 10 ** 4), 0, 0, 0]
+        totals = [total + value for total, value in zip(totals, values)]
+        rows.append(f"cpu{cpu} " + ' '.join(map(str, values)))
+    lines = ["cpu  " + ' '.join(map(str, totals))] + rows
+    # Строка intr на больших хостах содержит тысячи чисел - по одному на каждое прерывание
+    lines.append("intr " + ' '.join(str(rng.randint(0, 10 ** 6)) for _ in range(64 + cpus * 4)))
+    lines += [f"ctxt {rng.randint(10 ** 8, 10 ** 10)}", "btime 1700000000", f"processes {processes * 10}",
+              f"procs_running {min(cpus, 4)}", "procs_blocked 0",
+              "softirq " + ' '.join(str(rng.randint(0, 10 ** 6)) for _ in range(11))]
+    return '\n'.join(lines) + '\n'
+
+
+def mounts_text(mounts, rng):
+    """
+    Возвращает содержимое /proc/mounts: системные ФС, корневой раздел и mounts точек
+    монтирования контейнеров (overlay) и сетевых ресурсов (nfs)
+    Точки монтирования контейнеров в дереве не создаются: statvfs для них завершается
+    ошибкой ENOENT, но разбор таблицы и сами вызовы измеряются на полном объеме
+    """
+    lines = ["sysfs /sys sysfs rw,nosuid,nodev,noexec,relatime 0 0",
+             "proc /proc proc rw,nosuid,nodev,noexec,relatime 0 0",
+             "devtmpfs /dev devtmpfs rw,nosuid,size=4096k,nr_inodes=1048576,mode=755 0 0",
+             "tmpfs /run tmpfs rw,nosuid,nodev,size=1638400k,mode=755 0 0",
+             "/dev/sda1 / ext4 rw,relatime 0 0",
+             "/dev/sda2 /boot ext4 rw,relatime 0 0"]
+    for index in range(max(0, mounts - len(lines))):
+        if index % 50 == 49:
+            lines.append(f"nfs{index}.example.net:/export/{index} /mnt/nfs/{index} nfs4"
+                         f" rw,relatime,vers=4.2,rsize=1048576,wsize=1048576 0 0")
+        else:
+            layer = '%064x' % rng.getrandbits(256)
+            lines.append(f"overlay /var/lib/containers/storage/overlay/{layer}/merged overlay"
+                         f" rw,relatime,lowerdir=/var/lib/containers/storage/overlay/l/{layer[:26]} 0 0")
+    return '\n'.join(lines) + '\n'
+
+
+def diskstats_text(disks, rng):
+    """
+    Возвращает содержимое /proc/diskstats (формат ядра 5.5+, 17 счетчиков на устройство)
+    """
+    lines = []
+    names = ['sda', 'sda1', 'sda2'] + [f"nvme{index}n1" for index in range(max(0, disks - 1))]
+    for minor, name in enumerate(names):
+        counters = [rng.randint(10 ** 4, 10 ** 7) for _ in range(11)] + [0] * 6
+        counters[8] = 0  # Запросов в очереди сейчас
+        lines.append(f"{8 if name.startswith('sda') else 259:>4} {minor:>7} {name} "
+                     + ' '.join(map(str, counters)))
+    return '\n'.join(lines) + '\n'
+
+
+def interface_names(interfaces):
+    """
+    Возвращает имена интерфейсов: lo, eth0 и veth-интерфейсы контейнеров
+    """
+    names = ['lo', 'eth0']
+    names += [f"veth{index:05x}" for index in range(max(0, interfaces - len(names)))]
+    return names
+
+
+def net_dev_text(names, rng):
+    """
+    Возвращает содержимое /proc/net/dev для заданных интерфейсов
+    """
+    lines = ["Inter-|   Receive                                                |  Transmit",
+             " face |bytes    packets errs drop fifo frame compressed multicast"
+             "|bytes    packets errs drop fifo colls carrier compressed"]
+    for name in names:
+        rx_packets, tx_packets = rng.randint(0, 10 ** 7), rng.randint(0, 10 ** 7)
+        values = [rx_packets * 800, rx_packets, 0, rng.randint(0, 10), 0, 0, 0, 0,
+                  tx_packets * 600, tx_packets, 0, 0, 0, 0, 0, 0]
+        lines.append(f"{name:>6}: " + ' '.join(map(str, values)))
+    return '\n'.join(lines) + '\n'
+
+
+def pressure_text(rng, full=True):
+    """
+    Возвращает содержимое файла давления PSI (/proc/pressure/* или *.pressure в cgroup v2)
+    """
+    lines = []
+    for kind in ('some', 'full') if full else ('some',):
+        averages = [rng.randint(0, 500) / 100 for _ in range(3)]
+        lines.append(f"{kind} avg10={averages[0]:.2f} avg60={averages[1]:.2f} avg300={averages[2]:.2f}"
+                     f" total={rng.randint(0, 10 ** 9)}")
+    return '\n'.join(lines) + '\n'
+
+
+def build_cgroup_fixture(proc_root, sys_root, memory_gb, cgroup_cpus, cgroup_memory_gb, rng):
+    """
+    Создает cgroup v2 процесса: /proc/self/cgroup, запись cgroup2 в /proc/self/mountinfo
+    и файлы лимитов в /sys/fs/cgroup/kubepods/pod/container; лимиты задаются на уровне pod,
+    как это делает kubelet, а у самого контейнера лимитов нет
+    """
+    write_file(os.path.join(proc_root, 'self', 'cgroup'), "0::/kubepods/pod/container\n")
+    write_file(os.path.join(proc_root, 'self', 'mountinfo'),
+               "22 1 8:1 / / rw,relatime shared:1 - ext4 /dev/sda1 rw\n"
+               "25 22 0:22 / /sys rw,nosuid,nodev,noexec,relatime shared:7 - sysfs sysfs rw\n"
+               "30 25 0:26 / /sys/fs/cgroup rw,nosuid,nodev,noexec,relatime shared:9 - cgroup2 cgroup2"
+               " rw,nsdelegate,memory_recursiveprot\n")
+    top = os.path.join(sys_root, 'fs', 'cgroup')
+    pod = os.path.join(top, 'kubepods', 'pod')
+    container = os.path.join(pod, 'container')
+    limit_bytes = int((cgroup_memory_gb or memory_gb) * 1024 ** 3)
+    for directory in (os.path.join(top, 'kubepods'), pod, container):
+        write_file(os.path.join(directory, 'memory.max'),
+                   f"{limit_bytes}\n" if directory == pod and cgroup_memory_gb else "max\n")
+        write_file(os.path.join(directory, 'cpu.max'),
+                   f"{int(cgroup_cpus * 100000)} 100000\n" if directory == pod and cgroup_cpus
+                   else "max 100000\n")
+    usage = limit_bytes * rng.randint(30, 90) // 100
+    write_file(os.path.join(container, 'memory.current'), f"{usage}\n")
+    write_file(os.path.join(container, 'memory.stat'),
+               f"anon {usage // 2}\nfile {usage // 2}\nkernel 1048576\nactive_anon {usage // 3}\n"
+               f"inactive_anon {usage // 6}\nactive_file {usage // 4}\ninactive_file {usage // 4}\n"
+               f"pgfault {rng.randint(10 ** 5, 10 ** 8)}\npgmajfault {rng.randint(0, 10 ** 3)}\n")
+    periods = rng.randint(10 ** 4, 10 ** 6)
+    write_file(os.path.join(container, 'cpu.stat'),
+               f"usage_usec {rng.randint(10 ** 8, 10 ** 10)}\nuser_usec {rng.randint(10 ** 8, 10 ** 9)}\n"
+               f"system_usec {rng.randint(10 ** 7, 10 ** 8)}\nnr_periods {periods}\n"
+               f"nr_throttled {periods // 20}\nthrottled_usec {rng.randint(10 ** 6, 10 ** 8)}\n")
+    for resource in ('cpu', 'memory', 'io'):
+        write_file(os.path.join(container, f'{resource}.pressure'), pressure_text(rng))
+        write_file(os.path.join(proc_root, 'pressure', resource), pressure_text(rng))
+
+
+def cpu_list_text(cpus):
+    """
+    Записывает отсортированный список номеров процессоров в формате ядра: "0-63,128-191"
+    """
+    ranges = []
+    for cpu in cpus:
+        if ranges and ranges[-1][1] == cpu - 1:
+            ranges[-1][1] = cpu
+        else:
+            ranges.append([cpu, cpu])
+    return ','.join(f"{first}-{last}" if first != last else str(first) for first, last in ranges)
+
+
+def build_topology_fixture(sys_root, cpus, sockets, threads_per_core, memory_gb, rng):
+    """
+    Создает /sys/devices/system/cpu и /sys/devices/system/node хоста с sockets сокетами
+    и threads_per_core потоками на ядро; процессоры нумеруются как в ядре Linux:
+    сначала первые потоки всех ядер по сокетам, затем вторые (у 2x64x2 cpu0 и cpu128 - одно ядро)
+    """
+    cpu_root = os.path.join(sys_root, 'devices', 'system', 'cpu')
+    node_root = os.path.join(sys_root, 'devices', 'system', 'node')
+    core_count = cpus // threads_per_core  # Физических ядер на хосте
+    cores_per_socket = core_count // sockets
+    everything = cpu_list_text(range(cpus))
+    for name in ('online', 'possible', 'present'):
+        write_file(os.path.join(cpu_root, name), everything + '\n')
+    write_file(os.path.join(node_root, 'online'), cpu_list_text(range(sockets)) + '\n')
+    socket_cpus = [[cpu for cpu in range(cpus) if cpu % core_count // cores_per_socket == socket]
+                   for socket in range(sockets)]
+
+    for cpu in range(cpus):
+        core = cpu % core_count
+        socket = core // cores_per_socket
+        directory = os.path.join(cpu_root, f'cpu{cpu}')
+        siblings = cpu_list_text(range(core, cpus, core_count))
+        package = cpu_list_text(socket_cpus[socket])
+        if cpu:
+            # У cpu0 файла online нет: его нельзя отключить
+            write_file(os.path.join(directory, 'online'), "1\n")
+        topology = {'physical_package_id': socket, 'die_id': 0, 'core_id': core % cores_per_socket,
+                    'thread_siblings_list': siblings, 'core_siblings_list': package,
+                    'package_cpus_list': package}
+        for name, value in topology.items():
+            write_file(os.path.join(directory, 'topology', name), f"{value}\n")
+        for index, (level, kind, size_kb, shared) in enumerate(CPU_CACHES):
+            cache = os.path.join(directory, 'cache', f'index{index}')
+            write_file(os.path.join(cache, 'level'), f"{level}\n")
+            write_file(os.path.join(cache, 'type'), f"{kind}\n")
+            write_file(os.path.join(cache, 'size'), f"{size_kb}K\n")
+            write_file(os.path.join(cache, 'shared_cpu_list'), (package if shared else siblings) + '\n')
+        frequency = os.path.join(directory, 'cpufreq')
+        write_file(os.path.join(frequency, 'cpuinfo_min_freq'), f"{CPU_MIN_FREQ_KHZ}\n")
+        write_file(os.path.join(frequency, 'cpuinfo_max_freq'), f"{CPU_MAX_FREQ_KHZ}\n")
+        write_file(os.path.join(frequency, 'scaling_cur_freq'),
+                   f"{rng.randint(CPU_MIN_FREQ_KHZ // 1000, CPU_MAX_FREQ_KHZ // 1000) * 1000}\n")
+
+    node_kb = memory_gb * 1024 * 1024 // sockets
+    for node in range(sockets):
+        directory = os.path.join(node_root, f'node{node}')
+        write_file(os.path.join(directory, 'cpulist'), cpu_list_text(socket_cpus[node]) + '\n')
+        write_file(os.path.join(directory, 'distance'),
+                   ' '.join('10' if other == node else '21' for other in range(sockets)) + '\n')
+        free_kb = node_kb * rng.randint(20, 80) // 100
+        file_kb = (node_kb - free_kb) // 2
+        write_file(os.path.join(directory, 'meminfo'),
+                   f"Node {node} MemTotal:       {node_kb} kB\n"
+                   f"Node {node} MemFree:        {free_kb} kB\n"
+                   f"Node {node} MemUsed:        {node_kb - free_kb} kB\n"
+                   f"Node {node} Active:         {file_kb} kB\n"
+                   f"Node {node} FilePages:      {file_kb} kB\n"
+                   f"Node {node} AnonPages:      {node_kb - free_kb - file_kb} kB\n"
+                   f"Node {node} HugePages_Total:     0\n"
+                   f"Node {node} HugePages_Free:      0\n")
+
+
+def build_process_fixture(root, count):
+    """
+    Создает в каталоге root искусственное дерево /proc с count процессами
+    (файлы stat, statm и status для каждого pid)
+    """
+    for pid in range(1, count + 1):
+        directory = os.path.join(root, str(pid))
+        os.makedirs(directory, exist_ok=True)
+        utime, rss_pages = pid * 7 % 1000, pid * 13 % 50000
+        with open(os.path.join(directory, 'stat'), 'w') as f:
+            f.write(f"{pid} (proc {pid}) S 1 {pid} {pid} 0 -1 4194560 0 0 0 0 {utime} {utime // 2}"
+                    f" 0 0 20 0 1 0 {pid * 100} {rss_pages * 8192} {rss_pages} 18446744073709551615"
+                    f" 0 0 0 0 0 0 0 0 0 0 0 0 17 0 0 0 0 0 0\n")
+        with open(os.path.join(directory, 'statm'), 'w') as f:
+            f.write(f"{rss_pages * 2} {rss_pages} {rss_pages // 4} 1 0 {rss_pages} 0\n")
+        with open(os.path.join(directory, 'status'), 'w') as f:
+            f.write(f"Name:\tproc {pid}\nState:\tS (sleeping)\nPid:\t{pid}\n"
+                    f"Uid:\t1000\t1000\t1000\t1000\nThreads:\t1\n")
+
+
+def build_fixture(root, cpus, mounts, processes, interfaces, disks, memory_gb, cgroup_cpus=None,
+                  cgroup_memory_gb=None, sockets=1, threads_per_core=1, seed=0):
+    """
+    Создает в каталоге root дерево тестовых данных с подкаталогами proc, sys и etc
+    Возвращает словарь с путями корней: {"proc": ..., "sys": ..., "etc": ...}
+    """
+    rng = random.Random(seed)
+    proc_root, sys_root, etc_root = (os.path.join(root, name) for name in ('proc', 'sys', 'etc'))
+
+    write_file(os.path.join(proc_root, 'meminfo'), meminfo_text(memory_gb, rng))
+    write_file(os.path.join(proc_root, 'loadavg'),
+               f"{cpus * 0.31:.2f} {cpus * 0.28:.2f} {cpus * 0.25:.2f} {min(cpus, 4)}/{processes} {processes}\n")
+    write_file(os.path.join(proc_root, 'stat'), cpu_stat_text(cpus, processes, rng))
+    mount_table = mounts_text(mounts, rng)
+    write_file(os.path.join(proc_root, 'mounts'), mount_table)
+    write_file(os.path.join(proc_root, 'self', 'mounts'), mount_table)
+    write_file(os.path.join(proc_root, 'diskstats'), diskstats_text(disks, rng))
+
+    names = interface_names(interfaces)
+    write_file(os.path.join(proc_root, 'net', 'dev'), net_dev_text(names, rng))
+    for name in names:
+        for counter in NET_STATISTICS:
+            write_file(os.path.join(sys_root, 'class', 'net', name, 'statistics', counter),
+                       f"{rng.randint(0, 10 ** 9)}\n")
+
+    build_cgroup_fixture(proc_root, sys_root, memory_gb, cgroup_cpus, cgroup_memory_gb, rng)
+    build_topology_fixture(sys_root, cpus, sockets, threads_per_core, memory_gb, rng)
+    build_process_fixture(proc_root, processes)
+
+    write_file(os.path.join(etc_root, 'os-release'),
+               'PRETTY_NAME="Fixture Linux 1.0"\nNAME="Fixture Linux"\nVERSION="1.0"\nID=fixture\n')
+    write_file(os.path.join(etc_root, 'lsb-release'),
+               'DISTRIB_ID=Fixture\nDISTRIB_RELEASE=1.0\nDISTRIB_DESCRIPTION="Fixture Linux 1.0"\n')
+    return {'proc': proc_root, 'sys': sys_root, 'etc': etc_root}
+
+
+def build_corpus(directory, profiles=None):
+    """
+    Создает в каталоге directory деревья для профилей profiles (по умолчанию всех)
+    Готовое дерево той же версии и с теми же параметрами используется повторно
+    Возвращает словарь: профиль -> {"proc": ..., "sys": ..., "etc": ...}
+    """
+    corpus = {}
+    for name in profiles or PROFILES:
+        parameters = PROFILES[name]
+        root = os.path.join(directory, name)
+        marker_path = os.path.join(root, MARKER_FILE)
+        marker = {'version': FIXTURE_VERSION, 'profile': parameters}
+        try:
+            with open(marker_path, 'r') as f:
+                ready = json.load(f) == marker
+        except (OSError, ValueError):
+            ready = False
+        if ready:
+            corpus[name] = {kind: os.path.join(root, kind) for kind in ('proc', 'sys', 'etc')}
+            continue
+        if os.path.isdir(root):
+            # Дерево старой версии удаляем целиком, чтобы в нем не осталось лишних файлов
+            import shutil
+            shutil.rmtree(root)
+        corpus[name] = build_fixture(root, **parameters)
+        # Метка пишется последней: прерванная генерация не будет принята за готовое дерево
+        with open(marker_path, 'w') as f:
+            json.dump(marker, f)
+    return corpus
+
+
+# Значения, которые возвращает поддельный слой Windows API (FakeWindll)
+FAKE_WINDOWS_VERSION = (10, 0, 19045)  # Основная, дополнительная версия и сборка
+FAKE_WINDOWS_MEMORY_GB = (16, 8)  # Всего и доступно физической памяти
+FAKE_WINDOWS_DRIVES = (('C', 'NTFS', 100, 250), ('D', 'FAT32', 12, 32))  # Буква, ФС, свободно и всего ГБ
+
+
+class FakeFunction:
+    """
+    Поддельная функция DLL: выполняет implementation и считает вызовы (calls)
+    и назначения argtypes (bindings), чтобы проверить, что функции Windows API
+    привязываются один раз, а не при каждом вызове сборщика
+    """
+
+    def __init__(self, implementation):
+        self.implementation = implementation
+        self.restype = None
+        self._argtypes = None
+        self.calls = 0
+        self.bindings = 0
+
+    @property
+    def argtypes(self):
+        return self._argtypes
+
+    @argtypes.setter
+    def argtypes(self, value):
+        self._argtypes = value
+        self.bindings += 1
+
+    def __call__(self, *args):
+        self.calls += 1
+        return self.implementation(*args)
+
+
+class FakeLibrary:
+    """
+    Поддельная библиотека DLL: атрибуты - функции FakeFunction
+    """
+
+    def __init__(self, **functions):
+        for name, implementation in functions.items():
+            setattr(self, name, FakeFunction(implementation))
+
+
+class FakeWindll:
+    """
+    Поддельный слой Windows API (замена ctypes.windll) для проверки сборщика Windows на Linux
+    Функции заполняют переданные им структуры и буферы значениями FAKE_WINDOWS_*;
+    структуры приходят через ctypes.byref, сам объект доступен как ref._obj
+    """
+
+    def __init__(self):
+        major, minor, build = FAKE_WINDOWS_VERSION
+        total_gb, available_gb = FAKE_WINDOWS_MEMORY_GB
+        drives = {f"{letter}:\\": (fs_type, free_gb, total_gb)
+                  for letter, fs_type, free_gb, total_gb in FAKE_WINDOWS_DRIVES}
+
+        def rtl_get_version(ref):
+            version = ref._obj
+            version.dwMajorVersion, version.dwMinorVersion, version.dwBuildNumber = major, minor, build
+            return 0  # STATUS_SUCCESS
+
+        def global_memory_status(ref):
+            status = ref._obj
+            status.ullTotalPhys, status.ullAvailPhys = total_gb << 30, available_gb << 30
+            status.dwMemoryLoad = 100 - available_gb * 100 // total_gb
+            status.ullTotalVirtual = 128 << 40
+            return 1
+
+        def get_system_info(ref):
+            ref._obj.dwNumberOfProcessors = 8
+            ref._obj.wProcessorArchitecture = 9  # x64
+
+        def get_performance_info(ref, size):
+            performance = ref._obj
+            performance.CommitTotal, performance.CommitLimit, performance.PageSize = 1 << 20, 1 << 22, 4096
+            return 1
+
+        def get_volume_information(root, name, name_size, serial, length, flags, fs_name, fs_name_size):
+            fs_name.value = drives[root][0][:fs_name_size - 1]
+            return 1
+
+        def get_disk_free_space(root, free_ref, total_ref, total_free_ref):
+            fs_type, free_gb, total_gb = drives[root]
+            free_ref._obj.value, total_ref._obj.value = free_gb << 30, total_gb << 30
+            return 1
+
+        def name_function(value):
+            def read_name(buffer, size_ref):
+                buffer.value = value[:size_ref._obj.value - 1]
+                size_ref._obj.value = len(buffer.value)
+                return 1
+            return read_name
+
+        drive_mask = sum(1 << (ord(letter) - ord('A')) for letter, *_ in FAKE_WINDOWS_DRIVES)
+        self.ntdll = FakeLibrary(RtlGetVersion=rtl_get_version)
+        self.kernel32 = FakeLibrary(GlobalMemoryStatusEx=global_memory_status, GetSystemInfo=get_system_info,
+                                    GetLogicalDrives=lambda: drive_mask,
+                                    GetVolumeInformationW=get_volume_information,
+                                    GetDiskFreeSpaceExW=get_disk_free_space,
+                                    GetComputerNameW=name_function('FIXTURE-PC'))
+        self.advapi32 = FakeLibrary(GetUserNameW=name_function('fixture'))
+        self.psapi = FakeLibrary(GetPerformanceInfo=get_performance_info)
+
+    def functions(self):
+        """
+        Возвращает словарь: имя функции -> FakeFunction по всем библиотекам
+        """
+        return {name: function for library in (self.ntdll, self.kernel32, self.advapi32, self.psapi)
+                for name, function in vars(library).items()}
+
+    def calls(self):
+        """
+        Возвращает словарь: имя функции -> число вызовов
+        """
+        return {name: function.calls for name, function in self.functions().items()}
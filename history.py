@@ -0,0 +1,568 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Долговременная история снимков на диске: недели посекундных значений памяти, процессора
+# и точек монтирования в компактном двоичном виде с быстрым поиском по времени
+#
+# История - каталог сегментов; сегмент - файл фиксированных блоков (по умолчанию 16 КБ)
+# с одним набором столбцов и файл индекса времени рядом с ним
+# Блок хранится по столбцам: у времени и у каждого столбца своя область блока,
+# в которой подряд идут varint разностей с предыдущей записью блока (первая запись - разность
+# с нулем), поэтому неизменившиеся значения занимают один байт, запрос по одному столбцу
+# разбирает только две области (время и сам столбец), а блок читается независимо от других
+# Размеры областей задаются при начале блока пропорционально тому, сколько занял
+# каждый столбец в предыдущем блоке; блок заканчивается, когда заполнилась любая область
+# Время в истории не убывает: если часы ушли назад, запись получает время предыдущей,
+# поэтому интервалы времени сегментов не пересекаются
+# Файлы читаются через mmap: запрос за последний час находит блоки по индексу
+# двоичным поиском и затрагивает только страницы этих блоков
+#
+# Запуск: python3 history.py КАТАЛОГ [--column memory_load] [--last 3600]
+
+import argparse
+import bisect
+import mmap
+import os
+import struct
+import time
+
+
+# Сигнатура и версия формата сегмента
+SEGMENT_MAGIC = b'SHS1'
+HISTORY_VERSION = 2
+# Заголовок сегмента: сигнатура, версия, размер блока, число столбцов, начало сегмента (мс Unix),
+# смещение первого блока; за ним описания столбцов: множитель (I), длина имени (H), имя в UTF-8
+SEGMENT_HEADER = struct.Struct('<4sH2xIIqI')
+COLUMN_HEADER = struct.Struct('<IH')
+# Заголовок блока: сигнатура, число записей, время первой и последней записи (мс);
+# за ним смещения областей от начала блока: области времени и по одной на столбец (uint32)
+BLOCK_MAGIC = b'HBLK'
+BLOCK_HEADER = struct.Struct('<4sI4xqq')
+RUN_OFFSET = struct.Struct('<I')
+# Размер блока по умолчанию; блоки выровнены по страницам, чтобы mmap читал их целиком
+DEFAULT_BLOCK_SIZE = 16384
+PAGE_SIZE = mmap.ALLOCATIONGRANULARITY
+# Новый сегмент начинается раз в сутки и при изменении набора столбцов (точки монтирования)
+SEGMENT_SECONDS = 86400
+# Расширения файлов сегмента и его индекса времени (массив int64: время первой записи каждого блока)
+SEGMENT_SUFFIX = '.hist'
+INDEX_SUFFIX = '.idx'
+# Наибольшая длина varint для 64-битного значения; меньше этого свободного места
+# в любой области - и блок считается заполненным
+MAX_VARINT_BYTES = 10
+# Сколько записей по одному байту на значение должно помещаться в блок при любом числе столбцов
+# (при тысячах точек монтирования блок увеличивается)
+MIN_BLOCK_RECORDS = 32
+
+# Столбцы, общие для всех снимков: (имя, множитель)
+# Дробные значения хранятся целыми с множителем (нагрузка 1.23 -> 123)
+SCALAR_COLUMNS = (
+    ('processor_count', 1),
+    ('cpu_limit', 100),
+    ('load1', 100),
+    ('load5', 100),
+    ('load15', 100),
+    ('mem_total_mb', 1),
+    ('mem_available_mb', 1),
+    ('memory_load', 100),  # Процент занятой памяти (на Linux вычисляется из общей и доступной)
+    ('swap_total_mb', 1),
+    ('swap_free_mb', 1),
+    ('virtual_mb', 1),
+    ('commit_total_mb', 1),
+    ('commit_limit_mb', 1),
+)
+
+
+def append_varint(out, value):
+    """
+    Дописывает неотрицательное целое value в bytearray out в формате varint (по 7 бит в байте)
+    """
+    while value > 0x7f:
+        out.append(value & 0x7f | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def read_varint(data, offset):
+    """
+    Читает varint из data начиная с offset
+    Возвращает кортеж: (значение, смещение_за_ним)
+    """
+    byte = data[offset]
+    if byte < 0x80:
+        return byte, offset + 1  # Самый частый случай: неизменившееся или мало изменившееся значение
+    result, shift = byte & 0x7f, 7
+    while True:
+        offset += 1
+        byte = data[offset]
+        result |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return result, offset + 1
+        shift += 7
+
+
+def zigzag(delta):
+    """
+    Переводит разность со знаком в неотрицательное число: 0, -1, 1, -2 ... -> 0, 1, 2, 3 ...
+    """
+    return delta * 2 if delta >= 0 else -delta * 2 - 1
+
+
+def unzigzag(value):
+    return value >> 1 if not value & 1 else -(value >> 1) - 1
+
+
+def snapshot_columns(sample):
+    """
+    Возвращает столбцы снимка snapshot.Snapshot: общие и по два на каждую точку монтирования
+    Список кортежей (имя, множитель)
+    """
+    columns = list(SCALAR_COLUMNS)
+    for name, fs_type, free_gb, total_gb in sample.disks:
+        columns.append((f"disk_free_gb:{name}", 1))
+        columns.append((f"disk_total_gb:{name}", 1))
+    return columns
+
+
+def snapshot_values(sample):
+    """
+    Возвращает значения снимка в порядке snapshot_columns (None - значения нет)
+    """
+    load_avg = sample.load_avg or (None, None, None)
+    memory_load = sample.memory_load
+    if memory_load is None and sample.mem_total_mb and sample.mem_available_mb is not None:
+        memory_load = (sample.mem_total_mb - sample.mem_available_mb) * 100 / sample.mem_total_mb
+    values = [sample.processor_count, sample.cpu_limit, load_avg[0], load_avg[1], load_avg[2],
+              sample.mem_total_mb, sample.mem_available_mb, memory_load, sample.swap_total_mb,
+              sample.swap_free_mb, sample.virtual_mb, sample.commit_total_mb, sample.commit_limit_mb]
+    for name, fs_type, free_gb, total_gb in sample.disks:
+        values.append(free_gb)
+        values.append(total_gb)
+    return values
+
+
+class SegmentWriter:
+    """
+    Дописывает записи в один сегмент; каждая запись сразу попадает в файл (os.pwrite)
+    Блок собирается в памяти (bytearray размером с блок): значения дописываются в концы
+    своих областей, уже записанные байты не сдвигаются; сначала в файл пишутся области,
+    затем заголовок блока с новым числом записей, поэтому оборванная запись не видна читателю
+    """
+
+    def __init__(self, path, columns, start_ms, block_size=DEFAULT_BLOCK_SIZE):
+        self.path = path
+        self.columns = columns  # Список (имя, множитель)
+        self.names = [name for name, scale in columns]
+        self.scales = [scale for name, scale in columns]
+        self.start_ms = start_ms
+        runs = len(columns) + 1  # Область времени и области столбцов
+        self.runs_offset = BLOCK_HEADER.size + RUN_OFFSET.size * runs
+        needed = self.runs_offset + runs * (MAX_VARINT_BYTES + MIN_BLOCK_RECORDS)
+        self.block_size = max(block_size, -(-needed // PAGE_SIZE) * PAGE_SIZE)
+
+        header = bytearray(SEGMENT_HEADER.size)
+        for name, scale in columns:
+            encoded = name.encode('utf-8')
+            header += COLUMN_HEADER.pack(scale, len(encoded)) + encoded
+        self.data_offset = -(-len(header) // PAGE_SIZE) * PAGE_SIZE
+        SEGMENT_HEADER.pack_into(header, 0, SEGMENT_MAGIC, HISTORY_VERSION, self.block_size, len(columns),
+                                 start_ms, self.data_offset)
+
+        self.fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o644)
+        self.index_fd = os.open(path[:-len(SEGMENT_SUFFIX)] + INDEX_SUFFIX,
+                                os.O_WRONLY | os.O_CREAT | os.O_TRUNC | os.O_APPEND, 0o644)
+        os.pwrite(self.fd, header, 0)
+
+        self.image = bytearray(self.block_size)  # Текущий блок целиком (переиспользуется)
+        self.block = -1  # Номер текущего блока
+        self.count = 0  # Записей в текущем блоке
+        self.first_ms = self.last_ms = 0
+        self.starts = []  # Начало каждой области в блоке
+        self.positions = []  # Конец занятой части каждой области
+        self.limits = []  # Позиция, после которой в область может не поместиться varint
+        self.previous = [0] * len(columns)  # Значения предыдущей записи блока (уже закодированные)
+        self.full = False  # Какая-то область заполнена: следующая запись начнет новый блок
+
+    def layout(self):
+        """
+        Делит блок на области: каждой - MAX_VARINT_BYTES и доля остального места,
+        пропорциональная тому, сколько эта область заняла в предыдущем блоке
+        (в первом блоке сегмента - поровну)
+        """
+        runs = len(self.columns) + 1
+        if self.positions:
+            weights = [position - start + 1 for start, position in zip(self.starts, self.positions)]
+        else:
+            weights = [1] * runs
+        spare = self.block_size - self.runs_offset - runs * MAX_VARINT_BYTES
+        total_weight = sum(weights)
+        starts, offset = [], self.runs_offset
+        for weight in weights:
+            starts.append(offset)
+            offset += MAX_VARINT_BYTES + spare * weight // total_weight
+        limits = starts[1:] + [offset]
+        return starts, [limit - MAX_VARINT_BYTES for limit in limits]
+
+    def start_block(self, timestamp_ms):
+        self.starts, self.limits = self.layout()
+        self.positions = list(self.starts)
+        self.block += 1
+        self.count = 0
+        self.full = False
+        self.first_ms = self.last_ms = timestamp_ms
+        self.previous = [0] * len(self.columns)
+        image = self.image
+        image[:] = bytes(self.block_size)
+        BLOCK_HEADER.pack_into(image, 0, BLOCK_MAGIC, 0, timestamp_ms, timestamp_ms)
+        for run, start in enumerate(self.starts):
+            RUN_OFFSET.pack_into(image, BLOCK_HEADER.size + run * RUN_OFFSET.size, start)
+        os.pwrite(self.fd, memoryview(image)[:self.runs_offset], self.data_offset + self.block * self.block_size)
+        os.write(self.index_fd, struct.pack('<q', timestamp_ms))
+
+    def append(self, timestamp_ms, values):
+        """
+        Дописывает запись со временем timestamp_ms (мс Unix, не меньше времени предыдущей записи)
+        и значениями в порядке столбцов
+        Значения хранятся как round(значение * множитель) + 1, отсутствующее значение - как 0
+        """
+        if self.block < 0 or self.full:
+            self.start_block(timestamp_ms)
+        image, positions, limits, previous = self.image, self.positions, self.limits, self.previous
+        low = positions[0]
+        full = False
+
+        # Область 0 - время: разность с предыдущей записью блока (у первой записи - ноль)
+        value = timestamp_ms - self.last_ms
+        position = positions[0]
+        while value > 0x7f:
+            image[position] = value & 0x7f | 0x80
+            value >>= 7
+            position += 1
+        image[position] = value
+        positions[0] = position + 1
+        full = position >= limits[0]
+
+        run = 1
+        for value, scale in zip(values, self.scales):
+            stored = 0 if value is None else round(value * scale) + 1
+            delta = stored - previous[run - 1]
+            previous[run - 1] = stored
+            value = delta * 2 if delta >= 0 else -delta * 2 - 1  # zigzag
+            position = positions[run]
+            while value > 0x7f:
+                image[position] = value & 0x7f | 0x80
+                value >>= 7
+                position += 1
+            image[position] = value
+            positions[run] = position + 1
+            if position >= limits[run]:
+                full = True
+            run += 1
+
+        block_offset = self.data_offset + self.block * self.block_size
+        # Изменились концы всех областей: пишем одним вызовом участок от первой до последней
+        os.pwrite(self.fd, memoryview(image)[low:positions[-1]], block_offset + low)
+        self.count += 1
+        self.last_ms = timestamp_ms
+        self.full = full
+        os.pwrite(self.fd, BLOCK_HEADER.pack(BLOCK_MAGIC, self.count, self.first_ms, self.last_ms), block_offset)
+
+    def close(self):
+        os.close(self.fd)
+        os.close(self.index_fd)
+
+
+def last_timestamp(directory):
+    """
+    Возвращает время последней записи истории в каталоге directory (мс) или None, если записей нет
+    """
+    names = sorted(name for name in os.listdir(directory) if name.endswith(SEGMENT_SUFFIX))
+    for name in reversed(names):
+        try:
+            segment = HistorySegment(os.path.join(directory, name))
+        except (OSError, ValueError):
+            continue
+        try:
+            for block in range(segment.block_count - 1, -1, -1):
+                magic, count, first_ms, last_ms = segment.block_header(block)
+                if magic == BLOCK_MAGIC and count:
+                    return last_ms
+        finally:
+            segment.close()
+    return None
+
+
+class HistoryWriter:
+    """
+    Дописывает снимки в каталог истории, начиная новый сегмент раз в segment_seconds
+    и при изменении набора точек монтирования
+    Время записей не убывает (в том числе после перезапуска с уже заполненным каталогом):
+    снимок, сделанный после перевода часов назад, записывается со временем предыдущей записи,
+    а новый сегмент начинается строго позже последней записи предыдущего
+    """
+
+    def __init__(self, directory, block_size=DEFAULT_BLOCK_SIZE, segment_seconds=SEGMENT_SECONDS):
+        self.directory = directory
+        self.block_size = block_size
+        self.segment_ms = int(segment_seconds * 1000)
+        self.segment = None  # Текущий SegmentWriter
+        self.column_key = None  # Имена точек монтирования текущего сегмента
+        os.makedirs(directory, exist_ok=True)
+        self.last_ms = last_timestamp(directory)  # Время последней записи истории (мс) или None
+        self.clamped = 0  # Сколько снимков записано со временем предыдущей записи (часы ушли назад)
+
+    def append(self, sample):
+        """
+        Дописывает снимок snapshot.Snapshot
+        """
+        timestamp_ms = int(sample.timestamp * 1000)
+        last_ms = self.last_ms
+        if last_ms is not None and timestamp_ms < last_ms:
+            timestamp_ms = last_ms
+            self.clamped += 1
+        column_key = tuple(disk[0] for disk in sample.disks)
+        segment = self.segment
+        if segment is None or column_key != self.column_key or timestamp_ms >= segment.start_ms + self.segment_ms:
+            # Новый сегмент: сутки прошли или изменились точки монтирования
+            if segment is not None:
+                segment.close()
+            if last_ms is not None and timestamp_ms <= last_ms:
+                # Сегмент i покрывает время от своего начала до начала следующего,
+                # поэтому новый начинается позже последней записи
+                timestamp_ms = last_ms + 1
+            path = os.path.join(self.directory, f"{timestamp_ms:015d}{SEGMENT_SUFFIX}")
+            segment = self.segment = SegmentWriter(path, snapshot_columns(sample), timestamp_ms, self.block_size)
+            self.column_key = column_key
+        segment.append(timestamp_ms, snapshot_values(sample))
+        self.last_ms = timestamp_ms
+
+    def close(self):
+        if self.segment is not None:
+            self.segment.close()
+            self.segment = None
+
+
+class HistorySegment:
+    """
+    Сегмент истории, открытый для чтения через mmap
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.block_size, column_count, self.start_ms, self.data_offset = \
+            SEGMENT_HEADER.unpack_from(self.data, 0)
+        if magic != SEGMENT_MAGIC or version != HISTORY_VERSION:
+            self.data.close()
+            raise ValueError(f"{path}: не сегмент истории версии {HISTORY_VERSION}")
+
+        self.columns = []  # Список (имя, множитель)
+        offset = SEGMENT_HEADER.size
+        for _ in range(column_count):
+            scale, length = COLUMN_HEADER.unpack_from(self.data, offset)
+            offset += COLUMN_HEADER.size
+            self.columns.append((self.data[offset:offset + length].decode('utf-8'), scale))
+            offset += length
+        self.column_index = {name: index for index, (name, scale) in enumerate(self.columns)}
+        self.block_count = max(0, -(-(len(self.data) - self.data_offset) // self.block_size))
+        self.index = self.load_index()
+
+    def load_index(self):
+        """
+        Возвращает индекс времени: последовательность времени первой записи каждого блока
+        Индекс читается через mmap; если он короче числа блоков (запись оборвалась),
+        недостающие значения берутся из заголовков блоков
+        """
+        index = []
+        index_path = self.path[:-len(SEGMENT_SUFFIX)] + INDEX_SUFFIX
+        try:
+            with open(index_path, 'rb') as f:
+                size = os.fstat(f.fileno()).st_size // 8 * 8
+                if size:
+                    self.index_map = mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ)
+                    index = memoryview(self.index_map).cast('q')
+        except OSError:
+            pass
+        if len(index) >= self.block_count:
+            return index
+        return list(index) + [self.block_header(block)[2] for block in range(len(index), self.block_count)]
+
+    def block_header(self, block):
+        return BLOCK_HEADER.unpack_from(self.data, self.data_offset + block * self.block_size)
+
+    def scan(self, column, start_ms, end_ms):
+        """
+        Возвращает значения столбца с номером column за [start_ms, end_ms]:
+        список кортежей (время_мс, сохраненное_значение); 0 - значения нет
+        Разбираются только блоки, найденные по индексу, и в каждом - только области
+        времени и нужного столбца
+        """
+        data, index = self.data, self.index
+        first = max(0, bisect.bisect_right(index, start_ms) - 1)
+        last = bisect.bisect_right(index, end_ms)
+        points = []
+        for block in range(first, min(last, self.block_count)):
+            magic, count, first_ms, last_ms = self.block_header(block)
+            if magic != BLOCK_MAGIC or last_ms < start_ms:
+                continue
+            block_offset = self.data_offset + block * self.block_size
+            time_offset = block_offset + RUN_OFFSET.unpack_from(data, block_offset + BLOCK_HEADER.size)[0]
+            offset = block_offset + RUN_OFFSET.unpack_from(
+                data, block_offset + BLOCK_HEADER.size + (column + 1) * RUN_OFFSET.size)[0]
+            timestamp_ms, value = first_ms, 0
+            for _ in range(count):
+                delta_ms, time_offset = read_varint(data, time_offset)
+                timestamp_ms += delta_ms
+                delta, offset = read_varint(data, offset)
+                value += unzigzag(delta)
+                if timestamp_ms > end_ms:
+                    break
+                if timestamp_ms >= start_ms:
+                    points.append((timestamp_ms, value))
+        return points
+
+    def close(self):
+        if isinstance(self.index, memoryview):
+            self.index.release()
+            self.index_map.close()
+        self.data.close()
+
+
+class HistoryReader:
+    """
+    Запросы к каталогу истории
+    Сегменты открываются (mmap) только когда запрос затрагивает их интервал времени
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        names = sorted(name for name in os.listdir(directory) if name.endswith(SEGMENT_SUFFIX))
+        self.paths = [os.path.join(directory, name) for name in names]
+        self.starts = [int(name[:-len(SEGMENT_SUFFIX)]) for name in names]  # Начало каждого сегмента (мс)
+        self.segments = {}  # путь -> открытый HistorySegment
+
+    def segment(self, path):
+        segment = self.segments.get(path)
+        if segment is None:
+            segment = self.segments[path] = HistorySegment(path)
+        return segment
+
+    def columns(self):
+        """
+        Возвращает имена столбцов последнего сегмента
+        """
+        return [name for name, scale in self.segment(self.paths[-1]).columns] if self.paths else []
+
+    def series(self, column, start=None, end=None):
+        """
+        Возвращает значения столбца column за интервал [start, end] (секунды Unix; None - без границы)
+        Список кортежей (время, значение); отсутствующие значения пропускаются
+        """
+        start_ms = -2 ** 63 if start is None else int(start * 1000)
+        end_ms = 2 ** 63 - 1 if end is None else int(end * 1000)
+        # Сегмент i покрывает время от своего начала до начала следующего
+        first = max(0, bisect.bisect_right(self.starts, start_ms) - 1)
+        last = bisect.bisect_right(self.starts, end_ms)
+        points = []
+        for path in self.paths[first:last]:
+            segment = self.segment(path)
+            position = segment.column_index.get(column)
+            if position is None:
+                continue
+            scale = segment.columns[position][1]
+            points.extend((timestamp_ms / 1000, (stored - 1) / scale if scale != 1 else stored - 1)
+                          for timestamp_ms, stored in segment.scan(position, start_ms, end_ms) if stored)
+        return points
+
+    def aggregate(self, column, start=None, end=None):
+        """
+        Возвращает кортеж (число_значений, минимум, максимум, среднее) за интервал или None
+        """
+        values = [value for timestamp, value in self.series(column, start, end)]
+        if not values:
+            return None
+        return len(values), min(values), max(values), sum(values) / len(values)
+
+    def close(self):
+        for segment in self.segments.values():
+            segment.close()
+        self.segments.clear()
+
+
+def benchmark_history(records=20000, mount_count=10):
+    """
+    Записывает records посекундных снимков (mount_count точек монтирования) и ищет
+    максимум загрузки памяти за последний час
+    Возвращает кортеж: (байт_на_снимок, байт_на_снимок_в_NDJSON, мкс_на_запись, мс_на_запрос_за_час)
+    """
+    import random
+    import shutil
+    import tempfile
+
+    import snapshot
+
+    directory = tempfile.mkdtemp(prefix='history-benchmark-')
+    try:
+        generator = random.Random(0)
+        start = 1_700_000_000.0
+        available = 8000
+        samples = []
+        for step in range(records):
+            # Память и нагрузка меняются понемногу, диски почти не меняются
+            available = max(0, available + generator.randint(-20, 20))
+            samples.append(snapshot.Snapshot(
+                timestamp=start + step, platform='linux', processor_count=8,
+                load_avg=[round(generator.uniform(0, 4), 2) for _ in range(3)],
+                mem_total_mb=16000, mem_available_mb=available, swap_total_mb=2048, swap_free_mb=2048,
+                virtual_mb=32767,
+                disks=[(f"/mnt/{index}", 'ext4', 100 - step // 5000, 200) for index in range(mount_count)]))
+
+        writer = HistoryWriter(directory)
+        started = time.perf_counter()
+        for sample in samples:
+            writer.append(sample)
+        append_us = (time.perf_counter() - started) / records * 1_000_000
+        writer.close()
+
+        size = sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory))
+        ndjson_size = sum(len(sample.to_ndjson_line().encode('utf-8')) for sample in samples[:1000])
+        # Снимки больше не нужны; иначе сборка мусора по ним попадает во время запроса
+        del samples
+
+        reader = HistoryReader(directory)
+        end = start + records - 1
+        started = time.perf_counter()
+        reader.aggregate('memory_load', end - 3600, end)
+        query_ms = (time.perf_counter() - started) * 1000
+        reader.close()
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    return size / records, ndjson_size / 1000, append_us, query_ms
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Запросы к истории снимков")
+    parser.add_argument('directory', help="каталог истории (см. --history в режиме --watch)")
+    parser.add_argument('--column', default='memory_load', help="столбец (по умолчанию memory_load)")
+    parser.add_argument('--last', type=float, default=3600, metavar='SECONDS',
+                        help="интервал от текущего момента назад (по умолчанию час)")
+    parser.add_argument('--columns', action='store_true', help="вывести имена столбцов")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    reader = HistoryReader(args.directory)
+    try:
+        if args.columns:
+            print("\n".join(reader.columns()))
+        else:
+            result = reader.aggregate(args.column, time.time() - args.last)
+            if result is None:
+                print(f"{args.column}: нет значений за последние {args.last:g} с")
+            else:
+                count, minimum, maximum, mean = result
+                print(f"{args.column} за последние {args.last:g} с: мин {minimum:g}, макс {maximum:g},"
+                      f" среднее {mean:.2f} ({count} значений)")
+    finally:
+        reader.close()
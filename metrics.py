@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Экспорт снимков в формате Prometheus (text exposition 0.0.4) по HTTP: GET /metrics
+# Текст страницы собирается только когда меняется снимок: заголовки HELP/TYPE и имена
+# рядов с метками готовятся один раз для набора рядов, а при обновлении заново
+# форматируются только изменившиеся значения
+# Все одновременные запросы получают одни и те же готовые байты (и один сжатый вариант)
+
+import asyncio
+import gzip
+import socket
+import time
+
+import agent
+
+
+# Сколько секунд сервер отдает одну и ту же страницу, прежде чем собрать новый снимок
+DEFAULT_MAX_AGE = 1.0
+# Порт по умолчанию (как у node_exporter)
+DEFAULT_PORT = 9100
+# Тип содержимого страницы
+CONTENT_TYPE = b'text/plain; version=0.0.4; charset=utf-8'
+# Максимальное число строк заголовков одного запроса
+MAX_HEADER_LINES = 100
+
+# Семейства метрик: (имя, тип, описание) в порядке вывода
+FAMILIES = (
+    ('sysinfo_os_info', 'gauge', "Operating system, kernel, host and architecture (always 1)"),
+    ('sysinfo_processors', 'gauge', "Logical processors (cgroup quota rounded up if stricter)"),
+    ('sysinfo_cpu_limit', 'gauge', "cgroup CPU quota in processors"),
+    ('sysinfo_load_average', 'gauge', "Load average over the window"),
+    ('sysinfo_memory_total_bytes', 'gauge', "Total memory (cgroup limit if stricter)"),
+    ('sysinfo_memory_available_bytes', 'gauge', "Available memory"),
+    ('sysinfo_swap_total_bytes', 'gauge', "Total swap"),
+    ('sysinfo_swap_free_bytes', 'gauge', "Free swap"),
+    ('sysinfo_vmalloc_total_bytes', 'gauge', "Total vmalloc address space"),
+    ('sysinfo_pressure_avg10_ratio', 'gauge', "Share of time tasks stalled on the resource, 10 s average"),
+    ('sysinfo_filesystem_free_bytes', 'gauge', "Free space on the mount point"),
+    ('sysinfo_filesystem_size_bytes', 'gauge', "Size of the mount point"),
+    ('sysinfo_scrape_timestamp_seconds', 'gauge', "Time the snapshot was collected"),
+)
+MB = 1024 * 1024
+GB = 1024 * 1024 * 1024
+
+
+def escape_label(value):
+    """
+    Экранирует значение метки: обратная косая черта, кавычка и перевод строки
+    """
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def labels_text(**labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{escape_label(value)}"' for name, value in labels.items()) + '}'
+
+
+def scaled(value, factor):
+    return None if value is None else value * factor
+
+
+def snapshot_series(sample):
+    """
+    Возвращает ряды снимка snapshot.Snapshot: список кортежей (семейство, метки, значение)
+    Метки - готовая строка {имя="значение",...}; значение None выводится как NaN
+    """
+    series = [
+        ('sysinfo_os_info', labels_text(distro=sample.os_name or '', kernel=sample.kernel or '',
+                                        host=sample.host_name or '', architecture=sample.architecture or ''), 1),
+        ('sysinfo_processors', '', sample.processor_count),
+    ]
+    if sample.cpu_limit is not None:
+        series.append(('sysinfo_cpu_limit', '', sample.cpu_limit))
+    if sample.load_avg:
+        for window, value in zip(('1m', '5m', '15m'), sample.load_avg):
+            series.append(('sysinfo_load_average', labels_text(window=window), value))
+    series += [
+        ('sysinfo_memory_total_bytes', '', scaled(sample.mem_total_mb, MB)),
+        ('sysinfo_memory_available_bytes', '', scaled(sample.mem_available_mb, MB)),
+        ('sysinfo_swap_total_bytes', '', scaled(sample.swap_total_mb, MB)),
+        ('sysinfo_swap_free_bytes', '', scaled(sample.swap_free_mb, MB)),
+        ('sysinfo_vmalloc_total_bytes', '', scaled(sample.virtual_mb, MB)),
+    ]
+    for resource, values in (sample.pressure or {}).items():
+        series.append(('sysinfo_pressure_avg10_ratio', labels_text(resource=resource, kind='some'),
+                       values['some'][0] / 100))
+        if values['full'] is not None:
+            series.append(('sysinfo_pressure_avg10_ratio', labels_text(resource=resource, kind='full'),
+                           values['full'][0] / 100))
+    # Объемы в байтах: точные значения statvfs (Linux) или целые гигабайты диска (Windows)
+    disk_bytes = sample.disk_bytes or [(scaled(disk[2], GB), scaled(disk[3], GB)) for disk in sample.disks]
+    # Точка монтирования может встречаться в таблице несколько раз (перекрывающие монтирования):
+    # у одного ряда должен быть один отсчет, поэтому оставляем последнюю запись - видимую ФС
+    disks = {disk[0]: (disk[1], *sizes) for disk, sizes in zip(sample.disks, disk_bytes)}
+    # Ряды одного семейства должны идти подряд, поэтому точки монтирования проходим дважды
+    labels = [labels_text(mountpoint=name, fstype=fs_type) for name, (fs_type, free, size) in disks.items()]
+    series += [('sysinfo_filesystem_free_bytes', mount_labels, free)
+               for mount_labels, (fs_type, free, size) in zip(labels, disks.values())]
+    series += [('sysinfo_filesystem_size_bytes', mount_labels, size)
+               for mount_labels, (fs_type, free, size) in zip(labels, disks.values())]
+    series.append(('sysinfo_scrape_timestamp_seconds', '', sample.timestamp))
+    return series
+
+
+def format_value(value):
+    """
+    Значение ряда с переводом строки: целые без точки, дробные через repr, None - NaN
+    """
+    if value is None:
+        return b'NaN\n'
+    if isinstance(value, int) or value.is_integer():
+        return b'%d\n' % value
+    return repr(value).encode('ascii') + b'\n'
+
+
+class MetricsPage:
+    """
+    Страница /metrics, обновляемая по снимкам
+    Разметка (заголовки семейств и имена рядов с метками) строится заново только когда
+    меняется набор рядов (например, появилась точка монтирования); значения
+    форматируются заново только изменившиеся
+    """
+
+    def __init__(self):
+        self.layout = None  # Набор рядов: кортеж (семейство, метки)
+        self.parts = []  # Чередующиеся куски текста: префикс ряда, значение ряда, префикс, ...
+        self.values = []  # Последние значения рядов
+        self.body = b''  # Готовый текст страницы
+        self.compressed = None  # Сжатый gzip текст (создается при первом запросе с gzip)
+        self.version = 0  # Номер версии страницы; растет при каждом изменении текста
+        self.renders = 0  # Сколько раз текст собирался заново
+
+    def update(self, sample):
+        """
+        Обновляет страницу по снимку; возвращает True, если текст изменился
+        """
+        series = snapshot_series(sample)
+        layout = tuple((family, labels) for family, labels, value in series)
+        values = [value for family, labels, value in series]
+        if layout != self.layout:
+            self.build_layout(layout)
+            previous_values = [object()] * len(values)  # Все значения будут отформатированы заново
+        elif values == self.values:
+            return False
+        else:
+            previous_values = self.values
+
+        parts = self.parts
+        for index, (value, previous) in enumerate(zip(values, previous_values)):
+            if value != previous or value is None:
+                parts[2 * index + 1] = format_value(value)
+        self.values = values
+        self.body = b''.join(parts)
+        self.compressed = None
+        self.version += 1
+        self.renders += 1
+        return True
+
+    def build_layout(self, layout):
+        """
+        Готовит префиксы рядов: "# HELP"/"# TYPE" перед первым рядом семейства и "имя{метки} "
+        """
+        descriptions = {name: (kind, help_text) for name, kind, help_text in FAMILIES}
+        parts = []
+        previous_family = None
+        for family, labels in layout:
+            prefix = f"{family}{labels} "
+            if family != previous_family:
+                kind, help_text = descriptions[family]
+                prefix = f"# HELP {family} {help_text}\n# TYPE {family} {kind}\n" + prefix
+                previous_family = family
+            parts.append(prefix.encode('utf-8'))
+            parts.append(b'')  # Место для значения
+        self.layout = layout
+        self.parts = parts
+
+    def gzipped(self):
+        """
+        Возвращает сжатый текст страницы (сжимается один раз на версию)
+        """
+        if self.compressed is None:
+            self.compressed = gzip.compress(self.body, compresslevel=1)
+        return self.compressed
+
+
+class MetricsServer:
+    """
+    HTTP-сервер страницы /metrics: снимок собирается не чаще раза в max_age секунд,
+    одновременные запросы ждут один общий сбор и получают одни и те же байты
+    Поддерживаются постоянные соединения (keep-alive) и сжатие gzip
+    """
+
+    def __init__(self, collect, max_age=DEFAULT_MAX_AGE):
+        self.collect = collect  # Функция без аргументов, возвращающая snapshot.Snapshot
+        self.max_age = max_age
+        self.page = MetricsPage()
+        self.collected_at = None  # Когда собран последний снимок (monotonic)
+        self.lock = None  # asyncio.Lock, создается в цикле событий
+        self.headers = {}  # (версия, gzip) -> готовые заголовки ответа
+        self.scrapes = 0  # Сколько раз отдана страница
+
+    async def current(self):
+        """
+        Возвращает страницу, собрав новый снимок, если прошлый старше max_age
+        """
+        async with self.lock:
+            if self.collected_at is None or time.monotonic() - self.collected_at > self.max_age:
+                # Сбор блокирующий - выполняем его вне цикла событий
+                loop = asyncio.get_running_loop()
+                sample = await loop.run_in_executor(None, self.collect)
+                if self.page.update(sample):
+                    self.headers.clear()
+                self.collected_at = time.monotonic()
+            return self.page
+
+    def response_headers(self, page, compressed):
+        key = (page.version, compressed)
+        headers = self.headers.get(key)
+        if headers is None:
+            body = page.gzipped() if compressed else page.body
+            headers = self.headers[key] = (
+                b'HTTP/1.1 200 OK\r\nContent-Type: ' + CONTENT_TYPE
+                + (b'\r\nContent-Encoding: gzip' if compressed else b'')
+                + b'\r\nContent-Length: %d\r\n\r\n' % len(body))
+        return headers
+
+    async def handle(self, reader, writer):
+        """
+        Обслуживает одно соединение: последовательные запросы HTTP/1.x
+        """
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break  # Клиент закрыл соединение
+                compressed = False
+                keep_alive = request_line.rstrip().endswith(b'HTTP/1.1')
+                for _ in range(MAX_HEADER_LINES):
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.partition(b':')
+                    name = name.strip().lower()
+                    if name == b'accept-encoding':
+                        compressed = b'gzip' in value
+                    elif name == b'connection':
+                        keep_alive = value.strip().lower() == b'keep-alive' or \
+                                     (keep_alive and value.strip().lower() != b'close')
+
+                parts = request_line.split()
+                if len(parts) >= 2 and parts[0] in (b'GET', b'HEAD') and parts[1].split(b'?')[0] == b'/metrics':
+                    page = await self.current()
+                    writer.write(self.response_headers(page, compressed))
+                    if parts[0] == b'GET':
+                        writer.write(page.gzipped() if compressed else page.body)
+                    self.scrapes += 1
+                else:
+                    writer.write(b'HTTP/1.1 404 Not Found\r\nContent-Type: text/plain\r\n'
+                                 b'Content-Length: 10\r\n\r\nnot found\n')
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, address, ready=None):
+        """
+        Слушает адрес ("хост:порт" или "unix:/путь") и обслуживает клиентов до остановки
+        """
+        self.lock = asyncio.Lock()
+        kind, target = agent.parse_address(address)
+        if kind == 'unix':
+            agent.remove_stale_socket(target)
+            server = await asyncio.start_unix_server(self.handle, target)
+        else:
+            server = await asyncio.start_server(self.handle, *target, reuse_address=True)
+        if ready is not None:
+            ready.set()
+        async with server:
+            await server.serve_forever()
+
+
+def serve(collect, address, max_age=DEFAULT_MAX_AGE):
+    """
+    Запускает сервер /metrics на адресе address (блокирует до Ctrl+C)
+    """
+    try:
+        asyncio.run(MetricsServer(collect, max_age).serve(address))
+    except KeyboardInterrupt:
+        pass
+
+
+def free_port():
+    """
+    Возвращает свободный TCP-порт на 127.0.0.1
+    """
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        return probe.getsockname()[1]
+
+
+def benchmark_scrapes(server_command, connections=50, scrapes_per_connection=100, compressed=False):
+    """
+    Нагрузочный тест: запускает сервер (server_command + адрес) в отдельном процессе
+    и опрашивает /metrics из connections постоянных соединений одновременно
+    Возвращает кортеж: (опросов_в_секунду, всего_опросов, байт_в_ответе)
+    """
+    import subprocess
+
+    address = f"127.0.0.1:{free_port()}"
+    host, port = agent.parse_address(address)[1]
+    process = subprocess.Popen(server_command + [address], stdout=subprocess.DEVNULL)
+    request = (b'GET /metrics HTTP/1.1\r\nHost: localhost\r\n'
+               + (b'Accept-Encoding: gzip\r\n' if compressed else b'') + b'\r\n')
+    try:
+        # Ждем, пока сервер начнет принимать соединения
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                socket.create_connection((host, port), timeout=1).close()
+                break
+            except OSError:
+                if time.monotonic() > deadline or process.poll() is not None:
+                    raise RuntimeError("сервер /metrics не запустился")
+                time.sleep(0.05)
+
+        async def scrape(count, sizes):
+            reader, writer = await asyncio.open_connection(host, port)
+            try:
+                for _ in range(count):
+                    writer.write(request)
+                    length = 0
+                    while True:
+                        line = await reader.readline()
+                        if line == b'\r\n':
+                            break
+                        if line.lower().startswith(b'content-length:'):
+                            length = int(line.split(b':')[1])
+                    await reader.readexactly(length)
+                    sizes.append(length)
+            finally:
+                writer.close()
+
+        async def run():
+            sizes = []
+            await scrape(1, sizes)  # Первый опрос собирает снимок
+            started = time.perf_counter()
+            await asyncio.gather(*(scrape(scrapes_per_connection, sizes) for _ in range(connections)))
+            return len(sizes) - 1, time.perf_counter() - started, sizes[-1]
+
+        scrapes, elapsed, size = asyncio.run(run())
+    finally:
+        process.terminate()
+        process.wait()
+    return scrapes / elapsed, scrapes, size
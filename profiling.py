@@ -0,0 +1,409 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Профилирование сборщиков: время каждого вызова get_*_info() (perf_counter_ns),
+# число системных вызовов и прочитанных байт по каждому сборщику и гистограммы времени
+# Пока профилировщик не включен, ничего не подменяется и не оборачивается,
+# поэтому обычный запуск не платит за профилирование ничего
+# Подмена действует только в модулях обернутых сборщиков: в их пространстве имен
+# os и open заменяются считающими версиями, остальная программа их не видит
+
+import os
+import sys
+import threading
+import time
+from array import array
+
+
+# Режимы профилирования: только время и счетчики, плюс cProfile, плюс tracemalloc
+PROFILE_MODES = ('timing', 'cprofile', 'tracemalloc')
+# Функции модуля os, вызовы которых считаются (каждая соответствует одному системному вызову)
+COUNTED_OS_CALLS = ('open', 'read', 'pread', 'preadv', 'stat', 'statvfs', 'scandir', 'listdir')
+# Функции чтения, результат которых добавляется к прочитанным байтам
+READ_CALLS = ('read', 'pread')
+# Корзин гистограммы на каждую октаву (удвоение времени): ширина корзины - 1/8 ее нижней
+# границы, поэтому середина корзины отличается от любого вызова в ней не больше чем на 6.25%
+SUB_BUCKETS = 8
+# Бит на номер корзины внутри октавы
+SUB_BUCKET_BITS = SUB_BUCKETS.bit_length() - 1
+# Число корзин гистограммы времени в наносекундах: точные значения до SUB_BUCKETS нс
+# и по SUB_BUCKETS корзин на октаву дальше, последняя корзина (от ~18 часов) без верхней границы
+HISTOGRAM_BUCKETS = SUB_BUCKETS * 44
+# Имя, под которым учитываются вызовы вне обернутых сборщиков
+OTHER = 'прочее'
+
+
+class CollectorStats:
+    """
+    Накопленная статистика одного сборщика
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.calls = 0  # Сколько раз вызван
+        self.errors = 0  # Сколько вызовов завершились исключением
+        self.total_ns = 0  # Суммарное время всех вызовов
+        self.min_ns = None  # Самый быстрый вызов
+        self.max_ns = 0  # Самый долгий вызов
+        self.histogram = array('Q', bytes(8 * HISTOGRAM_BUCKETS))  # Вызовы по корзинам, см. bucket_index
+        self.syscalls = {}  # имя_вызова -> сколько раз
+        self.bytes_read = 0  # Сколько байт (для текстовых файлов - символов) прочитано
+
+    def record(self, elapsed_ns, failed=False):
+        """
+        Учитывает один вызов длительностью elapsed_ns
+        """
+        self.calls += 1
+        self.errors += failed
+        self.total_ns += elapsed_ns
+        if elapsed_ns > self.max_ns:
+            self.max_ns = elapsed_ns
+        if self.min_ns is None or elapsed_ns < self.min_ns:
+            self.min_ns = elapsed_ns
+        self.histogram[bucket_index(elapsed_ns)] += 1
+
+    def percentile(self, percent):
+        """
+        Возвращает перцентиль времени вызова в наносекундах по гистограмме:
+        середину корзины, в которую он попал (ошибка не больше 6.25%),
+        но не меньше самого быстрого и не больше самого долгого вызова
+        """
+        if not self.calls:
+            return 0
+        rank = percent / 100 * self.calls
+        seen = 0
+        for index, count in enumerate(self.histogram):
+            seen += count
+            if count and seen >= rank:
+                low, high = bucket_bounds(index)
+                return min(max((low + high) // 2, self.min_ns), self.max_ns)
+        return self.max_ns
+
+    def syscall_count(self):
+        return sum(self.syscalls.values())
+
+
+def bucket_index(value):
+    """
+    Возвращает номер корзины гистограммы для значения value (наносекунды):
+    значения меньше SUB_BUCKETS попадают в свои корзины, дальше каждая октава
+    [2**k, 2**(k+1)) делится на SUB_BUCKETS равных корзин по старшим битам после ведущего
+    """
+    if value < SUB_BUCKETS:
+        return max(value, 0)
+    shift = value.bit_length() - SUB_BUCKET_BITS - 1
+    return min((shift + 1) * SUB_BUCKETS + (value >> shift) - SUB_BUCKETS, HISTOGRAM_BUCKETS - 1)
+
+
+def bucket_bounds(index):
+    """
+    Возвращает границы корзины index: (нижняя включительно, верхняя не включительно)
+    """
+    if index < SUB_BUCKETS:
+        return index, index + 1
+    shift = index // SUB_BUCKETS - 1
+    low = (SUB_BUCKETS + index % SUB_BUCKETS) << shift
+    return low, low + (1 << shift)
+
+
+class CountingFile:
+    """
+    Обертка над файлом, открытым встроенной open(): считает прочитанные байты
+    Используется только пока профилировщик включен
+    """
+
+    def __init__(self, file, stats):
+        self._file = file
+        self._stats = stats
+
+    def read(self, *args):
+        data = self._file.read(*args)
+        self._stats.bytes_read += len(data)
+        return data
+
+    def readline(self, *args):
+        data = self._file.readline(*args)
+        self._stats.bytes_read += len(data)
+        return data
+
+    def readlines(self, *args):
+        lines = self._file.readlines(*args)
+        self._stats.bytes_read += sum(len(line) for line in lines)
+        return lines
+
+    def __iter__(self):
+        for line in self._file:
+            self._stats.bytes_read += len(line)
+            yield line
+
+    def __enter__(self):
+        self._file.__enter__()
+        return self
+
+    def __exit__(self, *exc_info):
+        return self._file.__exit__(*exc_info)
+
+    def __getattr__(self, name):
+        return getattr(self._file, name)
+
+
+class CountingOs:
+    """
+    Замена модуля os в пространстве имен модуля сборщиков, пока профилировщик включен
+    Функции из COUNTED_OS_CALLS выдаются обернутыми, остальные имена - как есть
+    Сборщик определяется в момент обращения к os.<функция>, поэтому функция,
+    взятая в потоке сборщика и выполненная в рабочем потоке (как statvfs в StatvfsPool),
+    учитывается под именем этого сборщика
+    """
+
+    def __init__(self, profiler):
+        self._profiler = profiler
+
+    def __getattr__(self, name):
+        value = getattr(os, name)
+        if name not in COUNTED_OS_CALLS:
+            # Несчитаемые имена запоминаются, чтобы следующие обращения не доходили сюда
+            setattr(self, name, value)
+            return value
+        profiler = self._profiler
+        return profiler.counting_os_call(name, value, profiler.stats_for_thread())
+
+
+class Profiler:
+    """
+    Профилировщик сборщиков
+    Использование:
+        profiler = Profiler()
+        with profiler:
+            results = engine.collect(profiler.wrap_all(collectors))
+        profiler.write_report()
+    Пока профилировщик включен (enable/disable или with), в модулях обернутых функций
+    имена os и open подменены считающими версиями (CountingOs и counting_open);
+    вызовы относятся к тому сборщику, который выполняется в текущем потоке
+    в момент обращения к функции (см. CountingOs)
+    """
+
+    def __init__(self, mode='timing'):
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Неизвестный режим профилирования: {mode}")
+        self.mode = mode
+        self.stats = {}  # имя_сборщика -> CollectorStats
+        self.current = {}  # идентификатор_потока -> CollectorStats выполняющегося сборщика
+        self.lock = threading.Lock()  # Защищает создание записей в stats
+        self.namespaces = {}  # id(пространства имен) -> пространство имен модуля обернутой функции
+        self.originals = {}  # Подмененные имена: (id(пространства имен), имя) -> исходное значение
+        self.profiles = []  # Объекты cProfile.Profile всех вызовов (режим cprofile)
+        self.memory_snapshot = None  # Снимок tracemalloc после выключения (режим tracemalloc)
+        self.enabled = False
+
+    def collector_stats(self, name):
+        stats = self.stats.get(name)
+        if stats is None:
+            with self.lock:
+                stats = self.stats.setdefault(name, CollectorStats(name))
+        return stats
+
+    def stats_for_thread(self):
+        """
+        Возвращает статистику сборщика, выполняющегося в текущем потоке
+        """
+        stats = self.current.get(threading.get_ident())
+        return stats if stats is not None else self.collector_stats(OTHER)
+
+    def wrap(self, name, function):
+        """
+        Возвращает функцию, которая выполняет function и учитывает ее время под именем name
+        """
+        stats = self.collector_stats(name)
+        profiles = self.profiles if self.mode == 'cprofile' else None
+        self.add_namespace(function)
+
+        def timed(*args, **kwargs):
+            ident = threading.get_ident()
+            outer = self.current.get(ident)
+            self.current[ident] = stats
+            profile = None
+            if profiles is not None:
+                import cProfile
+                # cProfile работает в пределах одного потока, поэтому у каждого вызова свой профиль
+                profile = cProfile.Profile()
+                profiles.append(profile)
+                profile.enable()
+            failed = True
+            started = time.perf_counter_ns()
+            try:
+                result = function(*args, **kwargs)
+                failed = False
+                return result
+            finally:
+                elapsed = time.perf_counter_ns() - started
+                if profile is not None:
+                    profile.disable()
+                stats.record(elapsed, failed)
+                # Вложенный вызов возвращает учет внешнему сборщику
+                if outer is None:
+                    self.current.pop(ident, None)
+                else:
+                    self.current[ident] = outer
+
+        return timed
+
+    def wrap_all(self, collectors):
+        """
+        Оборачивает словарь сборщиков (имя -> функция) для engine.collect
+        """
+        return {name: self.wrap(name, function) for name, function in collectors.items()}
+
+    def add_namespace(self, function):
+        """
+        Запоминает пространство имен модуля, в котором определена function
+        (для связанных методов - модуля их класса), и подменяет в нем os и open,
+        если профилировщик уже включен
+        """
+        namespace = getattr(getattr(function, '__func__', function), '__globals__', None)
+        if namespace is None or id(namespace) in self.namespaces:
+            return
+        self.namespaces[id(namespace)] = namespace
+        if self.enabled:
+            self.patch(namespace)
+
+    def patch(self, namespace):
+        """
+        Подменяет os и open в пространстве имен модуля
+        """
+        key = id(namespace)
+        if namespace.get('os') is os:
+            self.originals[(key, 'os')] = os
+            namespace['os'] = CountingOs(self)
+        # Встроенная open() ищется в пространстве имен модуля раньше, чем в builtins,
+        # поэтому достаточно добавить туда свое имя, а при выключении убрать его
+        self.originals[(key, 'open')] = namespace.get('open')
+        namespace['open'] = self.counting_open
+
+    def counting_open(self, *args, **kwargs):
+        """
+        Замена встроенной open() в модулях сборщиков: считает открытие и прочитанные байты
+        """
+        stats = self.stats_for_thread()
+        stats.syscalls['open'] = stats.syscalls.get('open', 0) + 1
+        return CountingFile(open(*args, **kwargs), stats)
+
+    def counting_os_call(self, name, function, stats):
+        """
+        Обертка над функцией os: считает вызов в stats, а для чтения - и прочитанные байты
+        """
+        is_read = name in READ_CALLS
+
+        def counted(*args, **kwargs):
+            stats.syscalls[name] = stats.syscalls.get(name, 0) + 1
+            result = function(*args, **kwargs)
+            if is_read:
+                stats.bytes_read += len(result)
+            elif name == 'preadv':
+                stats.bytes_read += result
+            return result
+
+        return counted
+
+    def enable(self):
+        """
+        Подменяет функции ввода-вывода считающими обертками в модулях обернутых сборщиков
+        """
+        if self.enabled:
+            return
+        self.enabled = True
+        for namespace in self.namespaces.values():
+            self.patch(namespace)
+
+        if self.mode == 'tracemalloc':
+            import tracemalloc
+            tracemalloc.start()
+
+    def disable(self):
+        """
+        Возвращает исходные функции ввода-вывода
+        """
+        if not self.enabled:
+            return
+        self.enabled = False
+        for (key, name), original in self.originals.items():
+            namespace = self.namespaces[key]
+            if original is None:
+                namespace.pop(name, None)
+            else:
+                namespace[name] = original
+        self.originals.clear()
+        if self.mode == 'tracemalloc':
+            import tracemalloc
+            self.memory_snapshot = tracemalloc.take_snapshot()
+            tracemalloc.stop()
+
+    def __enter__(self):
+        self.enable()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.disable()
+
+    def report(self):
+        """
+        Возвращает список кортежей по сборщикам, от самого долгого к самому быстрому:
+        (имя, вызовов, ошибок, среднее_мс, p50_мс, p95_мс, максимум_мс, системных_вызовов, прочитано_байт)
+        """
+        rows = []
+        for stats in self.stats.values():
+            if not stats.calls and not stats.syscalls:
+                continue
+            mean_ms = stats.total_ns / stats.calls / 1e6 if stats.calls else 0.0
+            rows.append((stats.name, stats.calls, stats.errors, mean_ms, stats.percentile(50) / 1e6,
+                         stats.percentile(95) / 1e6, stats.max_ns / 1e6, stats.syscall_count(),
+                         stats.bytes_read))
+        rows.sort(key=lambda row: row[3] * row[1], reverse=True)
+        return rows
+
+    def write_report(self, stream=None, limit=15):
+        """
+        Выводит отчет профилирования (по умолчанию в stderr, чтобы не смешивать с данными)
+        В режимах cprofile и tracemalloc добавляются limit самых дорогих функций или строк
+        """
+        stream = stream or sys.stderr
+        stream.write("-" * 50 + "\nПРОФИЛЬ СБОРЩИКОВ (время в мс)\n")
+        stream.write(f"{'сборщик':<12} {'вызовов':>7} {'ошибок':>6} {'среднее':>9} {'p50':>9} {'p95':>9}"
+                     f" {'макс':>9} {'syscall':>8} {'байт':>10}\n")
+        for name, calls, errors, mean_ms, p50_ms, p95_ms, max_ms, syscalls, bytes_read in self.report():
+            stream.write(f"{name:<12} {calls:>7} {errors:>6} {mean_ms:>9.3f} {p50_ms:>9.3f} {p95_ms:>9.3f}"
+                         f" {max_ms:>9.3f} {syscalls:>8} {bytes_read:>10}\n")
+
+        if self.profiles:
+            import pstats
+            # Профили всех вызовов из всех потоков объединяются в один отчет
+            merged = pstats.Stats(self.profiles[0], stream=stream)
+            for profile in self.profiles[1:]:
+                merged.add(profile)
+            stream.write("cProfile (по собственному времени):\n")
+            merged.sort_stats('tottime').print_stats(limit)
+
+        if self.memory_snapshot is not None:
+            stream.write("tracemalloc (строки с наибольшим объемом памяти):\n")
+            for statistic in self.memory_snapshot.statistics('lineno')[:limit]:
+                stream.write(f" {statistic}\n")
+        stream.flush()
+
+
+def benchmark_overhead(function, iterations=20000):
+    """
+    Измеряет стоимость вызова function без профилировщика и через Profiler.wrap
+    Возвращает кортеж: (мкс_без_профилировщика, мкс_с_профилировщиком)
+    """
+    started = time.perf_counter_ns()
+    for _ in range(iterations):
+        function()
+    plain = (time.perf_counter_ns() - started) / iterations / 1000
+
+    profiler = Profiler()
+    timed = profiler.wrap('benchmark', function)
+    with profiler:
+        started = time.perf_counter_ns()
+        for _ in range(iterations):
+            timed()
+        profiled = (time.perf_counter_ns() - started) / iterations / 1000
+    return plain, profiled
@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Адаптивный планировщик сборщиков: у каждого сборщика свой интервал,
+# который растет, пока значения не меняются, и сокращается, когда они меняются
+# быстро или пересекают порог
+# Сроки всех сборщиков отсчитывает одно колесо таймеров (timer wheel) в одном потоке,
+# а к каждому сроку добавляется случайный сдвиг (jitter), чтобы хосты парка
+# не читали данные в один и тот же момент
+# Блокирующие сборщики (statvfs, который может зависнуть на NFS) выполняются каждый
+# в своем потоке, чтобы не задерживать остальные
+
+import math
+import random
+import threading
+import time
+
+
+# Шаг колеса таймеров в секундах и число ячеек (один оборот - 51.2 с)
+DEFAULT_TICK = 0.1
+DEFAULT_SLOTS = 512
+# Доля шага, на которую допускается проснуться раньше срока (ошибка округления start + step * tick)
+TICK_EPSILON = 1e-6
+# Во сколько раз растет интервал после стабильного значения и сокращается после изменения
+DEFAULT_BACKOFF = 2.0
+DEFAULT_SPEEDUP = 2.0
+# Доля интервала, на которую случайно сдвигается каждый срок (в обе стороны)
+DEFAULT_JITTER = 0.1
+# Наибольший случайный сдвиг первого запуска сборщика в секундах:
+# редкие сборщики (ОС, имя хоста) не должны ждать целый минимальный интервал до первого значения
+DEFAULT_INITIAL_SPREAD = 1.0
+# Относительное изменение числа, которое считается изменением значения
+DEFAULT_TOLERANCE = 0.01
+# Сколько секунд start ждет первых значений блокирующих сборщиков
+DEFAULT_PRIME_TIMEOUT = 5.0
+
+
+def significant_change(old, new, tolerance=DEFAULT_TOLERANCE):
+    """
+    Проверяет, отличается ли новое значение сборщика от старого больше чем на tolerance
+    Числа сравниваются относительно, кортежи и списки - поэлементно, остальное - на равенство
+    """
+    if isinstance(new, (tuple, list)) and isinstance(old, (tuple, list)):
+        return len(old) != len(new) or any(significant_change(a, b, tolerance) for a, b in zip(old, new))
+    if isinstance(new, (int, float)) and isinstance(old, (int, float)) and not isinstance(new, bool):
+        return abs(new - old) > tolerance * max(abs(old), abs(new))
+    return old != new
+
+
+class Schedule:
+    """
+    Расписание одного сборщика
+    urgent - необязательная функция от значения: True, если значение за порогом
+    (тогда сборщик снова опрашивается с минимальным интервалом)
+    blocking - сборщик может надолго заблокироваться (statvfs зависшего NFS); после
+    Scheduler.start такой сборщик выполняется в собственном потоке
+    """
+
+    def __init__(self, name, function, min_interval, max_interval, urgent=None, tolerance=DEFAULT_TOLERANCE,
+                 backoff=DEFAULT_BACKOFF, speedup=DEFAULT_SPEEDUP, blocking=False):
+        self.name = name
+        self.function = function
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.urgent = urgent
+        self.tolerance = tolerance
+        self.backoff = backoff
+        self.speedup = speedup
+        self.blocking = blocking
+        self.interval = min_interval  # Текущий интервал
+        self.value = None  # Последнее значение сборщика
+        self.reference = None  # Значение, с которым сравниваются новые (последнее значимое изменение)
+        self.runs = 0  # Сколько раз выполнен
+        self.changes = 0  # Сколько раз значение значимо изменилось
+        self.errors = 0  # Сколько раз сборщик завершился исключением
+        self.last_run = None  # Когда выполнен последний раз
+
+    def run(self, now):
+        """
+        Выполняет сборщик и пересчитывает интервал
+        Возвращает True, если значение значимо изменилось
+        """
+        self.runs += 1
+        self.last_run = now
+        try:
+            value = self.function()
+        except Exception:
+            # Ошибка сборщика: значение не обновляем, повторяем с минимальным интервалом
+            self.errors += 1
+            self.interval = self.min_interval
+            return False
+        self.value = value
+        changed = self.runs == 1 or significant_change(self.reference, value, self.tolerance)
+        if changed:
+            self.changes += 1
+            self.reference = value
+        if self.urgent is not None and value is not None and self.urgent(value):
+            self.interval = self.min_interval
+        elif changed:
+            self.interval = max(self.min_interval, self.interval / self.speedup)
+        else:
+            self.interval = min(self.max_interval, self.interval * self.backoff)
+        return changed
+
+
+class TimerWheel:
+    """
+    Хешированное колесо таймеров: срок попадает в ячейку (номер_шага % число_ячеек),
+    добавление - O(1), продвижение на шаг - просмотр одной ячейки
+    Сроки дальше одного оборота хранятся в той же ячейке и срабатывают на нужном обороте
+    """
+
+    def __init__(self, tick=DEFAULT_TICK, slot_count=DEFAULT_SLOTS, start=0.0):
+        self.tick = tick
+        self.slots = [[] for _ in range(slot_count)]
+        self.start = start  # Время шага 0
+        self.current = 0  # Последний обработанный шаг
+        self.count = 0  # Сколько таймеров в колесе
+
+    def schedule(self, when, item):
+        """
+        Добавляет item со сроком when (не раньше следующего шага)
+        """
+        step = max(self.current + 1, math.ceil((when - self.start) / self.tick - TICK_EPSILON))
+        self.slots[step % len(self.slots)].append((step, item))
+        self.count += 1
+
+    def advance(self, now):
+        """
+        Продвигает колесо до момента now; возвращает список сработавших элементов
+        """
+        due = []
+        target = math.floor((now - self.start) / self.tick + TICK_EPSILON)
+        slot_count = len(self.slots)
+        # Если колесо долго не продвигали, достаточно одного оборота: каждая ячейка просмотрена
+        if target - self.current > slot_count:
+            self.current = target - slot_count
+        while self.current < target:
+            self.current += 1
+            slot = self.slots[self.current % slot_count]
+            if not slot:
+                continue
+            remaining = []
+            for entry in slot:
+                if entry[0] <= self.current:
+                    due.append(entry[1])
+                else:
+                    remaining.append(entry)
+            slot[:] = remaining
+        self.count -= len(due)
+        return due
+
+    def next_deadline(self):
+        """
+        Время ближайшего шага, на котором что-то сработает (не позже одного оборота вперед)
+        """
+        slot_count = len(self.slots)
+        for offset in range(1, slot_count + 1):
+            step = self.current + offset
+            if any(item_step <= step for item_step, item in self.slots[step % slot_count]):
+                return self.start + step * self.tick
+        return self.start + (self.current + slot_count) * self.tick
+
+
+class Scheduler:
+    """
+    Выполняет сборщики по их расписаниям: обычные - в потоке колеса таймеров,
+    блокирующие (Schedule.blocking) после start - каждый в своем потоке
+    Первый запуск каждого сборщика случайно сдвигается не больше чем на initial_spread секунд;
+    start вместо этого сразу выполняет все сборщики, чтобы первый снимок не был пустым
+    on_sample блокирующего сборщика вызывается из его потока
+    """
+
+    def __init__(self, schedules, tick=DEFAULT_TICK, jitter=DEFAULT_JITTER, seed=None, clock=time.monotonic,
+                 on_sample=None, initial_spread=DEFAULT_INITIAL_SPREAD):
+        self.schedules = {schedule.name: schedule for schedule in schedules}
+        self.tick = tick
+        self.jitter = jitter
+        self.random = random.Random(seed)  # Без seed у каждого хоста свой случайный сдвиг
+        self.clock = clock
+        self.on_sample = on_sample  # Необязательный вызов (имя, значение, изменилось) после каждого сбора
+        self.wheel = TimerWheel(tick, start=clock())
+        self.lock = threading.Lock()  # Колесо и генератор сдвигов общие для всех потоков
+        self.stop_event = threading.Event()
+        self.wakeup = threading.Event()  # Будит поток колеса, когда блокирующий сборщик назначил срок
+        self.thread = None
+        self.requests = {}  # имя блокирующего сборщика -> Event, которым его поток зовут на запуск
+        self.workers = []  # Потоки блокирующих сборщиков
+        now = self.clock()
+        for schedule in schedules:
+            self.wheel.schedule(now + self.random.uniform(0, min(initial_spread, schedule.min_interval)), schedule)
+
+    def values(self):
+        """
+        Возвращает последние значения всех сборщиков: имя -> значение (None, если еще не собрано)
+        """
+        return {name: schedule.value for name, schedule in self.schedules.items()}
+
+    def execute(self, schedule, now):
+        """
+        Выполняет сборщик и назначает ему следующий срок, отсчитанный от now
+        (у блокирующего сборщика - от момента завершения: зависший сборщик не копит запусков)
+        """
+        changed = schedule.run(now)
+        if self.on_sample is not None:
+            self.on_sample(schedule.name, schedule.value, changed)
+        if schedule.name in self.requests:
+            now = self.clock()
+        with self.lock:
+            shift = 1 + self.random.uniform(-self.jitter, self.jitter)
+            self.wheel.schedule(now + schedule.interval * shift, schedule)
+
+    def step(self, now=None):
+        """
+        Выполняет все сборщики, срок которых наступил, и назначает им следующие сроки
+        Блокирующие сборщики при запущенных потоках только получают сигнал на запуск
+        Возвращает число сборщиков, срок которых наступил
+        """
+        now = self.clock() if now is None else now
+        with self.lock:
+            due = self.wheel.advance(now)
+        for schedule in due:
+            request = self.requests.get(schedule.name)
+            if request is not None:
+                request.set()
+            else:
+                self.execute(schedule, now)
+        return len(due)
+
+    def run_blocking(self, schedule, request, primed):
+        """
+        Цикл потока блокирующего сборщика: ждет сигнала request и выполняет сборщик
+        primed устанавливается после первого выполнения
+        """
+        while True:
+            request.wait()
+            request.clear()
+            if self.stop_event.is_set():
+                return
+            self.execute(schedule, self.clock())
+            primed.set()
+            # Новый срок может оказаться раньше того, до которого спит поток колеса
+            self.wakeup.set()
+
+    def run(self):
+        """
+        Цикл планировщика: выполняет сборщики и спит до ближайшего срока, пока не вызван stop()
+        """
+        while not self.stop_event.is_set():
+            self.step()
+            with self.lock:
+                deadline = self.wheel.next_deadline()
+            self.wakeup.wait(max(0.0, deadline - self.clock()))
+            self.wakeup.clear()
+
+    def start(self, prime_timeout=DEFAULT_PRIME_TIMEOUT):
+        """
+        Выполняет все сборщики один раз (блокирующие - в их потоках, их ждем не дольше
+        prime_timeout секунд), затем запускает цикл в фоновом потоке
+        """
+        now = self.clock()
+        with self.lock:
+            # Сроки из конструктора заменяются сроками после первого запуска
+            self.wheel = TimerWheel(self.tick, start=now)
+        primed = []  # События первого выполнения блокирующих сборщиков
+        for schedule in self.schedules.values():
+            if schedule.blocking:
+                request = self.requests[schedule.name] = threading.Event()
+                primed.append(threading.Event())
+                worker = threading.Thread(target=self.run_blocking, args=(schedule, request, primed[-1]),
+                                          name=f'scheduler-{schedule.name}', daemon=True)
+                self.workers.append(worker)
+                worker.start()
+                request.set()
+        for schedule in self.schedules.values():
+            if not schedule.blocking:
+                self.execute(schedule, now)
+        deadline = time.monotonic() + prime_timeout
+        for event in primed:
+            event.wait(max(0.0, deadline - time.monotonic()))
+        self.thread = threading.Thread(target=self.run, name='scheduler', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        self.wakeup.set()
+        for request in self.requests.values():
+            request.set()
+        if self.thread is not None:
+            self.thread.join()
+
+
+def benchmark_scheduler(duration=3600.0, hosts=100):
+    """
+    Моделирует час работы hosts хостов с шестью сборщиками на виртуальных часах:
+    имя хоста и ОС не меняются, память меняется каждую секунду, загрузка - иногда
+    Возвращает кортеж: (опросов_на_хост_адаптивно, опросов_на_хост_раз_в_секунду,
+                        мкс_на_шаг_колеса, наибольшее_число_хостов_в_одном_шаге)
+    """
+    generator = random.Random(1)
+    clock = [0.0]
+    per_step = {}  # шаг колеса -> сколько хостов опросили память на этом шаге
+
+    def memory():
+        return (16000, 8000 + generator.randint(-500, 500), 2048, 2048, 32767)
+
+    def processor():
+        return (8, 'x86_64', ('1.00' if clock[0] % 600 < 300 else '3.00', '1.00', '1.00'))
+
+    total_runs = 0
+    step_count = 0
+    elapsed = 0.0
+    for host in range(hosts):
+        schedules = [
+            Schedule('os', lambda: ('Debian 12', '6.1.0'), 60, 3600),
+            Schedule('user_host', lambda: ('root', 'host'), 60, 3600),
+            Schedule('processor', processor, 1, 30),
+            Schedule('memory', memory, 1, 30),
+            Schedule('mounts', lambda: [('/', 'ext4', 100, 200)], 5, 600),
+            Schedule('cgroup', lambda: None, 5, 600),
+        ]
+
+        def count_memory(name, value, changed):
+            if name == 'memory':
+                step = round(clock[0] / DEFAULT_TICK)
+                per_step[step] = per_step.get(step, 0) + 1
+
+        scheduler = Scheduler(schedules, seed=host, clock=lambda: clock[0], on_sample=count_memory)
+        started = time.perf_counter()
+        while clock[0] < duration:
+            clock[0] = scheduler.wheel.next_deadline()
+            scheduler.step()
+            step_count += 1
+        elapsed += time.perf_counter() - started
+        total_runs += sum(schedule.runs for schedule in schedules)
+        clock[0] = 0.0
+    return (total_runs / hosts, len(schedules) * duration, elapsed / step_count * 1_000_000,
+            max(per_step.values()))
@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Общая модель снимка системной информации для обоих сборщиков (Windows и Linux)
+# и ее машиночитаемые представления: JSON, NDJSON (одна строка на снимок) и двоичная запись
+
+import json
+import math
+import struct
+import sys
+import time
+
+
+# Поля снимка в порядке вывода; отсутствующие значения хранятся как None
+FIELDS = (
+    'timestamp',  # Время снимка (секунды Unix)
+    'platform',  # "linux" или "windows"
+    'os_name',  # Название дистрибутива или версии Windows
+    'kernel',  # Версия ядра (только Linux)
+    'host_name',  # Имя хоста (компьютера)
+    'user_name',  # Имя пользователя
+    'architecture',  # Архитектура процессора
+    'processor_count',  # Количество логических процессоров
+    'load_avg',  # Средняя загрузка за 1, 5, 15 минут (только Linux)
+    'cpu_limit',  # Квота CPU cgroup в процессорах, если она меньше числа процессоров (только Linux)
+    'mem_total_mb',  # Общая физическая память в МБ
+    'mem_available_mb',  # Доступная физическая память в МБ
+    'memory_load',  # Процент использования памяти (только Windows)
+    'swap_total_mb',  # Общий своп в МБ (только Linux)
+    'swap_free_mb',  # Свободный своп в МБ (только Linux)
+    'virtual_mb',  # Виртуальная память в МБ
+    'commit_total_mb',  # Текущий коммит в МБ (только Windows)
+    'commit_limit_mb',  # Лимит коммита в МБ (только Windows)
+    'pressure',  # Давление PSI: ресурс -> {"some": [avg10, avg60, avg300], "full": [...]} (только Linux)
+    'disks',  # Список кортежей (имя, тип_ФС, свободно_ГБ, всего_ГБ)
+    'disk_bytes',  # Точные объемы (свободно_байт, всего_байт) для записей disks (только Linux, не сериализуется)
+)
+
+# Коды платформ в двоичной записи
+PLATFORM_CODES = {'linux': 0, 'windows': 1}
+
+# Заголовок двоичной записи фиксированной длины (little-endian, без выравнивания):
+# сигнатура, код платформы, число дисков, время, число процессоров,
+# три значения загрузки и восемь целочисленных значений памяти в МБ
+RECORD_MAGIC = b'SNP1'
+RECORD_HEADER = struct.Struct('<4sBxHdi3f8q')
+# Запись об одном диске: имя (до 64 байт UTF-8), тип ФС (до 16 байт), свободно_ГБ, всего_ГБ
+RECORD_DISK = struct.Struct('<64s16sqq')
+# Целочисленные поля памяти в порядке их следования в заголовке
+RECORD_MEMORY_FIELDS = ('mem_total_mb', 'mem_available_mb', 'memory_load', 'swap_total_mb',
+                        'swap_free_mb', 'virtual_mb', 'commit_total_mb', 'commit_limit_mb')
+
+
+class Snapshot:
+    """
+    Один снимок системной информации
+    Заполняется из кортежей, которые возвращают функции get_*_info() обоих сборщиков
+    """
+    __slots__ = FIELDS
+
+    def __init__(self, **values):
+        # Все поля, которые не переданы явно, считаются отсутствующими
+        for field in FIELDS:
+            setattr(self, field, values.pop(field, None))
+        if values:
+            raise TypeError(f"Неизвестные поля снимка: {', '.join(values)}")
+        if self.timestamp is None:
+            self.timestamp = time.time()
+        if self.disks is None:
+            self.disks = []
+
+    def to_dict(self):
+        """
+        Возвращает снимок в виде словаря, пригодного для json.dumps
+        """
+        result = {field: getattr(self, field) for field in FIELDS if field != 'disk_bytes'}
+        # Диски выводим объектами, а не массивами, чтобы их было удобно разбирать
+        result['disks'] = [{'name': name, 'fs_type': fs_type, 'free_gb': free_gb, 'total_gb': total_gb}
+                           for name, fs_type, free_gb, total_gb in self.disks]
+        return result
+
+    def to_json(self, indent=None):
+        """
+        Возвращает снимок в виде JSON-строки
+        """
+        return json.dumps(self.to_dict(), ensure_ascii=False, indent=indent)
+
+    def to_ndjson_line(self):
+        """
+        Возвращает снимок в виде одной строки NDJSON (компактный JSON и перевод строки)
+        """
+        return json.dumps(self.to_dict(), ensure_ascii=False, separators=(',', ':')) + '\n'
+
+    def record_size(self):
+        """
+        Возвращает размер двоичной записи снимка в байтах
+        """
+        return RECORD_HEADER.size + RECORD_DISK.size * len(self.disks)
+
+    def pack_into(self, buffer, offset=0):
+        """
+        Записывает снимок в двоичном виде в заранее выделенный буфер
+        Возвращает смещение сразу за записью
+        """
+        load_avg = self.load_avg or ()
+        # Недоступные значения загрузки записываем как NaN, недоступные целые - как -1
+        loads = [float(load_avg[i]) if i < len(load_avg) else math.nan for i in range(3)]
+        memory = [_int_or_missing(getattr(self, field)) for field in RECORD_MEMORY_FIELDS]
+        RECORD_HEADER.pack_into(buffer, offset, RECORD_MAGIC, PLATFORM_CODES.get(self.platform, 255),
+                                len(self.disks), self.timestamp, _int_or_missing(self.processor_count),
+                                *loads, *memory)
+        offset += RECORD_HEADER.size
+        for name, fs_type, free_gb, total_gb in self.disks:
+            # Строки обрезаются до ширины поля; struct дополняет их нулевыми байтами
+            RECORD_DISK.pack_into(buffer, offset, name.encode('utf-8')[:64], fs_type.encode('utf-8')[:16],
+                                  _int_or_missing(free_gb), _int_or_missing(total_gb))
+            offset += RECORD_DISK.size
+        return offset
+
+    def to_binary(self):
+        """
+        Возвращает двоичную запись снимка
+        Запись содержит только меняющиеся значения; строковые сведения о системе
+        (ОС, ядро, хост, пользователь, архитектура) в нее не входят
+        """
+        buffer = bytearray(self.record_size())
+        self.pack_into(buffer)
+        return bytes(buffer)
+
+
+def unpack_binary(data, offset=0):
+    """
+    Разбирает двоичную запись, созданную Snapshot.pack_into
+    Возвращает кортеж: (снимок, смещение_сразу_за_записью)
+    """
+    header = RECORD_HEADER.unpack_from(data, offset)
+    if header[0] != RECORD_MAGIC:
+        raise ValueError("Неверная сигнатура двоичной записи снимка")
+    platform_code, disk_count, timestamp, processor_count = header[1:5]
+    loads, memory = header[5:8], header[8:]
+    offset += RECORD_HEADER.size
+
+    disks = []
+    for _ in range(disk_count):
+        name, fs_type, free_gb, total_gb = RECORD_DISK.unpack_from(data, offset)
+        disks.append((name.rstrip(b'\0').decode('utf-8', 'replace'),
+                      fs_type.rstrip(b'\0').decode('utf-8', 'replace'),
+                      _missing_to_none(free_gb), _missing_to_none(total_gb)))
+        offset += RECORD_DISK.size
+
+    # Обратное преобразование кода платформы в название
+    platform = next((name for name, code in PLATFORM_CODES.items() if code == platform_code), None)
+    values = dict(zip(RECORD_MEMORY_FIELDS, (_missing_to_none(value) for value in memory)))
+    snapshot = Snapshot(timestamp=timestamp, platform=platform,
+                        processor_count=_missing_to_none(processor_count),
+                        load_avg=None if all(math.isnan(load) for load in loads) else list(loads),
+                        disks=disks, **values)
+    return snapshot, offset
+
+
+def _int_or_missing(value):
+    """
+    Возвращает целое значение для двоичной записи, -1 если значение отсутствует
+    """
+    return -1 if value is None else int(value)
+
+
+def _missing_to_none(value):
+    """
+    Обратное преобразование: -1 из двоичной записи превращается в None
+    """
+    return None if value == -1 else value
+
+
+def effective_limits(mem_total_mb, mem_available_mb, processor_count, cgroup_info):
+    """
+    Заменяет память и число процессоров хоста лимитами cgroup (get_cgroup_info), если те строже
+    Возвращает кортеж: (всего_МБ, доступно_МБ, процессоров, действует_лимит_памяти, действует_квота_CPU);
+    число процессоров при квоте может быть дробным (например 1.5); отсутствующие (None) значения
+    хоста не заменяются
+    """
+    memory_limit_mb, working_set_mb, cpu_limit = cgroup_info[:3] if cgroup_info else (None, None, None)
+    memory_limited = None not in (memory_limit_mb, mem_total_mb) and memory_limit_mb < mem_total_mb
+    if memory_limited:
+        # Внутри лимита доступно не больше, чем свободно на всем хосте
+        mem_available_mb = max(0, min(mem_available_mb, memory_limit_mb - (working_set_mb or 0)))
+        mem_total_mb = memory_limit_mb
+    cpu_limited = None not in (cpu_limit, processor_count) and cpu_limit < processor_count
+    if cpu_limited:
+        processor_count = cpu_limit
+    return mem_total_mb, mem_available_mb, processor_count, memory_limited, cpu_limited
+
+
+def linux_snapshot(os_info, user_host_info, processor_info, memory_info, mounts_info, cgroup_info=None):
+    """
+    Создает снимок из кортежей Linux-сборщика:
+    get_os_info, get_user_and_host_info, get_processor_info, get_memory_info, get_mounts_info
+    и необязательного get_cgroup_info: лимиты cgroup, если они строже, заменяют
+    общую и доступную память хоста и число процессоров
+    """
+    # Целые гигабайты остаются в disks, байты statvfs - в disk_bytes
+    snapshot = Snapshot(platform='linux', disks=[mount[:4] for mount in mounts_info],
+                        disk_bytes=[mount[4:6] for mount in mounts_info])
+    # Пустое значение означает, что сборщик не вернул данных (ошибка или превышен срок)
+    if os_info:
+        snapshot.os_name, snapshot.kernel = os_info
+    if user_host_info:
+        snapshot.user_name, snapshot.host_name = user_host_info
+    if processor_info:
+        processor_count, architecture, load_avg = processor_info
+        snapshot.processor_count = processor_count
+        snapshot.architecture = architecture
+        # В /proc/loadavg значения строковые, в снимке храним числа
+        snapshot.load_avg = [float(value) for value in load_avg]
+    if memory_info:
+        (snapshot.mem_total_mb, snapshot.mem_available_mb, snapshot.swap_total_mb,
+         snapshot.swap_free_mb, snapshot.virtual_mb) = memory_info
+    if cgroup_info:
+        pressure = cgroup_info[3]
+        (snapshot.mem_total_mb, snapshot.mem_available_mb, cpus,
+         memory_limited, cpu_limited) = effective_limits(snapshot.mem_total_mb, snapshot.mem_available_mb,
+                                                         snapshot.processor_count, cgroup_info)
+        if cpu_limited:
+            snapshot.cpu_limit = cpus
+            # Целое число процессоров для двоичной записи - квота, округленная вверх
+            snapshot.processor_count = math.ceil(cpus)
+        if pressure:
+            snapshot.pressure = {resource: {'some': list(values[:3]),
+                                            'full': list(values[3:]) if values[3] is not None else None}
+                                 for resource, values in pressure.items()}
+    return snapshot
+
+
+def windows_snapshot(os_version, computer_and_user, processor_info, memory_info, performance_info,
+                     drives_info):
+    """
+    Создает снимок из значений Windows-сборщика:
+    get_os_version, get_computer_and_user_name, get_processor_info, get_memory_info,
+    get_performance_info, get_drives_info
+    """
+    snapshot = Snapshot(platform='windows', os_name=os_version or None, disks=list(drives_info))
+    # Пустое значение означает, что сборщик не вернул данных (ошибка или превышен срок)
+    if computer_and_user:
+        snapshot.host_name, snapshot.user_name = computer_and_user
+    if processor_info:
+        snapshot.processor_count, snapshot.architecture = processor_info
+    if memory_info:
+        (snapshot.mem_total_mb, snapshot.mem_available_mb, snapshot.memory_load,
+         snapshot.virtual_mb) = memory_info
+    if performance_info:
+        snapshot.commit_total_mb, snapshot.commit_limit_mb = performance_info
+    return snapshot
+
+
+# Форматы вывода, которые понимает write_snapshot
+OUTPUT_FORMATS = ('text', 'json', 'ndjson', 'binary')
+
+
+def write_snapshot(snapshot, output_format, stream=None):
+    """
+    Выводит снимок в заданном машиночитаемом формате: json, ndjson или binary
+    Двоичная запись пишется в байтовый поток stdout, остальные форматы - в текстовый
+    """
+    if output_format == 'binary':
+        stream = stream or sys.stdout.buffer
+        stream.write(snapshot.to_binary())
+    elif output_format == 'ndjson':
+        stream = stream or sys.stdout
+        stream.write(snapshot.to_ndjson_line())
+    elif output_format == 'json':
+        stream = stream or sys.stdout
+        stream.write(snapshot.to_json(indent=2) + '\n')
+    else:
+        raise ValueError(f"Неизвестный формат вывода: {output_format}")
+    # Снимки идут потоком, поэтому каждый сразу отдаем читателю
+    stream.flush()
+
+
+def benchmark_serialization(snapshot, iterations=20000):
+    """
+    Измеряет стоимость сериализации одного снимка в каждом формате
+    Возвращает словарь: формат -> микросекунд на снимок
+    """
+    # Текстовый формат измеряется на тех же f-строках, что печатает main()
+    def render_text(sample):
+        lines = [f"ОС: {sample.os_name}", f"Имя хоста: {sample.host_name}",
+                 f"Пользователь: {sample.user_name}", f"Архитектура: {sample.architecture}",
+                 f"Процессоры: {sample.processor_count}",
+                 f"Оперативная память: {sample.mem_available_mb} МБ свободно / {sample.mem_total_mb} МБ всего"]
+        lines.extend(f" {name} {fs_type} {free_gb} ГБ свободно / всего {total_gb} ГБ"
+                     for name, fs_type, free_gb, total_gb in sample.disks)
+        return '\n'.join(lines)
+
+    # Для двоичного формата буфер выделяется один раз, как при потоковой записи
+    buffer = bytearray(snapshot.record_size())
+    serializers = {
+        'text': render_text,
+        'json': lambda sample: sample.to_json(indent=2),
+        'ndjson': lambda sample: sample.to_ndjson_line(),
+        'binary': lambda sample: sample.pack_into(buffer),
+    }
+
+    results = {}
+    for name, serializer in serializers.items():
+        started = time.perf_counter_ns()
+        for _ in range(iterations):
+            serializer(snapshot)
+        results[name] = (time.perf_counter_ns() - started) / iterations / 1000
+    return results
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Единый интерфейс SystemInfo для обоих сборщиков (Windows и Linux)
+# Сборщик нужной платформы загружается лениво, при первом обращении к данным,
+# поэтому импорт этого модуля не загружает ни ctypes.wintypes, ни subprocess
+
+import os
+import sys
+
+
+# Файлы сборщиков для каждой платформы (лежат рядом с этим модулем)
+BACKEND_FILES = {
+    'linux': 'Задание 2.py',
+    'windows': 'Задание 1.py',
+}
+
+# Допустимое время импорта этого модуля в миллисекундах
+IMPORT_BUDGET_MS = 5.0
+# Модули, которые не должны загружаться ни при импорте этого модуля, ни при загрузке
+# сборщика Linux и получении одного значения (SystemInfo().memory())
+LAZY_MODULES = ('ctypes', 'ctypes.wintypes', 'subprocess', 'snapshot', 'asyncio', 'concurrent.futures',
+                'gzip', 'mmap')
+
+# Уже загруженные сборщики: платформа -> модуль
+_backends = {}
+
+
+def current_platform():
+    """
+    Возвращает название текущей платформы: "windows" или "linux"
+    """
+    return 'windows' if sys.platform.startswith('win') else 'linux'
+
+
+def load_backend(platform_name, windll=None):
+    """
+    Загружает модуль сборщика для платформы platform_name
+    Файлы сборщиков называются не как модули Python, поэтому загружаются по пути
+    Если передан windll (например, fixtures.FakeWindll), сборщик Windows загружается
+    отдельной копией, функции которой вызывают этот слой вместо ctypes.windll:
+    так сборщик можно проверить на Linux
+    """
+    if windll is None and platform_name in _backends:
+        return _backends[platform_name]
+
+    # importlib нужен только при первой загрузке сборщика
+    import importlib.util
+
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), BACKEND_FILES[platform_name])
+    spec = importlib.util.spec_from_file_location(f"sysinfo_{platform_name}_backend", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+
+    if windll is not None:
+        module.use_windll(windll)
+        return module  # Сборщик с поддельным слоем не кэшируем
+
+    _backends[platform_name] = module
+    return module
+
+
+class SystemInfo:
+    """
+    Общий интерфейс системной информации для Windows и Linux
+    Все методы возвращают значения одинаковой формы независимо от платформы
+    """
+
+    def __init__(self, platform_name=None, windll=None):
+        # Платформа по умолчанию - та, на которой запущен код
+        self.platform_name = platform_name or current_platform()
+        self.windll = windll  # Подмена ctypes.windll для сборщика Windows
+        self._backend = None  # Модуль сборщика, загружается при первом обращении
+
+    @property
+    def backend(self):
+        """
+        Модуль сборщика текущей платформы (загружается при первом обращении)
+        """
+        if self._backend is None:
+            self._backend = load_backend(self.platform_name, self.windll)
+        return self._backend
+
+    def os_name(self):
+        """
+        Возвращает название операционной системы
+        """
+        if self.platform_name == 'windows':
+            return self.backend.get_os_version()
+        return self.backend.get_os_info()[0]
+
+    def host_and_user(self):
+        """
+        Возвращает кортеж: (имя_хоста, имя_пользователя)
+        """
+        if self.platform_name == 'windows':
+            return self.backend.get_computer_and_user_name()
+        user_name, host_name = self.backend.get_user_and_host_info()
+        return host_name, user_name
+
+    def processor(self):
+        """
+        Возвращает кортеж: (количество_процессоров, архитектура) или None
+        """
+        processor_info = self.backend.get_processor_info()
+        return tuple(processor_info[:2]) if processor_info else None
+
+    def memory(self):
+        """
+        Возвращает кортеж: (общая_память_МБ, доступная_память_МБ) или None
+        """
+        memory_info = self.backend.get_memory_info()
+        return tuple(memory_info[:2]) if memory_info else None
+
+    def disks(self):
+        """
+        Возвращает список кортежей: [(диск_или_точка_монтирования, тип_ФС, свободно_ГБ, всего_ГБ), ...]
+        """
+        if self.platform_name == 'windows':
+            return self.backend.get_drives_info()
+        # Точные байты statvfs нужны только снимку, здесь оставляем гигабайты
+        return [mount[:4] for mount in self.backend.get_mounts_info()]
+
+    def snapshot(self):
+        """
+        Возвращает полный снимок системной информации (snapshot.Snapshot)
+        """
+        return self.backend.collect_snapshot()
+
+
+def benchmark_import():
+    """
+    Измеряет время импорта этого модуля в отдельном процессе интерпретатора
+    и проверяет, что модули из LAZY_MODULES не загрузились ни при импорте,
+    ни после загрузки сборщика Linux и чтения памяти через SystemInfo
+    Возвращает кортеж: (миллисекунд_на_импорт, бюджет_мс, список_лишних_модулей)
+    """
+    import subprocess
+
+    code = ("import sys, time\n"
+            "started = time.perf_counter()\n"
+            "import sysinfo\n"
+            "elapsed = (time.perf_counter() - started) * 1000\n"
+            f"lazy = {LAZY_MODULES!r}\n"
+            "loaded = [name for name in lazy if name in sys.modules]\n"
+            "sysinfo.SystemInfo('linux').memory()\n"
+            "loaded += [name + ' (сборщик linux)' for name in lazy if name in sys.modules and name not in loaded]\n"
+            "print(elapsed, ','.join(loaded))\n")
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True,
+                            cwd=os.path.dirname(os.path.abspath(__file__)))
+    elapsed, _, loaded = result.stdout.strip().partition(' ')
+    return float(elapsed), IMPORT_BUDGET_MS, [name for name in loaded.split(',') if name]
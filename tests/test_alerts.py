@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Проверка движка оповещений: гистерезис, таймеры for и hold, скорость изменения rate()
+# и метрики по ядрам; время проверок задается явно через timestamp
+#
+# Запуск: python3 -m pytest tests или python3 -m unittest discover tests
+
+import math
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import alerts
+import snapshot
+
+
+def run(engine, steps):
+    """
+    Проверяет правила на последовательности (время, метрики)
+    Возвращает список событий в виде (время, имя, состояние)
+    """
+    events = []
+    for timestamp, metrics in steps:
+        events.extend((timestamp, name, state) for name, state, value, severity
+                      in engine.evaluate(metrics, timestamp))
+    return events
+
+
+class ParseRulesTest(unittest.TestCase):
+
+    def test_options(self):
+        rule, = alerts.parse_rules("memory_falling rate(mem_available_mb) < -200 clear -50 for 5 hold 30"
+                                   " severity critical  # комментарий")
+        self.assertEqual((rule.name, rule.metric, rule.below, rule.rate), ('memory_falling', 'mem_available_mb',
+                                                                          True, True))
+        self.assertEqual((rule.threshold, rule.clear, rule.for_seconds, rule.hold_seconds, rule.severity),
+                         (-200.0, -50.0, 5.0, 30.0, 'critical'))
+
+    def test_errors(self):
+        for text in ("disk x >", "disk x = 5", "disk x > 5 when 3", "disk x > 90 clear 95", "low x < 5 clear 1"):
+            with self.subTest(text=text), self.assertRaises(ValueError):
+                alerts.parse_rules("# заголовок\n" + text)
+
+
+class AlertEngineTest(unittest.TestCase):
+
+    def test_hysteresis(self):
+        engine = alerts.AlertEngine(alerts.parse_rules("disk x > 90 clear 85"))
+        events = run(engine, [(0, {'x': 80}), (1, {'x': 91}), (2, {'x': 88}), (3, {'x': 95}),
+                              (4, {'x': 86}), (5, {'x': 84}), (6, {'x': 89}), (7, {'x': 92})])
+        # Между 85 и 90 состояние не меняется ни в одну сторону
+        self.assertEqual(events, [(1, 'disk', 'firing'), (5, 'disk', 'resolved'), (7, 'disk', 'firing')])
+        self.assertEqual(engine.firing(), [('disk', 92, 'warning')])
+
+    def test_below_threshold(self):
+        engine = alerts.AlertEngine(alerts.parse_rules("low x < 10 clear 15"))
+        events = run(engine, [(0, {'x': 20}), (1, {'x': 9}), (2, {'x': 12}), (3, {'x': 16})])
+        self.assertEqual(events, [(1, 'low', 'firing'), (3, 'low', 'resolved')])
+
+    def test_for_timer(self):
+        engine = alerts.AlertEngine(alerts.parse_rules("load x > 2 for 10"))
+        events = run(engine, [(0, {'x': 3}), (5, {'x': 3})])
+        self.assertEqual(events, [])
+        name, value, severity, remaining = engine.pending()[0]
+        self.assertEqual((name, value, remaining), ('load', 3, 5.0))
+
+        # Условие прервалось - таймер начинается заново
+        events = run(engine, [(6, {'x': 1}), (7, {'x': 3}), (16, {'x': 3}), (17, {'x': 3})])
+        self.assertEqual(events, [(17, 'load', 'firing')])
+        self.assertEqual(engine.pending(), [])
+
+    def test_hold_timer(self):
+        engine = alerts.AlertEngine(alerts.parse_rules("spike x > 5 hold 30"))
+        events = run(engine, [(0, {'x': 10}), (1, {'x': 0}), (29, {'x': 0}), (30, {'x': 0})])
+        # Оповещение держится hold секунд с момента срабатывания, даже если условие ушло сразу
+        self.assertEqual(events, [(0, 'spike', 'firing'), (30, 'spike', 'resolved')])
+
+    def test_rate(self):
+        engine = alerts.AlertEngine(alerts.parse_rules("falling rate(x) < -100 clear -10"))
+        self.assertEqual(engine.evaluate({'x': 5000}, 0.0), [])
+        self.assertTrue(math.isnan(engine.values[0]))  # Скорости по одному значению нет
+
+        events = engine.evaluate({'x': 4000}, 2.0)
+        self.assertEqual(events, [('falling', 'firing', -500.0, 'warning')])
+        # Повтор с тем же временем не дает деления на ноль: скорость неизвестна, состояние не меняется
+        self.assertEqual(engine.evaluate({'x': 3000}, 2.0), [])
+        self.assertTrue(math.isnan(engine.values[0]))
+        events = engine.evaluate({'x': 2990}, 4.0)
+        self.assertEqual(events, [('falling', 'resolved', -5.0, 'warning')])
+
+    def test_wildcard_and_recompile(self):
+        engine = alerts.AlertEngine(alerts.parse_rules("disk_full disk_used_percent:* > 90 severity critical"))
+        metrics = {'disk_used_percent:/': 95.0, 'disk_used_percent:/data': 10.0}
+        self.assertEqual(engine.evaluate(metrics, 0.0), [('disk_full:/', 'firing', 95.0, 'critical')])
+
+        # Новая точка монтирования перестраивает план; сработавшее оповещение сохраняется
+        metrics['disk_used_percent:/backup'] = 99.0
+        events = engine.evaluate(metrics, 1.0)
+        self.assertEqual(engine.compilations, 2)
+        self.assertEqual(events, [('disk_full:/backup', 'firing', 99.0, 'critical')])
+        self.assertEqual(sorted(name for name, _, _ in engine.firing()), ['disk_full:/', 'disk_full:/backup'])
+
+        del metrics['disk_used_percent:/']
+        self.assertEqual(engine.evaluate(metrics, 2.0), [])
+        self.assertEqual([name for name, _, _ in engine.firing()], ['disk_full:/backup'])
+
+    def test_missing_metric(self):
+        engine = alerts.AlertEngine(alerts.parse_rules(alerts.DEFAULT_RULES))
+        self.assertEqual(engine.evaluate({}, 0.0), [])
+        self.assertEqual(engine.names, [])
+
+
+class MetricsTest(unittest.TestCase):
+
+    def test_snapshot_and_cores(self):
+        sample = snapshot.Snapshot(mem_total_mb=8000, mem_available_mb=600, swap_total_mb=1000, swap_free_mb=250,
+                                   load_avg=(8.0, 4.0, 2.0), processor_count=4,
+                                   pressure={'memory': {'some': [12.5, 3.0, 1.0], 'full': [1.0, 0.5, 0.1]}},
+                                   disks=[('/', 'ext4', 5, 100), ('/boot', 'ext4', 1, 0)])
+        cores = [(0, 90.0, 8.0, 1.0, 0.0), (3, 10.0, 5.0, 0.0, 0.0)]
+        metrics = alerts.metrics_from_snapshot(sample, cores=cores)
+        self.assertEqual(metrics, {
+            'mem_available_mb': 600, 'mem_available_percent': 7.5, 'swap_used_percent': 75.0,
+            'load1': 8.0, 'load5': 4.0, 'load15': 2.0, 'load1_per_cpu': 2.0, 'psi_some:memory': 12.5,
+            'disk_used_percent:/': 95.0, 'disk_free_gb:/': 5, 'cpu_busy:0': 98.0, 'cpu_busy:3': 15.0,
+        })
+
+        engine = alerts.AlertEngine(alerts.parse_rules(alerts.DEFAULT_RULES + "core_busy cpu_busy:* > 95\n"))
+        names = [name for name, state, value, severity in engine.evaluate(metrics, 0.0)]
+        self.assertEqual(sorted(names), ['core_busy:0', 'disk_full:/'])
+        # У правил памяти таймер for 10: пока они только ожидают
+        self.assertEqual(sorted(name for name, _, _, _ in engine.pending()), ['memory_low', 'memory_pressure'])
+
+
+if __name__ == '__main__':
+    unittest.main()
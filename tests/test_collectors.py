@@ -0,0 +1,404 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Проверка сборщиков Linux на деревьях тестовых данных fixtures.build_corpus:
+# память, таблица монтирования, /proc/stat, /proc/diskstats, /proc/net/dev,
+# cgroup v1 и v2 с давлением PSI и топология процессоров
+# Ожидаемые значения берутся из параметров профилей fixtures.PROFILES и из самих файлов дерева
+#
+# Запуск: python3 -m pytest tests или python3 -m unittest discover tests
+
+import os
+import random
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fixtures
+import sysinfo
+
+
+# Профили, на которых проверяются сборщики (processes10k только добавил бы время генерации)
+PROFILES = ('small', 'cores256', 'mounts5000')
+
+_directory = None
+_corpus = None
+
+
+def setUpModule():
+    global _directory, _corpus
+    _directory = tempfile.mkdtemp(prefix='sysinfo-corpus-')
+    _corpus = fixtures.build_corpus(_directory, PROFILES)
+
+
+def tearDownModule():
+    shutil.rmtree(_directory, ignore_errors=True)
+
+
+def read(path):
+    with open(path, 'r') as f:
+        return f.read()
+
+
+def rewrite(path, content):
+    """
+    Перезаписывает файл на месте: сэмплеры держат его открытым и читают preadv с начала
+    """
+    with open(path, 'r+') as f:
+        f.write(content)
+        f.truncate()
+
+
+def copy_proc_file(profile, name, directory):
+    """
+    Копирует файл /proc профиля в отдельный каталог, чтобы менять его, не трогая корпус
+    """
+    target = os.path.join(directory, name)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    shutil.copyfile(os.path.join(_corpus[profile]['proc'], name), target)
+    return target
+
+
+class CorpusTest(unittest.TestCase):
+
+    def setUp(self):
+        self.backend = sysinfo.load_backend('linux')
+        self.temporary = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temporary.cleanup)
+
+    def use_profile(self, profile):
+        roots = _corpus[profile]
+        self.backend.set_roots(roots['proc'], roots['sys'], roots['etc'])
+        return roots
+
+
+class MemoryTest(CorpusTest):
+
+    def test_memory_report(self):
+        for profile in PROFILES:
+            with self.subTest(profile=profile):
+                self.use_profile(profile)
+                memory_gb = fixtures.PROFILES[profile]['memory_gb']
+                total_mb, available_mb, swap_total_mb, swap_free_mb, vmalloc_mb = self.backend.get_memory_info()
+                self.assertEqual(total_mb, memory_gb * 1024)
+                self.assertLess(0, available_mb)
+                self.assertLess(available_mb, total_mb)
+                self.assertEqual(swap_total_mb, min(memory_gb * 256, 8 * 1024))
+                self.assertEqual(swap_free_mb, swap_total_mb * 9 // 10)
+                self.assertEqual(vmalloc_mb, 34359738367 // 1024 // 1024)
+
+
+class MountTableTest(CorpusTest):
+
+    def test_special_filesystems_skipped(self):
+        for profile in PROFILES:
+            with self.subTest(profile=profile):
+                text = read(os.path.join(_corpus[profile]['proc'], 'mounts'))
+                entries = self.backend.parse_mount_table(text)
+                # sysfs, proc, devtmpfs и tmpfs /run отбрасываются, / и /boot остаются
+                self.assertEqual(len(entries), fixtures.PROFILES[profile]['mounts'] - 4)
+                self.assertEqual(entries[:2], [('/', 'ext4', '/dev/sda1'), ('/boot', 'ext4', '/dev/sda2')])
+                self.assertFalse([entry for entry in entries if entry[0].startswith(('/proc', '/sys', '/dev'))])
+                kinds = {fs_type for _, fs_type, _ in entries}
+                self.assertLessEqual(kinds, {'ext4', 'overlay', 'nfs4'})
+
+    def test_statvfs_sizes(self):
+        text = read(os.path.join(_corpus['mounts5000']['proc'], 'mounts'))
+        answered = {}
+
+        def fake_statvfs(mount_point):
+            # Контейнерные точки в дереве не созданы: отвечают только / и /boot
+            if mount_point not in ('/', '/boot'):
+                raise FileNotFoundError(mount_point)
+            answered[mount_point] = True
+            return os.statvfs_result((4096, 4096, 3 * 262144 + 100, 262144 + 7, 262144, 0, 0, 0, 0, 255))
+
+        mounts = self.backend.parse_mounts_info(text, statvfs=fake_statvfs)
+        self.assertEqual(answered, {'/': True, '/boot': True})
+        self.assertEqual([mount[:2] for mount in mounts], [('/', 'ext4'), ('/boot', 'ext4')])
+        # Байты переводятся в целые гигабайты с округлением вниз
+        self.assertEqual([mount[2:4] for mount in mounts], [(1, 3), (1, 3)])
+
+    def test_cache_reloads_on_change(self):
+        path = copy_proc_file('mounts5000', os.path.join('self', 'mounts'), self.temporary.name)
+        cache = self.backend.MountTableCache(self.temporary.name)
+        self.addCleanup(cache.close)
+        first = cache.entries()
+        self.assertEqual(len(first), fixtures.PROFILES['mounts5000']['mounts'] - 4)
+        self.assertIs(cache.entries(), first)
+        self.assertEqual(cache.reloads, 1)
+
+        rewrite(path, read(path) + "/dev/sdb1 /data xfs rw,relatime 0 0\n")
+        second = cache.entries()
+        self.assertEqual(cache.reloads, 2)
+        self.assertEqual(second[-1], ('/data', 'xfs', '/dev/sdb1'))
+        self.assertEqual(len(second), len(first) + 1)
+
+
+class CpuStatTest(CorpusTest):
+
+    def test_core_count_and_idle_interval(self):
+        for profile in PROFILES:
+            with self.subTest(profile=profile):
+                sampler = self.backend.CpuStatSampler(_corpus[profile]['proc'])
+                self.addCleanup(sampler.close)
+                self.assertFalse(sampler.sample())
+                self.assertTrue(sampler.sample())
+                cores = sampler.cores()
+                self.assertEqual([core[0] for core in cores], list(range(fixtures.PROFILES[profile]['cpus'])))
+                # Файл не менялся: тиков между снимками нет, проценты нулевые
+                self.assertEqual(sampler.total(), (0.0, 0.0, 0.0, 0.0))
+
+    def test_percentages(self):
+        path = copy_proc_file('cores256', 'stat', self.temporary.name)
+        text = read(path)
+        sampler = self.backend.CpuStatSampler(self.temporary.name)
+        self.addCleanup(sampler.close)
+        sampler.sample()
+
+        # За интервал ядро 5: user+nice 30, system+irq+softirq 20, idle 40, iowait 5, steal 5 тиков;
+        # guest (входит в user) не учитывается повторно
+        added = (20, 10, 10, 40, 5, 5, 5, 5, 7, 0)
+        lines = text.split('\n')
+        for index, line in enumerate(lines):
+            parts = line.split()
+            if parts and parts[0] in ('cpu', 'cpu5'):
+                lines[index] = parts[0] + ' ' + ' '.join(str(int(value) + delta)
+                                                         for value, delta in zip(parts[1:], added))
+        rewrite(path, '\n'.join(lines))
+
+        self.assertTrue(sampler.sample())
+        for user, system, iowait, steal in (sampler.core(5), sampler.total()):
+            self.assertAlmostEqual(user, 30.0)
+            self.assertAlmostEqual(system, 20.0)
+            self.assertAlmostEqual(iowait, 5.0)
+            self.assertAlmostEqual(steal, 5.0)
+        self.assertEqual(sampler.core(4), (0.0, 0.0, 0.0, 0.0))
+
+
+class DiskStatsTest(CorpusTest):
+
+    def test_rates(self):
+        path = copy_proc_file('cores256', 'diskstats', self.temporary.name)
+        text = read(path)
+        sampler = self.backend.DiskStatsSampler(self.temporary.name)
+        self.addCleanup(sampler.close)
+        self.assertFalse(sampler.sample())
+        names = [line.split()[2] for line in text.splitlines()]
+        self.assertEqual(set(sampler.counters), set(names))
+        self.assertEqual(len(names), fixtures.PROFILES['cores256']['disks'] + 2)
+
+        # sda: 30 чтений и 10 записей, 800 секторов, 200 мс в запросах, 500 мс занятости
+        added = (30, 0, 600, 150, 10, 0, 200, 50, 0, 500, 0)
+        lines = text.split('\n')
+        for index, line in enumerate(lines):
+            parts = line.split()
+            if len(parts) > 2 and parts[2] == 'sda':
+                counters = [int(value) + (added[field] if field < len(added) else 0)
+                            for field, value in enumerate(parts[3:])]
+                lines[index] = ' '.join(parts[:3] + [str(value) for value in counters])
+        rewrite(path, '\n'.join(lines))
+
+        self.assertTrue(sampler.sample())
+        # Интервал задается явно, чтобы скорости не зависели от времени между снимками
+        sampler.elapsed = 2.0
+        operations, bytes_per_second, wait_ms, busy = sampler.device_rates('sda')
+        self.assertAlmostEqual(operations, 20.0)
+        self.assertAlmostEqual(bytes_per_second, 800 * 512 / 2)
+        self.assertAlmostEqual(wait_ms, 5.0)
+        self.assertAlmostEqual(busy, 25.0)
+        self.assertEqual(sampler.device_rates('sda1'), (0.0, 0.0, 0.0, 0.0))
+
+        by_mount = sampler.by_mount([('/', 'ext4', '/dev/sda'), ('/run', 'tmpfs', 'tmpfs')])
+        self.assertEqual([row[:2] for row in by_mount], [('/', 'sda')])
+
+
+class NetDevTest(CorpusTest):
+
+    def test_counter_reset(self):
+        path = copy_proc_file('mounts5000', os.path.join('net', 'dev'), self.temporary.name)
+        text = read(path)
+        sampler = self.backend.NetDevSampler(self.temporary.name)
+        self.addCleanup(sampler.close)
+        self.assertFalse(sampler.sample())
+        self.assertEqual(len(sampler.counters), fixtures.PROFILES['mounts5000']['interfaces'])
+
+        lines = text.split('\n')
+        for index, line in enumerate(lines):
+            name, separator, values = line.partition(':')
+            if not separator:
+                continue
+            values = [int(value) for value in values.split()]
+            if name.strip() == 'eth0':
+                # Интерфейс пересоздан: счетчики начались заново и стали меньше прежних
+                values = [value // 1000 for value in values]
+            elif name.strip() == 'lo':
+                values[0] += 1000  # Принято 1000 байт
+                values[9] += 3  # Передано 3 пакета
+            lines[index] = f"{name}: " + ' '.join(map(str, values))
+        rewrite(path, '\n'.join(lines))
+
+        self.assertTrue(sampler.sample())
+        self.assertEqual(set(sampler.deltas), {'lo', 'eth0'})
+        self.assertEqual(sampler.deltas['eth0'], [0] * 8)
+        self.assertEqual(sampler.deltas['lo'], [1000, 0, 0, 0, 0, 3, 0, 0])
+        sampler.elapsed = 0.5
+        self.assertEqual(sampler.interface_rates('lo'), (2000.0, 0.0, 0.0, 6.0, 0.0, 0.0))
+        self.assertEqual(sampler.interface_rates('eth0'), (0.0,) * 6)
+        self.assertEqual([row[0] for row in sampler.rates(active_only=True)], ['lo'])
+
+        # Следующий интервал считается уже от новых (меньших) значений eth0
+        for index, line in enumerate(lines):
+            name, separator, values = line.partition(':')
+            if name.strip() == 'eth0':
+                lines[index] = f"{name}: " + ' '.join(str(int(value) + 10) for value in values.split())
+        rewrite(path, '\n'.join(lines))
+        self.assertTrue(sampler.sample())
+        self.assertEqual(sampler.deltas['eth0'], [10] * 8)
+
+
+class CgroupTest(CorpusTest):
+
+    def test_v2_limits_from_pod(self):
+        roots = self.use_profile('mounts5000')
+        limits = self.backend.CgroupLimits(roots['proc'], roots['sys'])
+        self.addCleanup(limits.close)
+        self.assertEqual(limits.version, 2)
+        self.assertFalse(limits.sample())
+
+        container = os.path.join(roots['sys'], 'fs', 'cgroup', 'kubepods', 'pod', 'container')
+        usage = int(read(os.path.join(container, 'memory.current')))
+        stat = self.backend.parse_flat_keyed(read(os.path.join(container, 'memory.stat')))
+        self.assertEqual(limits.memory_limit, 4 * 1024 ** 3)
+        self.assertEqual(limits.memory_usage, usage)
+        self.assertEqual(limits.working_set, usage - stat['inactive_file'])
+        self.assertEqual(limits.cpu_limit, 1.5)
+
+        # Давление читается из файлов cgroup, а не из /proc/pressure
+        for resource in ('cpu', 'memory', 'io'):
+            expected = self.backend.parse_pressure(read(os.path.join(container, f'{resource}.pressure')))
+            self.assertEqual(limits.pressure[resource], expected)
+
+        memory_limit_mb, working_set_mb, cpu_limit, pressure, cpu_used, throttled = limits.info()
+        self.assertEqual(memory_limit_mb, 4096)
+        self.assertEqual(working_set_mb, limits.working_set // (1024 * 1024))
+        self.assertIsNone(cpu_used)
+
+        # Второй снимок: потребление CPU и троттлинг за интервал
+        cpu_stat_path = os.path.join(container, 'cpu.stat')
+        original = read(cpu_stat_path)
+        self.addCleanup(rewrite, cpu_stat_path, original)
+        counters = self.backend.parse_flat_keyed(original)
+        counters['usage_usec'] += 10 ** 9
+        counters['nr_periods'] += 200
+        counters['nr_throttled'] += 50
+        rewrite(cpu_stat_path, ''.join(f"{key} {value}\n" for key, value in counters.items()))
+        self.assertTrue(limits.sample())
+        self.assertAlmostEqual(limits.throttled_percent, 25.0)
+        self.assertGreater(limits.cpu_used, 0)
+
+    def test_v2_without_limits(self):
+        roots = self.use_profile('small')
+        limits = self.backend.CgroupLimits(roots['proc'], roots['sys'])
+        self.addCleanup(limits.close)
+        limits.sample()
+        self.assertEqual(limits.version, 2)
+        self.assertIsNone(limits.memory_limit)
+        self.assertIsNone(limits.cpu_limit)
+        self.assertIsNotNone(limits.memory_usage)
+
+    def test_v1_hierarchy(self):
+        root = self.temporary.name
+        proc_root, sys_root = os.path.join(root, 'proc'), os.path.join(root, 'sys')
+        fixtures.write_file(os.path.join(proc_root, 'self', 'cgroup'),
+                            "5:memory:/docker/abc\n3:cpu,cpuacct:/docker/abc\n0::/\n")
+        fixtures.write_file(os.path.join(proc_root, 'self', 'mountinfo'),
+                            "22 1 8:1 / / rw,relatime shared:1 - ext4 /dev/sda1 rw\n"
+                            "31 25 0:27 / /sys/fs/cgroup/memory rw,nosuid shared:10 - cgroup cgroup rw,memory\n"
+                            "32 25 0:28 / /sys/fs/cgroup/cpu,cpuacct rw,nosuid shared:11 - cgroup cgroup"
+                            " rw,cpu,cpuacct\n")
+        memory = os.path.join(sys_root, 'fs', 'cgroup', 'memory', 'docker', 'abc')
+        fixtures.write_file(os.path.join(memory, 'memory.usage_in_bytes'), f"{600 * 1024 ** 2}\n")
+        fixtures.write_file(os.path.join(memory, 'memory.stat'),
+                            f"cache 1000\nhierarchical_memory_limit {1024 ** 3}\n"
+                            f"total_inactive_file {100 * 1024 ** 2}\n")
+        cpu_top = os.path.join(sys_root, 'fs', 'cgroup', 'cpu,cpuacct')
+        for directory, quota in ((cpu_top, -1), (os.path.join(cpu_top, 'docker'), 400000),
+                                 (os.path.join(cpu_top, 'docker', 'abc'), 250000)):
+            fixtures.write_file(os.path.join(directory, 'cpu.cfs_quota_us'), f"{quota}\n")
+            fixtures.write_file(os.path.join(directory, 'cpu.cfs_period_us'), "100000\n")
+        container = os.path.join(cpu_top, 'docker', 'abc')
+        fixtures.write_file(os.path.join(container, 'cpu.stat'),
+                            "nr_periods 100\nnr_throttled 10\nthrottled_time 5000\n")
+        fixtures.write_file(os.path.join(container, 'cpuacct.usage'), "5000000000\n")
+        # В cgroup v1 давления в самой cgroup нет - берется общее по хосту
+        pressure = fixtures.pressure_text(random.Random(0))
+        fixtures.write_file(os.path.join(proc_root, 'pressure', 'memory'), pressure)
+
+        limits = self.backend.CgroupLimits(proc_root, sys_root)
+        self.addCleanup(limits.close)
+        self.assertEqual(limits.version, 1)
+        limits.sample()
+        self.assertEqual(limits.memory_limit, 1024 ** 3)
+        self.assertEqual(limits.memory_usage, 600 * 1024 ** 2)
+        self.assertEqual(limits.working_set, 500 * 1024 ** 2)
+        # Действует самый строгий лимит по цепочке: 2.5 процессора у самой cgroup
+        self.assertEqual(limits.cpu_limit, 2.5)
+        self.assertEqual(list(limits.pressure), ['memory'])
+        self.assertEqual(limits.pressure['memory'], self.backend.parse_pressure(pressure))
+
+        fixtures.write_file(os.path.join(memory, 'memory.stat'),
+                            f"hierarchical_memory_limit {self.backend.CGROUP_V1_UNLIMITED}\n")
+        limits.sample()
+        self.assertIsNone(limits.memory_limit)
+
+    def test_pressure_without_full(self):
+        text = fixtures.pressure_text(random.Random(3), full=False)
+        some = [float(field.split('=')[1]) for field in text.split()[1:4]]
+        self.assertEqual(self.backend.parse_pressure(text), (*some, None, None, None))
+
+
+class TopologyTest(CorpusTest):
+
+    def test_profiles(self):
+        for profile in PROFILES:
+            with self.subTest(profile=profile):
+                parameters = fixtures.PROFILES[profile]
+                cpus, sockets = parameters['cpus'], parameters['sockets']
+                topology = self.backend.CpuTopology(_corpus[profile]['sys'])
+                self.addCleanup(topology.close)
+                topology.sample()
+                info = topology.info()
+                self.assertEqual(info['online'], f"0-{cpus - 1}")
+                self.assertEqual(info['cpus'], cpus)
+                self.assertEqual(info['sockets'], sockets)
+                self.assertEqual(info['cores'], cpus // parameters['threads_per_core'])
+                self.assertEqual(info['max_frequency_mhz'], fixtures.CPU_MAX_FREQ_KHZ // 1000)
+                low, average, high = info['frequency_mhz']
+                self.assertLessEqual(fixtures.CPU_MIN_FREQ_KHZ // 1000, low)
+                self.assertLessEqual(low, average)
+                self.assertLessEqual(average, high)
+                self.assertLessEqual(high, fixtures.CPU_MAX_FREQ_KHZ // 1000)
+
+                # L1 и L2 у каждого физического ядра свои, L3 - один на сокет
+                cores = info['cores']
+                self.assertEqual(info['caches'], {'L1d': (48, cores), 'L1i': (32, cores), 'L2': (2048, cores),
+                                                  'L3': (65536, sockets)})
+                node_kb = parameters['memory_gb'] * 1024 * 1024 // sockets
+                self.assertEqual([node[:3] for node in info['nodes']],
+                                 [(node, cpus // sockets, node_kb // 1024) for node in range(sockets)])
+                self.assertEqual(list(info['packages']), list(info['cpu_nodes']))
+
+    def test_smt_siblings_share_core(self):
+        topology = self.backend.CpuTopology(_corpus['cores256']['sys'])
+        self.addCleanup(topology.close)
+        # 2 сокета x 64 ядра x 2 потока: cpu0 и cpu128 - одно ядро, cpu64 - первое ядро второго сокета
+        self.assertEqual((topology.packages[0], topology.core_ids[0]), (topology.packages[128], topology.core_ids[128]))
+        self.assertEqual((topology.packages[64], topology.core_ids[64]), (1, 0))
+        self.assertEqual(topology.node_distances, [(10, 21), (21, 10)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Проверка истории снимков: запись и чтение по столбцам без потерь, переход на новые блоки
+# и сегменты, часы, ушедшие назад, и продолжение истории после перезапуска
+#
+# Запуск: python3 -m pytest tests или python3 -m unittest discover tests
+
+import os
+import random
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import history
+import snapshot
+
+
+START = 1_700_000_000.0
+
+
+def make_sample(timestamp, generator, mount_points=('/', '/data')):
+    return snapshot.Snapshot(
+        timestamp=timestamp, platform='linux', processor_count=8, cpu_limit=generator.choice((None, 1.5)),
+        load_avg=[round(generator.uniform(0, 40), 2) for _ in range(3)],
+        mem_total_mb=16000, mem_available_mb=generator.randint(0, 16000),
+        swap_total_mb=2048, swap_free_mb=generator.randint(0, 2048), virtual_mb=None,
+        disks=[(name, 'ext4', generator.randint(0, 10 ** 6), 10 ** 6) for name in mount_points])
+
+
+class HistoryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix='history-test-')
+        self.addCleanup(shutil.rmtree, self.directory, True)
+
+    def write(self, samples, **options):
+        writer = history.HistoryWriter(self.directory, **options)
+        try:
+            for sample in samples:
+                writer.append(sample)
+        finally:
+            writer.close()
+        return writer
+
+    def read_series(self, column, start=None, end=None):
+        reader = history.HistoryReader(self.directory)
+        try:
+            return reader.series(column, start, end)
+        finally:
+            reader.close()
+
+    def test_round_trip(self):
+        generator = random.Random(0)
+        # Маленький блок: записи расходятся по многим блокам
+        samples = [make_sample(START + step * 0.25, generator) for step in range(5000)]
+        self.write(samples, block_size=history.PAGE_SIZE)
+        reader = history.HistoryReader(self.directory)
+        self.addCleanup(reader.close)
+        segment = reader.segment(reader.paths[0])
+        self.assertGreater(segment.block_count, 5)
+        self.assertEqual(reader.columns(), [name for name, scale in history.snapshot_columns(samples[0])])
+
+        for column, expected in (
+                ('load1', [(sample.timestamp, sample.load_avg[0]) for sample in samples]),
+                ('mem_available_mb', [(sample.timestamp, sample.mem_available_mb) for sample in samples]),
+                ('cpu_limit', [(sample.timestamp, sample.cpu_limit) for sample in samples
+                               if sample.cpu_limit is not None]),
+                ('disk_free_gb:/data', [(sample.timestamp, sample.disks[1][2]) for sample in samples]),
+                ('virtual_mb', [])):
+            with self.subTest(column=column):
+                self.assertEqual(reader.series(column), expected)
+
+        # Интервал внутри истории: границы включаются, блоки до и после не попадают
+        window = reader.series('swap_free_mb', START + 100, START + 200)
+        self.assertEqual(window, [(sample.timestamp, sample.swap_free_mb) for sample in samples
+                                  if START + 100 <= sample.timestamp <= START + 200])
+        self.assertEqual(reader.aggregate('mem_total_mb', START + 10, START + 11), (5, 16000, 16000, 16000))
+
+    def test_many_mounts(self):
+        generator = random.Random(1)
+        mount_points = [f"/mnt/{index}" for index in range(3000)]
+        samples = [make_sample(START + step, generator, mount_points) for step in range(40)]
+        self.write(samples)
+        self.assertEqual(self.read_series('disk_free_gb:/mnt/2999'),
+                         [(sample.timestamp, sample.disks[-1][2]) for sample in samples])
+
+    def test_new_segment_on_mount_change(self):
+        generator = random.Random(2)
+        samples = ([make_sample(START + step, generator) for step in range(10)]
+                   + [make_sample(START + step, generator, ('/',)) for step in range(10, 20)])
+        self.write(samples)
+        self.assertEqual(len(history.HistoryReader(self.directory).paths), 2)
+        self.assertEqual(self.read_series('mem_available_mb'),
+                         [(sample.timestamp, sample.mem_available_mb) for sample in samples])
+        self.assertEqual(len(self.read_series('disk_free_gb:/data')), 10)
+
+    def test_clock_goes_backwards(self):
+        generator = random.Random(3)
+        times = [START + step for step in range(10)] + [START + 5.5, START + 6.5] + [START + 11, START + 12]
+        samples = [make_sample(timestamp, generator) for timestamp in times]
+        writer = self.write(samples)
+        self.assertEqual(writer.clamped, 2)
+        reader = history.HistoryReader(self.directory)
+        self.addCleanup(reader.close)
+        self.assertEqual(len(reader.paths), 1)
+        series = reader.series('mem_available_mb')
+        # Ни одна запись не потеряна; время не убывает, отставшие снимки получают время предыдущего
+        self.assertEqual([value for timestamp, value in series], [sample.mem_available_mb for sample in samples])
+        self.assertEqual([timestamp for timestamp, value in series], times[:10] + [START + 9] * 2 + times[12:])
+        self.assertEqual(len(reader.series('mem_available_mb', START + 9, START + 9)), 3)
+
+    def test_restart_with_earlier_clock(self):
+        generator = random.Random(4)
+        first = [make_sample(START + step, generator) for step in range(10)]
+        self.write(first)
+        # Перезапуск с часами в прошлом и с другим набором точек монтирования
+        second = [make_sample(START + step, generator, ('/',)) for step in range(3)]
+        self.write(second)
+
+        reader = history.HistoryReader(self.directory)
+        self.addCleanup(reader.close)
+        self.assertEqual(len(reader.paths), 2)
+        self.assertGreater(reader.starts[1], int((START + 9) * 1000))
+        series = reader.series('mem_available_mb')
+        self.assertEqual([value for timestamp, value in series],
+                         [sample.mem_available_mb for sample in first + second])
+        timestamps = [timestamp for timestamp, value in series]
+        self.assertEqual(timestamps, sorted(timestamps))
+        # Запрос от начала второго сегмента не теряет записи первого с тем же временем
+        self.assertEqual(len(reader.series('mem_available_mb', START + 9)), 4)
+        self.assertEqual(history.last_timestamp(self.directory), reader.starts[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Проверка разбора /proc/meminfo (MemInfo, parse_memory_info) на тексте из fixtures.meminfo_text
+#
+# Запуск: python3 -m pytest tests или python3 -m unittest discover tests
+
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fixtures
+import sysinfo
+
+
+class MemInfoTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.backend = sysinfo.load_backend('linux')
+        cls.text = fixtures.meminfo_text(16, random.Random(0))
+        # Ожидаемые значения берутся прямо из строк файла
+        cls.expected = {}
+        for line in cls.text.splitlines():
+            name, value = line.split(':')
+            cls.expected[name] = int(value.split()[0])
+
+    def test_all_fields(self):
+        memory = self.backend.parse_meminfo_fields(self.text)
+        self.assertEqual(len(memory), len(self.expected))
+        self.assertEqual(set(memory.keys()), set(self.expected))
+        self.assertEqual(memory.as_dict(), self.expected)
+
+    def test_accessors(self):
+        memory = self.backend.parse_meminfo_fields(self.text)
+        total_kb = 16 * 1024 * 1024
+        self.assertEqual(memory['MemTotal'], total_kb)
+        self.assertEqual(memory.kb('MemTotal'), total_kb)
+        self.assertEqual(memory.mb('MemTotal'), 16 * 1024)
+        self.assertEqual(memory.bytes('MemTotal'), total_kb * 1024)
+        # Поля со скобками в имени и счетчики без единиц измерения
+        self.assertEqual(memory['Active(anon)'], self.expected['Active(anon)'])
+        self.assertEqual(memory['HugePages_Total'], 0)
+        # SwapFree не должен найтись внутри другого имени, а поле раньше предыдущего - находиться
+        self.assertEqual(memory['SwapFree'], self.expected['SwapFree'])
+        self.assertEqual(memory['MemFree'], self.expected['MemFree'])
+
+    def test_missing_key(self):
+        memory = self.backend.parse_meminfo_fields(self.text)
+        self.assertNotIn('NoSuchField', memory)
+        self.assertIsNone(memory.kb('NoSuchField'))
+        self.assertEqual(memory.mb('NoSuchField', 0), 0)
+        with self.assertRaises(KeyError):
+            memory['NoSuchField']
+        # Имя поля без двоеточия в конце не совпадает с более длинным именем
+        self.assertNotIn('Mem', memory)
+
+    def test_report(self):
+        expected = self.expected
+        self.assertEqual(self.backend.parse_memory_info(self.text),
+                         (expected['MemTotal'] // 1024, expected['MemAvailable'] // 1024,
+                          expected['SwapTotal'] // 1024, expected['SwapFree'] // 1024,
+                          expected['VmallocTotal'] // 1024 // 1024))
+        # Без обязательного поля отчет о памяти недоступен, без VmallocTotal - нет
+        without_available = ''.join(line for line in self.text.splitlines(True)
+                                    if not line.startswith('MemAvailable:'))
+        self.assertIsNone(self.backend.parse_memory_info(without_available))
+        without_vmalloc = ''.join(line for line in self.text.splitlines(True)
+                                  if not line.startswith('VmallocTotal:'))
+        self.assertEqual(self.backend.parse_memory_info(without_vmalloc)[4], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Проверка экспорта /metrics: точные объемы файловых систем из statvfs и запуск
+# на Unix-сокете, оставшемся от прошлого запуска
+#
+# Запуск: python3 -m pytest tests или python3 -m unittest discover tests
+
+import asyncio
+import os
+import shutil
+import socket
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import metrics
+import snapshot
+
+
+def make_sample():
+    return snapshot.linux_snapshot(
+        ('Linux', '6.1'), ('root', 'host'), (4, 'x86_64', ['0.5', '0.25', '0.1']), (8000, 4000, 0, 0, None),
+        [('/', 'ext4', 12, 50, 12 * 2 ** 30 + 123456, 50 * 2 ** 30 + 4096),
+         ('/stuck', 'nfs', None, None, None, None)])
+
+
+class SnapshotSeriesTest(unittest.TestCase):
+
+    def test_filesystem_bytes(self):
+        sample = make_sample()
+        # Снимок хранит целые гигабайты, а в JSON байты statvfs не попадают
+        self.assertEqual(sample.disks, [('/', 'ext4', 12, 50), ('/stuck', 'nfs', None, None)])
+        self.assertNotIn('disk_bytes', sample.to_dict())
+
+        page = metrics.MetricsPage()
+        page.update(sample)
+        self.assertIn(b'sysinfo_filesystem_free_bytes{mountpoint="/",fstype="ext4"} 12885025344\n', page.body)
+        self.assertIn(b'sysinfo_filesystem_size_bytes{mountpoint="/",fstype="ext4"} 53687095296\n', page.body)
+        self.assertIn(b'sysinfo_filesystem_size_bytes{mountpoint="/stuck",fstype="nfs"} NaN\n', page.body)
+
+    def test_gigabytes_without_bytes(self):
+        # Снимок без байтов (Windows, снимок от агента): объем выводится из гигабайтов
+        sample = snapshot.Snapshot(platform='windows', disks=[('C:\\', 'NTFS', 3, 100), ('C:\\', 'NTFS', 4, 100)])
+        series = [(family, value) for family, labels, value in metrics.snapshot_series(sample)
+                  if family.startswith('sysinfo_filesystem')]
+        self.assertEqual(series, [('sysinfo_filesystem_free_bytes', 4 * 2 ** 30),
+                                  ('sysinfo_filesystem_size_bytes', 100 * 2 ** 30)])
+
+
+class UnixSocketTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix='metrics-test-')
+        self.addCleanup(shutil.rmtree, self.directory, True)
+        self.path = os.path.join(self.directory, 'metrics.sock')
+
+    def scrape(self):
+        async def run():
+            server = metrics.MetricsServer(make_sample)
+            ready = asyncio.Event()
+            task = asyncio.ensure_future(server.serve('unix:' + self.path, ready))
+            # Ошибка запуска завершает задачу сервера раньше, чем сокет начнет слушать
+            await asyncio.wait([task, asyncio.ensure_future(ready.wait())], timeout=5,
+                               return_when=asyncio.FIRST_COMPLETED)
+            if task.done():
+                task.result()
+            reader, writer = await asyncio.open_unix_connection(self.path)
+            writer.write(b'GET /metrics HTTP/1.0\r\n\r\n')
+            response = await reader.read()
+            writer.close()
+            task.cancel()
+            return response
+
+        return asyncio.run(run())
+
+    def test_stale_socket(self):
+        # Сокет, который никто не слушает, как после аварийного завершения
+        stale = socket.socket(socket.AF_UNIX)
+        stale.bind(self.path)
+        stale.close()
+        response = self.scrape()
+        self.assertTrue(response.startswith(b'HTTP/1.1 200 OK'))
+        self.assertIn(b'sysinfo_filesystem_free_bytes', response)
+
+    def test_regular_file_is_kept(self):
+        with open(self.path, 'w') as f:
+            f.write('data')
+        with self.assertRaises(FileExistsError):
+            self.scrape()
+        with open(self.path) as f:
+            self.assertEqual(f.read(), 'data')
+
+
+if __name__ == '__main__':
+    unittest.main()
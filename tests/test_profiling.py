@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Проверка профилировщика: точность перцентилей по гистограмме и подмена os/open
+# только в модулях обернутых сборщиков
+#
+# Запуск: python3 -m pytest tests или python3 -m unittest discover tests
+
+import builtins
+import os
+import random
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fixtures
+import profiling
+import sysinfo
+
+
+class HistogramTest(unittest.TestCase):
+
+    def test_bucket_bounds_contain_value(self):
+        generator = random.Random(0)
+        values = list(range(5000)) + [generator.randrange(1, 10 ** 13) for _ in range(10000)]
+        for value in values:
+            low, high = profiling.bucket_bounds(profiling.bucket_index(value))
+            self.assertLessEqual(low, value)
+            self.assertLess(value, high)
+
+    def test_percentile_error(self):
+        generator = random.Random(1)
+        stats = profiling.CollectorStats('test')
+        values = sorted(int(generator.lognormvariate(12, 1)) for _ in range(20000))
+        for value in values:
+            stats.record(value)
+        for percent in (50, 95, 99):
+            exact = values[int(percent / 100 * len(values)) - 1]
+            self.assertLess(abs(stats.percentile(percent) / exact - 1), 0.07)
+        self.assertEqual(stats.percentile(100), values[-1])
+
+    def test_single_call(self):
+        stats = profiling.CollectorStats('test')
+        stats.record(1234567)
+        self.assertEqual(stats.percentile(50), 1234567)
+
+
+class ScopedCountingTest(unittest.TestCase):
+
+    def test_counts_only_wrapped_module(self):
+        backend = sysinfo.load_backend('linux')
+        namespace = vars(backend)
+        with tempfile.TemporaryDirectory() as root:
+            meminfo = fixtures.meminfo_text(16, random.Random(0))
+            path = os.path.join(root, 'meminfo')
+            with open(path, 'w') as file:
+                file.write(meminfo)
+            backend.set_roots(proc_root=root)
+            profiler = profiling.Profiler()
+            read_memory = profiler.wrap('memory', backend.get_memory_info)
+            with profiler:
+                self.assertIs(builtins.open, open)
+                self.assertIsNot(namespace['os'], os)
+                self.assertIsNotNone(read_memory())
+                # Вызовы вне модулей сборщиков не считаются
+                with open(path) as file:
+                    file.read()
+                os.stat(path)
+            self.assertIs(namespace['os'], os)
+            self.assertNotIn('open', namespace)
+        stats = profiler.stats['memory']
+        self.assertEqual(stats.calls, 1)
+        self.assertEqual(stats.syscalls, {'open': 1})
+        self.assertEqual(stats.bytes_read, len(meminfo))
+        self.assertNotIn(profiling.OTHER, profiler.stats)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Проверка хранилища временных рядов: скользящие агрегаты против пересчета по окну,
+# бюджет памяти и удаление рядов исчезнувших точек монтирования
+#
+# Запуск: python3 -m pytest tests или python3 -m unittest discover tests
+
+import math
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import snapshot
+import timeseries
+
+
+def disk_snapshot(mount_points, timestamp):
+    return snapshot.Snapshot(timestamp=timestamp, disks=[(name, 'ext4', 10, 20) for name in mount_points])
+
+
+class RollingWindowTest(unittest.TestCase):
+
+    def test_matches_recomputation(self):
+        generator = random.Random(0)
+        series = timeseries.MetricSeries(capacity=100, windows=(7, 50))
+        values = []
+        for index in range(300):
+            value = generator.choice((generator.random() * 100, 5.0))  # С повторяющимися значениями
+            values.append(value)
+            series.append(value, index)
+            for size in (7, 50):
+                window = sorted(values[-size:])
+                rank = max(0, math.ceil(0.95 * len(window)) - 1)
+                expected = (window[0], window[-1], sum(window) / len(window), window[rank])
+                for actual, wanted in zip(series.summary(size), expected):
+                    self.assertAlmostEqual(actual, wanted)
+        self.assertIsNone(series.summary(60))
+
+
+class StoreTest(unittest.TestCase):
+
+    def test_disks_evicted_when_unmounted(self):
+        store = timeseries.TimeSeriesStore(max_metrics=None)
+        store.record(disk_snapshot(['/', '/a', '/b'], 1.0))
+        used = store.used_bytes
+        self.assertIn('disk_free_gb:/a', store.series)
+        self.assertEqual(store.series['disk_free_gb:/a'].capacity, timeseries.DISK_CAPACITY)
+        store.retain_disks(['/', '/b'])
+        self.assertNotIn('disk_free_gb:/a', store.series)
+        self.assertNotIn('disk_total_gb:/a', store.series)
+        self.assertIn('disk_free_gb:/b', store.series)
+        self.assertEqual(store.used_bytes, used * 2 // 3)
+
+    def test_byte_budget(self):
+        per_mount = 2 * timeseries.MetricSeries(timeseries.DISK_CAPACITY, timeseries.DISK_WINDOWS).memory_bytes()
+        store = timeseries.TimeSeriesStore(max_metrics=None, max_bytes=per_mount * 10)
+        mounts = [f"/m/{index}" for index in range(15)]
+        store.record(disk_snapshot(mounts, 1.0))
+        self.assertEqual(len(store.series), 20)
+        self.assertEqual(store.dropped, 10)
+        self.assertLessEqual(store.used_bytes, store.max_bytes)
+        # После удаления отмонтированных точек новые ряды снова помещаются
+        store.retain_disks(mounts[5:])
+        store.record(disk_snapshot(mounts[5:], 2.0))
+        self.assertEqual(len(store.series), 20)
+
+    def test_disks_skipped(self):
+        store = timeseries.TimeSeriesStore()
+        store.record(disk_snapshot(['/'], 1.0))
+        store.record(disk_snapshot(['/'], 2.0), disks=False)
+        self.assertEqual(len(store.series['disk_free_gb:/']), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Проверка сборщика Windows (Задание 1.py) на Linux с поддельным слоем Windows API
+# (fixtures.FakeWindll): функции привязываются один раз, а каждый снимок вызывает
+# каждую нужную функцию ровно один раз
+#
+# Запуск: python3 -m pytest tests или python3 -m unittest discover tests
+
+import ctypes
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fixtures
+import sysinfo
+
+
+class WindowsCollectorTest(unittest.TestCase):
+
+    def setUp(self):
+        self.windll = fixtures.FakeWindll()
+        self.backend = sysinfo.load_backend('windows', windll=self.windll)
+
+    def test_functions_bound_once(self):
+        # Привязка происходит при создании сборщика и не повторяется при вызовах
+        for _ in range(3):
+            self.backend.get_memory_info()
+            self.backend.get_performance_info()
+            self.backend.get_drives_info()
+            self.backend.get_collector().sample()
+        for name, function in self.windll.functions().items():
+            self.assertEqual(function.bindings, 1, name)
+
+    def test_sample_calls_each_function_once(self):
+        collector = self.backend.get_collector()
+        before = self.windll.calls()
+        collector.sample()
+        calls = {name: count - before[name] for name, count in self.windll.calls().items()}
+        expected = {name: 0 for name in calls}
+        expected.update(GlobalMemoryStatusEx=1, GetPerformanceInfo=1)
+        self.assertEqual(calls, expected)
+
+    def test_drives_call_count(self):
+        before = self.windll.calls()
+        self.backend.get_drives_info()
+        calls = self.windll.calls()
+        drive_count = len(fixtures.FAKE_WINDOWS_DRIVES)
+        self.assertEqual(calls['GetLogicalDrives'] - before['GetLogicalDrives'], 1)
+        self.assertEqual(calls['GetVolumeInformationW'] - before['GetVolumeInformationW'], drive_count)
+        self.assertEqual(calls['GetDiskFreeSpaceExW'] - before['GetDiskFreeSpaceExW'], drive_count)
+
+    def test_values(self):
+        info = sysinfo.SystemInfo('windows', windll=self.windll)
+        total_gb, available_gb = fixtures.FAKE_WINDOWS_MEMORY_GB
+        self.assertEqual(info.memory(), (total_gb * 1024, available_gb * 1024))
+        self.assertEqual(info.processor(), (8, "x64 (AMD64)"))
+        self.assertEqual(info.host_and_user(), ('FIXTURE-PC', 'fixture'))
+        self.assertEqual(info.disks(), [(f"{letter}:\\", fs_type, free_gb, total_gb)
+                                        for letter, fs_type, free_gb, total_gb in fixtures.FAKE_WINDOWS_DRIVES])
+        self.assertIn("Build 19045", info.os_name())
+
+    @unittest.skipIf(hasattr(ctypes, 'windll'), "на Windows используется настоящий windll")
+    def test_benchmark_defaults_to_fake_layer(self):
+        sample_us, rate = self.backend.benchmark_sampling(100)
+        self.assertGreater(rate, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Хранилище временных рядов фиксированного размера для значений, собранных сборщиками
+# Каждая метрика хранится в заранее выделенном кольце array('d'), добавление и вытеснение - O(1),
+# скользящие min/max/mean/p95 пересчитываются инкрементально при каждом добавлении
+# Объем памяти ограничен числом метрик и бюджетом в байтах; ряды дисков занимают
+# маленькие кольца и удаляются, когда точка монтирования исчезает из таблицы (retain_disks)
+
+import bisect
+import math
+import time
+from array import array
+from collections import deque
+
+
+# Емкость кольца одной метрики по умолчанию (число значений)
+DEFAULT_CAPACITY = 3600
+# Размеры скользящих окон по умолчанию (в числе значений): минута и пять минут при сборе раз в секунду
+DEFAULT_WINDOWS = (60, 300)
+# Максимальное число метрик в хранилище; новые метрики сверх лимита отбрасываются
+DEFAULT_MAX_METRICS = 1024
+# Емкость кольца и окна рядов точек монтирования (disk_free_gb:*, disk_total_gb:*):
+# их тысячи, а место на диске меняется медленно, поэтому хранится только последняя минута
+DISK_CAPACITY = 60
+DISK_WINDOWS = (60,)
+# Префиксы имен рядов точек монтирования
+DISK_PREFIXES = ('disk_free_gb:', 'disk_total_gb:')
+# Память одного ряда сверх его массивов: объекты ряда и окон, очереди min/max, запись в словаре
+# (измерено tracemalloc на рядах дисков)
+SERIES_OVERHEAD_BYTES = 2560
+
+
+class RollingWindow:
+    """
+    Скользящие min/max/mean/p95 по последним size значениям ряда
+    Сумма для среднего обновляется при добавлении и вытеснении,
+    минимум и максимум - монотонными очередями (амортизированно O(1)),
+    перцентиль - по отсортированному массиву окна: позиция находится bisect за O(log size),
+    но вставка и удаление сдвигают массив, то есть стоят O(size) (memmove нескольких КБ
+    при окнах до сотен значений - дешевле дерева поиска на Python); сам перцентиль - O(1)
+    """
+
+    def __init__(self, size):
+        self.size = size  # Размер окна в числе значений
+        self.count = 0  # Сколько значений сейчас в окне
+        self.total = 0.0  # Сумма значений окна
+        self.sorted_values = array('d')  # Значения окна в порядке возрастания
+        self.minimums = deque()  # Пары (номер, значение) с возрастающими значениями
+        self.maximums = deque()  # Пары (номер, значение) с убывающими значениями
+
+    def push(self, index, value, evicted):
+        """
+        Добавляет значение с порядковым номером index
+        evicted - значение, покидающее окно (None, если окно еще не заполнено)
+        """
+        if evicted is not None:
+            # Убираем вытесняемое значение из суммы и из отсортированного массива
+            self.total -= evicted
+            del self.sorted_values[bisect.bisect_left(self.sorted_values, evicted)]
+        else:
+            self.count += 1
+        self.total += value
+        bisect.insort(self.sorted_values, value)
+
+        # Номер самого старого значения, которое еще входит в окно
+        oldest = index - self.size + 1
+        # Минимум: значения больше нового уже никогда не станут минимумом
+        while self.minimums and self.minimums[-1][1] >= value:
+            self.minimums.pop()
+        self.minimums.append((index, value))
+        if self.minimums[0][0] < oldest:
+            self.minimums.popleft()
+        # Максимум: симметрично
+        while self.maximums and self.maximums[-1][1] <= value:
+            self.maximums.pop()
+        self.maximums.append((index, value))
+        if self.maximums[0][0] < oldest:
+            self.maximums.popleft()
+
+    def minimum(self):
+        return self.minimums[0][1] if self.count else math.nan
+
+    def maximum(self):
+        return self.maximums[0][1] if self.count else math.nan
+
+    def mean(self):
+        return self.total / self.count if self.count else math.nan
+
+    def percentile(self, percent):
+        """
+        Возвращает перцентиль окна (метод ближайшего ранга)
+        """
+        if not self.count:
+            return math.nan
+        rank = max(0, math.ceil(percent / 100 * self.count) - 1)
+        return self.sorted_values[rank]
+
+    def summary(self):
+        """
+        Возвращает кортеж: (min, max, mean, p95)
+        """
+        return self.minimum(), self.maximum(), self.mean(), self.percentile(95)
+
+
+class MetricSeries:
+    """
+    Ряд значений одной метрики в кольце фиксированной емкости
+    """
+
+    def __init__(self, capacity=DEFAULT_CAPACITY, windows=DEFAULT_WINDOWS):
+        # Емкость кольца не меньше самого большого окна: вытесняемое из окна значение
+        # берется прямо из кольца
+        capacity = max(capacity, *windows) if windows else capacity
+        self.capacity = capacity
+        self.values = array('d', bytes(8 * capacity))  # Значения
+        self.timestamps = array('d', bytes(8 * capacity))  # Время каждого значения
+        self.count = 0  # Сколько значений добавлено всего (номер следующего)
+        self.windows = {size: RollingWindow(size) for size in windows}
+
+    def memory_bytes(self):
+        """
+        Оценка памяти ряда в байтах: кольца значений и времени, отсортированные массивы
+        заполненных окон и SERIES_OVERHEAD_BYTES на объекты
+        """
+        return (self.values.itemsize * self.capacity * 2 + sum(8 * size for size in self.windows)
+                + SERIES_OVERHEAD_BYTES)
+
+    def append(self, value, timestamp=None):
+        """
+        Добавляет значение; самое старое значение перезаписывается, если кольцо заполнено
+        """
+        value = float(value)
+        index = self.count
+        for size, window in self.windows.items():
+            # Значение, которое покидает окно, еще лежит в кольце
+            evicted = self.values[(index - size) % self.capacity] if index >= size else None
+            window.push(index, value, evicted)
+        position = index % self.capacity
+        self.values[position] = value
+        self.timestamps[position] = time.time() if timestamp is None else timestamp
+        self.count += 1
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    def latest(self):
+        """
+        Возвращает кортеж: (время, значение) последнего добавленного значения или None
+        """
+        if not self.count:
+            return None
+        position = (self.count - 1) % self.capacity
+        return self.timestamps[position], self.values[position]
+
+    def items(self):
+        """
+        Возвращает список пар (время, значение) от старых к новым
+        """
+        start = self.count - len(self)
+        return [(self.timestamps[index % self.capacity], self.values[index % self.capacity])
+                for index in range(start, self.count)]
+
+    def summary(self, window):
+        """
+        Возвращает (min, max, mean, p95) для окна заданного размера или None, если такого окна нет
+        """
+        rolling = self.windows.get(window)
+        return rolling.summary() if rolling else None
+
+
+class TimeSeriesStore:
+    """
+    Хранилище рядов для всех метрик; объем памяти ограничен
+    max_metrics рядами (None - без ограничения числа) и бюджетом max_bytes байт
+    (None - без бюджета) независимо от времени работы
+    Значения новых метрик сверх лимитов отбрасываются и считаются в dropped
+    """
+
+    def __init__(self, capacity=DEFAULT_CAPACITY, windows=DEFAULT_WINDOWS, max_metrics=DEFAULT_MAX_METRICS,
+                 max_bytes=None):
+        self.capacity = capacity
+        self.windows = tuple(windows)
+        self.max_metrics = max_metrics
+        self.max_bytes = max_bytes
+        self.series = {}  # имя_метрики -> MetricSeries
+        self.used_bytes = 0  # Сумма MetricSeries.memory_bytes всех рядов
+        self.dropped = 0  # Сколько значений отброшено из-за лимитов
+        self.disk_names = set()  # Точки монтирования, у которых есть ряды
+
+    def append(self, name, value, timestamp=None, capacity=None, windows=None):
+        """
+        Добавляет значение метрики name; отсутствующие значения (None) пропускаются
+        capacity и windows задают размер кольца и окна, если ряд создается этим вызовом
+        """
+        if value is None:
+            return
+        series = self.series.get(name)
+        if series is None:
+            if self.max_metrics is not None and len(self.series) >= self.max_metrics:
+                self.dropped += 1
+                return
+            series = MetricSeries(capacity or self.capacity, self.windows if windows is None else windows)
+            size = series.memory_bytes()
+            if self.max_bytes is not None and self.used_bytes + size > self.max_bytes:
+                self.dropped += 1
+                return
+            self.series[name] = series
+            self.used_bytes += size
+        series.append(value, timestamp)
+
+    def remove(self, name):
+        """
+        Удаляет ряд метрики name вместе с его памятью
+        """
+        series = self.series.pop(name, None)
+        if series is not None:
+            self.used_bytes -= series.memory_bytes()
+
+    def retain_disks(self, mount_points):
+        """
+        Оставляет ряды дисков только для точек монтирования mount_points: ряды исчезнувших
+        точек (контейнеры, отмонтированные ресурсы) удаляются, чтобы не занимать лимиты
+        Вызывается при изменении таблицы монтирования
+        """
+        current = set(mount_points)
+        for mount_point in self.disk_names - current:
+            for prefix in DISK_PREFIXES:
+                self.remove(prefix + mount_point)
+        self.disk_names &= current
+
+    def record(self, snapshot, disks=True):
+        """
+        Добавляет все числовые значения снимка (snapshot.Snapshot)
+        Диски записываются как метрики disk_free_gb:<имя> и disk_total_gb:<имя>
+        (кольца DISK_CAPACITY, окна DISK_WINDOWS), давление PSI - как psi_some:<ресурс>
+        и psi_full:<ресурс>
+        disks=False пропускает диски (их значения в снимке не обновлялись с прошлой записи)
+        """
+        timestamp = snapshot.timestamp
+        for name in ('mem_total_mb', 'mem_available_mb', 'memory_load', 'swap_total_mb', 'swap_free_mb',
+                     'virtual_mb', 'commit_total_mb', 'commit_limit_mb'):
+            self.append(name, getattr(snapshot, name), timestamp)
+        if snapshot.load_avg:
+            for name, value in zip(('load1', 'load5', 'load15'), snapshot.load_avg):
+                self.append(name, value, timestamp)
+        self.append('cpu_limit', snapshot.cpu_limit, timestamp)
+        if snapshot.pressure:
+            # Давление записывается как psi_some:<ресурс> и psi_full:<ресурс> (avg10, %)
+            for resource, values in snapshot.pressure.items():
+                self.append(f"psi_some:{resource}", values['some'][0], timestamp)
+                if values['full']:
+                    self.append(f"psi_full:{resource}", values['full'][0], timestamp)
+        if not disks:
+            return
+        free_prefix, total_prefix = DISK_PREFIXES
+        disk_names = self.disk_names
+        for disk_name, fs_type, free_gb, total_gb in snapshot.disks:
+            self.append(free_prefix + disk_name, free_gb, timestamp, DISK_CAPACITY, DISK_WINDOWS)
+            self.append(total_prefix + disk_name, total_gb, timestamp, DISK_CAPACITY, DISK_WINDOWS)
+            disk_names.add(disk_name)
+
+    def summary(self, name, window):
+        """
+        Возвращает (min, max, mean, p95) метрики name для окна window или None
+        """
+        series = self.series.get(name)
+        return series.summary(window) if series else None
+
+    def memory_bytes(self):
+        """
+        Возвращает объем памяти, занятый рядами всех метрик, в байтах
+        """
+        return self.used_bytes
@@ -1,47 +1,261 @@
 import os
 import sys
 import platform
-import subprocess
 import re
+import time
+import argparse
+import threading
+import select
+import heapq
+from array import array
+from collections import deque
+
+# Остальные модули проекта (snapshot, agent, metrics, history и т.д.) импортируются там,
+# где они нужны: сборщик, загруженный через sysinfo ради одного значения, не должен тянуть
+# за собой asyncio, subprocess, gzip и mmap (см. sysinfo.LAZY_MODULES)
+import engine
+
+
+# Сколько секунд ждать ответа statvfs от одной точки монтирования (зависшие NFS/CIFS)
+STATVFS_TIMEOUT = 5.0
+# Максимальное число потоков, одновременно выполняющих statvfs
+STATVFS_WORKERS = 16
+# Значение, которым помечается точка монтирования, не ответившая за отведенное время
+TIMED_OUT = 'timed out'
+# Как часто в режиме наблюдения повторяется statvfs, если таблица монтирования не менялась (секунды)
+WATCH_MOUNTS_INTERVAL = 5.0
+# Бюджет памяти хранилища временных рядов режима наблюдения в байтах: около 1.5 МБ занимают
+# метрики хоста, остальное - ряды точек монтирования (около 2 КБ на ряд, см. timeseries.DISK_CAPACITY)
+WATCH_STORE_BYTES = 64 * 1024 * 1024
+
+# Интервалы опроса сборщиков в режиме --adaptive: (минимальный, максимальный) в секундах
+# Пока значение не меняется, интервал удваивается до максимального, при изменении - сокращается
+ADAPTIVE_INTERVALS = {
+    'os': (60.0, 3600.0),
+    'user_host': (60.0, 3600.0),
+    'processor': (1.0, 30.0),
+    'memory': (1.0, 30.0),
+    'mounts': (5.0, 600.0),
+    'cgroup': (5.0, 300.0),
+}
+# Пороги, за которыми сборщик снова опрашивается с минимальным интервалом:
+# загрузка за минуту на один процессор, доля доступной памяти, доля свободного места
+ADAPTIVE_LOAD_PER_CPU = 1.0
+ADAPTIVE_MEMORY_AVAILABLE = 0.1
+ADAPTIVE_MOUNT_FREE = 0.05
+# Сборщики режима --adaptive, которые могут заблокироваться (statvfs зависшего NFS):
+# они выполняются в собственных потоках, а не в потоке планировщика
+ADAPTIVE_BLOCKING = ('mounts',)
+
+# Префиксы точек монтирования специальных ФС, которые не представляют интереса
+SPECIAL_FS_PREFIXES = ('/proc', '/sys', '/dev', '/run', '/tmp')
+
+# Корни файловых систем, из которых читаются сведения; меняются через set_roots
+# (например, на дерево тестовых данных из fixtures.py)
+PROC_ROOT = '/proc'
+SYS_ROOT = '/sys'
+ETC_ROOT = '/etc'
+
+# Точки монтирования, statvfs которых еще не вернулся с прошлых вызовов
+# Повторно их не опрашиваем, чтобы не плодить зависшие потоки
+_hung_mounts = set()
+_hung_mounts_lock = threading.Lock()
+
+
+def set_roots(proc_root=None, sys_root=None, etc_root=None):
+    """
+    Задает корни /proc, /sys и /etc, из которых читают все сборщики
+    Незаданные корни не меняются; кэши сведений о хосте, лимитов cgroup и топологии сбрасываются
+    """
+    global PROC_ROOT, SYS_ROOT, ETC_ROOT, _host_facts, _cgroup_limits, _cpu_topology
+    PROC_ROOT = proc_root or PROC_ROOT
+    SYS_ROOT = sys_root or SYS_ROOT
+    ETC_ROOT = etc_root or ETC_ROOT
+    _host_facts = None
+    with _cgroup_limits_lock:
+        if _cgroup_limits is not None:
+            _cgroup_limits.close()
+        _cgroup_limits = None
+    with _cpu_topology_lock:
+        if _cpu_topology is not None:
+            _cpu_topology.close()
+        _cpu_topology = None
+
+
+def proc_path(*parts):
+    """
+    Возвращает путь внутри текущего корня /proc
+    """
+    return os.path.join(PROC_ROOT, *parts)
+
+
+def etc_path(*parts):
+    """
+    Возвращает путь внутри текущего корня /etc
+    """
+    return os.path.join(ETC_ROOT, *parts)
 
 
 def get_os_info():
     """
     Получает информацию о дистрибутиве Linux и версии ядра
-    Использует несколько методов для максимальной совместимости
+    Значения берутся из кэша неизменных сведений о хосте (см. get_host_facts)
     """
-    # Получаем версию ядра через встроенный модуль platform
-    kernel_version = platform.release()  # Например: "5.15.0-86-generic"
+    facts = get_host_facts()
+    # Возвращаем кортеж с информацией о дистрибутиве и версии ядра
+    return facts['distro'], facts['kernel']
+
 
-    # Инициализируем переменную для хранения информации о дистрибутиве
-    distro_info = "Неизвестно"
+# Кэш неизменных сведений о хосте и подпись, по которой проверяется его актуальность
+_host_facts = None
+_host_facts_signature = None
+# Лимиты cgroup (CgroupLimits) с открытыми файлами, созданные при первом вызове get_cgroup_info
+_cgroup_limits = None
+_cgroup_limits_lock = threading.Lock()
+# Топология процессоров (CpuTopology), прочитанная при первом вызове get_topology_info
+_cpu_topology = None
+_cpu_topology_lock = threading.Lock()
 
+
+def os_release_files():
+    """
+    Возвращает файлы os-release в порядке приоритета: /etc/os-release
+    и запасной вариант по стандарту systemd /usr/lib/os-release (рядом с корнем /etc)
+    """
+    root = os.path.dirname(ETC_ROOT.rstrip('/')) or '/'
+    return etc_path('os-release'), os.path.join(root, 'usr', 'lib', 'os-release')
+
+
+def parse_release_file(content):
+    """
+    Разбирает файл формата os-release / lsb-release (строки КЛЮЧ=значение)
+    Возвращает словарь; кавычки вокруг значений снимаются
+    """
+    fields = {}
+    for line in content.splitlines():
+        key, separator, value = line.strip().partition('=')
+        if not separator or key.startswith('#'):
+            continue
+        value = value.strip()
+        # Значение может быть в двойных или одинарных кавычках
+        if len(value) >= 2 and value[0] == value[-1] and value[0] in '"\'':
+            value = value[1:-1]
+        fields[key] = value
+    return fields
+
+
+def resolve_distro_name():
+    """
+    Определяет название дистрибутива только по файлам, без запуска внешних программ:
+    1. PRETTY_NAME (или NAME и VERSION) из /etc/os-release или /usr/lib/os-release
+    2. DISTRIB_DESCRIPTION из /etc/lsb-release (его же выводит lsb_release -d)
+    3. Первая строка любого другого /etc/*-release (например, /etc/redhat-release)
+    4. Запасной вариант через модуль platform
+    """
+    # Метод 1: os-release (стандартный способ в современных дистрибутивах)
+    for path in os_release_files():
+        try:
+            with open(path, 'r') as f:
+                fields = parse_release_file(f.read())
+        except OSError:
+            continue
+        if fields.get('PRETTY_NAME'):
+            return fields['PRETTY_NAME']
+        if fields.get('NAME'):
+            return f"{fields['NAME']} {fields.get('VERSION', '')}".strip()
+
+    # Метод 2: lsb-release - тот же файл, который читает lsb_release, но без запуска Python в отдельном процессе
     try:
-        # Метод 1: Чтение файла /etc/os-release (стандартный способ в современных дистрибутивах)
-        # Файл /etc/os-release содержит информацию о дистрибутиве в формате ключ=значение
-        with open('/etc/os-release', 'r') as f:  # Открываем файл для чтения
-            content = f.read()  # Читаем все содержимое файла в строку
-
-        # Используем регулярное выражение для поиска строки PRETTY_NAME
-        # Шаблон r'PRETTY_NAME="([^"]+)"' ищет PRETTY_NAME="значение" и захватывает значение в группу 1
-        match = re.search(r'PRETTY_NAME="([^"]+)"', content)
-        if match:  # Если нашли совпадение
-            distro_info = match.group(1)  # Извлекаем значение из первой группы захвата
-        else:
-            # Метод 2: Используем команду lsb_release (устаревший, но широко поддерживаемый способ)
-            # Запускаем команду lsb_release -d которая выводит описание дистрибутива
-            result = subprocess.run(['lsb_release', '-d'], capture_output=True, text=True)
-            # Проверяем, что команда выполнилась успешно (код возврата 0)
-            if result.returncode == 0:
-                # Команда выводит "Description: Ubuntu 22.04.1 LTS"
-                # Разделяем вывод по первому двоеточию и берем вторую часть, удаляя пробелы
-                distro_info = result.stdout.split(':', 1)[1].strip()
-    except:
-        # Метод 3: Запасной вариант через модуль platform
-        distro_info = platform.system()  # Возвращает например "Linux"
+        with open(etc_path('lsb-release'), 'r') as f:
+            description = parse_release_file(f.read()).get('DISTRIB_DESCRIPTION')
+        if description:
+            return description
+    except OSError:
+        pass
 
-    # Возвращаем кортеж с информацией о дистрибутиве и версии ядра
-    return distro_info, kernel_version
+    # Метод 3: файлы конкретных дистрибутивов, например /etc/redhat-release
+    try:
+        names = sorted(os.listdir(ETC_ROOT))
+    except OSError:
+        names = []
+    for name in names:
+        if not name.endswith('-release') or name in ('os-release', 'lsb-release'):
+            continue
+        try:
+            with open(etc_path(name), 'r') as f:
+                first_line = f.readline().strip()
+        except OSError:
+            continue
+        if first_line and '=' not in first_line:
+            return first_line
+
+    # Метод 4: Запасной вариант через модуль platform
+    return platform.system()  # Возвращает например "Linux"
+
+
+def host_facts_signature():
+    """
+    Возвращает подпись, по которой проверяется актуальность кэша сведений о хосте:
+    время изменения файлов os-release и результат uname (ядро, имя хоста, архитектура)
+    """
+    mtimes = []
+    for path in os_release_files():
+        try:
+            mtimes.append(os.stat(path).st_mtime_ns)
+        except OSError:
+            mtimes.append(None)
+    return tuple(mtimes), tuple(os.uname())
+
+
+def get_host_facts():
+    """
+    Возвращает неизменные сведения о хосте: дистрибутив, версия ядра, архитектура,
+    имя хоста и число процессоров
+    Сведения собираются один раз и пересобираются только если изменился os-release
+    или результат uname (обновление ядра, смена имени хоста)
+    """
+    global _host_facts, _host_facts_signature
+    signature = host_facts_signature()
+    if _host_facts is None or signature != _host_facts_signature:
+        uname = signature[1]  # sysname, nodename, release, version, machine
+        _host_facts = {
+            'distro': resolve_distro_name(),
+            'kernel': uname[2],  # Например: "5.15.0-86-generic"
+            'architecture': uname[4],  # Например: "x86_64", "aarch64"
+            'hostname': uname[1],
+            'cpu_count': os.cpu_count(),
+        }
+        _host_facts_signature = signature
+    return _host_facts
+
+
+def benchmark_host_facts(iterations=200):
+    """
+    Сравнивает задержку получения названия дистрибутива прежним способом
+    (запуск lsb_release -d) с чтением файлов и с обращением к кэшу
+    Возвращает кортеж: (мс_lsb_release или None если его нет, мс_чтение_файлов, мкс_кэш)
+    """
+    import shutil
+    import subprocess
+
+    lsb_ms = None
+    if shutil.which('lsb_release'):
+        started = time.perf_counter()
+        for _ in range(5):
+            subprocess.run(['lsb_release', '-d'], capture_output=True, text=True)
+        lsb_ms = (time.perf_counter() - started) / 5 * 1000
+
+    started = time.perf_counter()
+    for _ in range(iterations):
+        resolve_distro_name()
+    files_ms = (time.perf_counter() - started) / iterations * 1000
+
+    get_host_facts()  # Заполняем кэш
+    started = time.perf_counter()
+    for _ in range(iterations):
+        get_host_facts()
+    cached_us = (time.perf_counter() - started) / iterations * 1_000_000
+    return lsb_ms, files_ms, cached_us
 
 
 def get_memory_info():
@@ -51,27 +265,154 @@ def get_memory_info():
     """
     try:
         # Открываем виртуальный файл /proc/meminfo который предоставляет ядро Linux
-        with open('/proc/meminfo', 'r') as f:
+        with open(proc_path('meminfo'), 'r') as f:
             meminfo = f.read()  # Читаем все содержимое файла
 
-        # Используем регулярные выражения для извлечения числовых значений
-        # Шаблон r'MemTotal:\s+(\d+)' ищет "MemTotal:", затем пробелы и захватывает число
-        mem_total = int(re.search(r'MemTotal:\s+(\d+)', meminfo).group(1))  # Общая память в КБ
-        mem_free = int(re.search(r'MemFree:\s+(\d+)', meminfo).group(1))  # Свободная память в КБ
-        mem_available = int(re.search(r'MemAvailable:\s+(\d+)', meminfo).group(1))  # Доступная память в КБ
-        swap_total = int(re.search(r'SwapTotal:\s+(\d+)', meminfo).group(1))  # Общий своп в КБ
-        swap_free = int(re.search(r'SwapFree:\s+(\d+)', meminfo).group(1))  # Свободный своп в КБ
-
-        # Конвертируем из килобайт в мегабайты (деление на 1024)
-        mem_total_mb = mem_total // 1024  # Общая память в МБ
-        mem_available_mb = mem_available // 1024  # Доступная память в МБ
-        swap_total_mb = swap_total // 1024  # Общий своп в МБ
-        swap_free_mb = swap_free // 1024  # Свободный своп в МБ
-
-        # Пытаемся получить информацию о виртуальной памяти (не во всех системах доступно)
-        vmalloc_match = re.search(r'VmallocTotal:\s+(\d+)', meminfo)  # Ищем VmallocTotal
-        # Если нашли, конвертируем из килобайт в мегабайты (двойное деление на 1024)
-        vmalloc_total_mb = int(vmalloc_match.group(1)) // 1024 // 1024 if vmalloc_match else 0
+        # Разбор текста вынесен в отдельную функцию, чтобы его мог использовать режим наблюдения
+        return parse_memory_info(meminfo)
+    except Exception as e:
+        # Если произошла ошибка при чтении или парсинге, возвращаем None
+        return None
+
+
+class MemInfo:
+    """
+    Поля /proc/meminfo с типизированным доступом
+    Текст разбирается по мере обращения к полям: отдельное поле находится поиском str.find,
+    который продолжается с конца строки предыдущего найденного поля (ядро выводит поля
+    в постоянном порядке), поэтому несколько полей отчета находятся за один проход по тексту;
+    все поля сразу (keys, as_dict, len) разбираются один раз и запоминаются
+    Значения отдаются в том виде, в котором их выводит ядро: в КБ для полей с суффиксом kB
+    и в штуках для счетчиков без единиц измерения (например, HugePages_Total)
+    """
+    __slots__ = ('text', 'position', 'fields')
+
+    def __init__(self, text):
+        self.text = text  # Содержимое /proc/meminfo
+        self.position = 0  # Конец строки последнего найденного поля
+        self.fields = None  # Словарь имя_поля -> строка с числом, после первого разбора всех полей
+
+    def value(self, key):
+        """
+        Возвращает значение поля key (без двоеточия) как int или None, если поля нет
+        """
+        if self.fields is not None:
+            value = self.fields.get(key)
+            return int(value) if value is not None else None
+        text = self.text
+        name = key + ':'
+        start = text.find(name, self.position)
+        if start < 0 and self.position:
+            # Поле стоит раньше предыдущего найденного - ищем с начала текста
+            start = text.find(name)
+        # Имя должно стоять в начале строки (например, SwapFree: не должен найтись внутри ZswapFree:)
+        while start > 0 and text[start - 1] != '\n':
+            start = text.find(name, start + 1)
+        if start < 0:
+            return None
+        end = text.find('\n', start)
+        if end < 0:
+            end = len(text)
+        self.position = end
+        # Значение строки вида "   123 kB": int сам пропускает пробелы слева
+        return int(text[start + len(name):end].rstrip(' kB'))
+
+    def all_fields(self):
+        """
+        Разбирает все поля текста (один раз) и возвращает словарь имя_поля -> строка с числом
+        Каждая строка имеет вид "Имя:   123 kB" или "Имя:   123", поэтому после удаления
+        " kB" и двоеточий текст распадается на чередующиеся пары имя/значение
+        """
+        if self.fields is not None:
+            return self.fields
+        words = self.text.replace(' kB', '').replace(':', '').split()
+        if len(words) % 2 == 0:
+            # Слова идут парами: имя, значение, имя, значение...
+            fields = dict(zip(words[::2], words[1::2]))
+        else:
+            # Нечетное число слов - формат строки неожиданный, разбираем построчно
+            fields = {}
+            for line in self.text.splitlines():
+                # Делим строку на имя поля и остаток
+                key, separator, rest = line.partition(':')
+                value = rest.split(None, 1)  # Первое слово после двоеточия - число
+                if separator and value and value[0].isdigit():
+                    fields[key] = value[0]
+        self.fields = fields
+        return fields
+
+    def __contains__(self, key):
+        return self.value(key) is not None
+
+    def __getitem__(self, key):
+        value = self.value(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __len__(self):
+        return len(self.all_fields())
+
+    def keys(self):
+        """
+        Возвращает имена всех полей, найденных в /proc/meminfo
+        """
+        return self.all_fields().keys()
+
+    def as_dict(self):
+        """
+        Возвращает все поля в виде словаря имя_поля -> int
+        """
+        return {key: int(value) for key, value in self.all_fields().items()}
+
+    def kb(self, key, default=None):
+        """
+        Возвращает значение поля как есть (в КБ) или default, если поля нет
+        """
+        value = self.value(key)
+        return value if value is not None else default
+
+    def mb(self, key, default=None):
+        """
+        Возвращает значение поля в МБ или default, если поля нет
+        """
+        value = self.value(key)
+        return value // 1024 if value is not None else default
+
+    def bytes(self, key, default=None):
+        """
+        Возвращает значение поля в байтах или default, если поля нет
+        """
+        value = self.value(key)
+        return value * 1024 if value is not None else default
+
+
+def parse_meminfo_fields(meminfo):
+    """
+    Возвращает объект MemInfo для содержимого /proc/meminfo, уже прочитанного в строку
+    Поля разбираются при обращении к ним (см. MemInfo)
+    """
+    return MemInfo(meminfo)
+
+
+def parse_memory_info(meminfo):
+    """
+    Разбирает содержимое /proc/meminfo, уже прочитанное в строку
+    Возвращает тот же кортеж, что и get_memory_info, или None при ошибке разбора
+    """
+    try:
+        # Поля отчета читаются из MemInfo в том порядке, в котором их выводит ядро
+        memory = parse_meminfo_fields(meminfo)
+
+        # Конвертируем из килобайт в мегабайты; если обязательного поля нет, [] выбросит KeyError
+        mem_total_mb = memory['MemTotal'] // 1024  # Общая память в МБ
+        mem_available_mb = memory['MemAvailable'] // 1024  # Доступная память в МБ
+        swap_total_mb = memory['SwapTotal'] // 1024  # Общий своп в МБ
+        swap_free_mb = memory['SwapFree'] // 1024  # Свободный своп в МБ
+
+        # Информация о виртуальной памяти есть не во всех системах
+        # Если нашли, конвертируем из килобайт (двойное деление на 1024)
+        vmalloc_total_mb = memory.kb('VmallocTotal', 0) // 1024 // 1024
 
         # Возвращаем кортеж со всей информацией о памяти
         return mem_total_mb, mem_available_mb, swap_total_mb, swap_free_mb, vmalloc_total_mb
@@ -80,24 +421,61 @@ def get_memory_info():
         return None
 
 
+def benchmark_memory_parser(iterations=20000):
+    """
+    Сравнивает разбор /proc/meminfo через MemInfo с прежним способом, в котором каждое поле
+    искалось отдельным re.search по всему тексту
+    Замеряются два случая: поля отчета (parse_memory_info) и все поля файла (MemInfo.as_dict
+    против re.findall)
+    Возвращает кортеж: (мкс_отчет_регулярками, мкс_отчет_через_MemInfo,
+                        мкс_все_поля_регулярками, мкс_все_поля_через_MemInfo)
+    """
+    # Читаем файл один раз, чтобы измерять только разбор
+    with open(proc_path('meminfo'), 'r') as f:
+        meminfo = f.read()
+
+    def parse_with_regex(text):
+        # Прежний способ: шесть отдельных проходов по тексту
+        return (int(re.search(r'MemTotal:\s+(\d+)', text).group(1)),
+                int(re.search(r'MemFree:\s+(\d+)', text).group(1)),
+                int(re.search(r'MemAvailable:\s+(\d+)', text).group(1)),
+                int(re.search(r'SwapTotal:\s+(\d+)', text).group(1)),
+                int(re.search(r'SwapFree:\s+(\d+)', text).group(1)),
+                re.search(r'VmallocTotal:\s+(\d+)', text))
+
+    all_fields_pattern = re.compile(r'^([^:\n]+):\s+(\d+)', re.MULTILINE)
+
+    def parse_all_with_regex(text):
+        return {key: int(value) for key, value in all_fields_pattern.findall(text)}
+
+    def parse_all_with_meminfo(text):
+        return parse_meminfo_fields(text).as_dict()
+
+    results = []
+    for parser in (parse_with_regex, parse_memory_info, parse_all_with_regex, parse_all_with_meminfo):
+        started = time.perf_counter_ns()
+        for _ in range(iterations):
+            parser(meminfo)
+        # Среднее время одного разбора в микросекундах
+        results.append((time.perf_counter_ns() - started) / iterations / 1000)
+    return tuple(results)
+
+
 def get_processor_info():
     """
     Получает информацию о процессоре: количество ядер, архитектура и загрузка
     """
     try:
-        # Получаем количество логических процессоров (ядер)
-        # os.cpu_count() возвращает количество логических процессоров в системе
-        processor_count = os.cpu_count()
-
-        # Получаем архитектуру процессора через platform.machine()
-        # Возвращает например "x86_64", "aarch64", "i386" и т.д.
-        architecture = platform.machine()
+        # Количество логических процессоров и архитектура не меняются - берем их из кэша
+        facts = get_host_facts()
+        processor_count = facts['cpu_count']
+        architecture = facts['architecture']  # Например "x86_64", "aarch64", "i386" и т.д.
 
         # Получаем информацию о загрузке системы из /proc/loadavg
         # Формат файла: "1.23 0.45 0.67 1/123 12345" - средняя загрузка за 1, 5, 15 минут
-        with open('/proc/loadavg', 'r') as f:
+        with open(proc_path('loadavg'), 'r') as f:
             # Читаем файл, разбиваем на части и берем первые 3 значения (загрузка за 1,5,15 мин)
-            load_avg = f.read().strip().split()[:3]
+            load_avg = parse_load_avg(f.read())
 
         # Возвращаем кортеж с информацией о процессоре
         return processor_count, architecture, load_avg
@@ -106,47 +484,958 @@ def get_processor_info():
         return None
 
 
-def get_mounts_info():
+def parse_load_avg(loadavg):
+    """
+    Разбирает содержимое /proc/loadavg и возвращает список из трех строк:
+    средняя загрузка за 1, 5 и 15 минут
+    """
+    # Разбиваем строку по пробелам и берем первые 3 значения
+    return loadavg.strip().split()[:3]
+
+
+# Поля строки "cpu" в /proc/stat (в тиках): user nice system idle iowait irq softirq steal guest guest_nice
+CPU_STAT_FIELDS = 10
+
+
+class CpuStatSampler:
+    """
+    Загрузка каждого ядра по данным /proc/stat
+    Счетчики тиков всех процессоров хранятся в заранее выделенном кольцевом массиве
+    array('Q') на depth снимков, проценты между двумя последними снимками
+    пересчитываются в заранее выделенный array('d'), поэтому один снимок стоит O(ядер)
+    Ячейка 0 - суммарная строка "cpu", ячейка N+1 - строка "cpuN"
+    """
+
+    def __init__(self, proc_root=None, depth=2):
+        self.reader = ProcFileReader(os.path.join(proc_root or PROC_ROOT, 'stat'), 16384)
+        self.depth = depth  # Сколько снимков хранит кольцо
+        self.count = 0  # Сколько снимков сделано всего
+        self.present = None  # Какие ячейки были в последнем снимке (offline-ядра отсутствуют)
+        self.allocate(((os.cpu_count() or 1) + 1))
+
+    def allocate(self, slots):
+        """
+        Выделяет кольцо и массив процентов на slots ячеек (суммарная строка + ядра)
+        Вызывается один раз и повторно только если появилось ядро с большим номером
+        """
+        self.slots = slots
+        self.ring = array('Q', bytes(8 * self.depth * slots * CPU_STAT_FIELDS))
+        # На каждую ячейку четыре процента: user, system, iowait, steal
+        self.percent = array('d', bytes(8 * slots * 4))
+        self.present = bytearray(slots)
+        self.count = 0  # Старые снимки несопоставимы с новой раскладкой
+
+    def sample(self):
+        """
+        Делает снимок счетчиков /proc/stat и пересчитывает проценты
+        Возвращает True, если проценты доступны (сделано не меньше двух снимков)
+        """
+        self.reader.read()
+        buffer = self.reader.buffer
+        # Строки cpu идут в начале файла; остальное (intr, ctxt...) не декодируем
+        end = buffer.find(b'\nintr', 0, self.reader.length)
+        text = buffer[:end if end >= 0 else self.reader.length].decode('ascii', 'replace')
+
+        present = self.present
+        for slot in range(self.slots):
+            present[slot] = 0
+        base = (self.count % self.depth) * self.slots * CPU_STAT_FIELDS
+        ring = self.ring
+
+        for line in text.split('\n'):
+            if not line.startswith('cpu'):
+                break  # Строки cpu закончились
+            parts = line.split()
+            # "cpu" - суммарная строка, "cpu7" - ядро 7
+            slot = int(parts[0][3:]) + 1 if len(parts[0]) > 3 else 0
+            if slot >= self.slots:
+                # Появилось ядро с большим номером (hotplug) - расширяем массивы и начинаем заново
+                self.allocate(slot + 1)
+                return self.sample()
+            present[slot] = 1
+            offset = base + slot * CPU_STAT_FIELDS
+            # Старые ядра выводят меньше полей - недостающие считаем нулями
+            for field in range(CPU_STAT_FIELDS):
+                ring[offset + field] = int(parts[field + 1]) if field + 1 < len(parts) else 0
+
+        self.count += 1
+        if self.count < 2:
+            return False
+        self.compute()
+        return True
+
+    def compute(self):
+        """
+        Пересчитывает проценты между двумя последними снимками
+        """
+        ring, percent, slots = self.ring, self.percent, self.slots
+        current = ((self.count - 1) % self.depth) * slots * CPU_STAT_FIELDS
+        previous = ((self.count - 2) % self.depth) * slots * CPU_STAT_FIELDS
+        for slot in range(slots):
+            now = current + slot * CPU_STAT_FIELDS
+            before = previous + slot * CPU_STAT_FIELDS
+            out = slot * 4
+            if not self.present[slot]:
+                # Ядро offline - проценты нулевые
+                percent[out] = percent[out + 1] = percent[out + 2] = percent[out + 3] = 0.0
+                continue
+            # Разности счетчиков; guest и guest_nice уже входят в user и nice, их не суммируем
+            user = ring[now] - ring[before] + ring[now + 1] - ring[before + 1]
+            system = (ring[now + 2] - ring[before + 2] + ring[now + 5] - ring[before + 5]
+                      + ring[now + 6] - ring[before + 6])
+            idle = ring[now + 3] - ring[before + 3]
+            iowait = ring[now + 4] - ring[before + 4]
+            steal = ring[now + 7] - ring[before + 7]
+            total = user + system + idle + iowait + steal
+            if total <= 0:
+                # Между снимками не прошло ни одного тика (или ядро только что вернулось)
+                percent[out] = percent[out + 1] = percent[out + 2] = percent[out + 3] = 0.0
+                continue
+            scale = 100.0 / total
+            percent[out] = user * scale
+            percent[out + 1] = system * scale
+            percent[out + 2] = iowait * scale
+            percent[out + 3] = steal * scale
+
+    def total(self):
+        """
+        Возвращает загрузку всей системы: (user_%, system_%, iowait_%, steal_%)
+        """
+        return tuple(self.percent[0:4])
+
+    def core(self, index):
+        """
+        Возвращает загрузку ядра index: (user_%, system_%, iowait_%, steal_%)
+        """
+        out = (index + 1) * 4
+        return tuple(self.percent[out:out + 4])
+
+    def cores(self):
+        """
+        Возвращает список (номер_ядра, user_%, system_%, iowait_%, steal_%) для всех ядер online
+        """
+        return [(slot - 1, *self.percent[slot * 4:slot * 4 + 4])
+                for slot in range(1, self.slots) if self.present[slot]]
+
+    def close(self):
+        """
+        Закрывает файл /proc/stat
+        """
+        self.reader.close()
+
+
+# Счетчики сетевого интерфейса в порядке хранения
+NET_COUNTERS = ('rx_bytes', 'rx_packets', 'rx_errors', 'rx_dropped',
+                'tx_bytes', 'tx_packets', 'tx_errors', 'tx_dropped')
+# Номера этих счетчиков среди 16 чисел строки /proc/net/dev
+# (прием: bytes packets errs drop fifo frame compressed multicast, передача: то же с colls и carrier)
+NET_DEV_COLUMNS = (0, 1, 2, 3, 8, 9, 10, 11)
+
+
+class NetDevSampler:
+    """
+    Пропускная способность сетевых интерфейсов по разнице счетчиков между снимками
+    Основной источник - /proc/net/dev: все интерфейсы читаются одним вызовом read,
+    что важно на хостах с тысячами veth-интерфейсов
+    Источник "sysfs" читает /sys/class/net/*/statistics - по восемь файлов на интерфейс,
+    он подходит для небольшого числа интерфейсов или когда /proc/net/dev недоступен
+    Строка интерфейса, не изменившаяся с прошлого снимка, не разбирается: у простаивающих
+    интерфейсов счетчики стоят на месте, и большая часть строк пропускается одним сравнением
+    """
+
+    def __init__(self, proc_root=None, sys_root=None, source='proc'):
+        self.source = source
+        self.sys_root = sys_root or SYS_ROOT
+        self.reader = (ProcFileReader(os.path.join(proc_root or PROC_ROOT, 'net', 'dev'), 65536)
+                       if source == 'proc' else None)
+        self.raw = {}  # интерфейс -> строка счетчиков из прошлого снимка (для сравнения)
+        self.counters = {}  # интерфейс -> array('Q') из 8 счетчиков (NET_COUNTERS)
+        self.deltas = {}  # интерфейс -> приращения счетчиков за интервал (только изменившиеся)
+        self.sample_time = None  # Время последнего снимка (monotonic)
+        self.elapsed = 0.0  # Секунд между двумя последними снимками
+
+    def read_proc(self):
+        """
+        Возвращает пары (интерфейс, строка_счетчиков) из /proc/net/dev
+        """
+        lines = self.reader.text().splitlines()
+        # Первые две строки - заголовок таблицы
+        for line in lines[2:]:
+            name, separator, values = line.partition(':')
+            if separator:
+                yield name.strip(), values
+
+    def read_sysfs(self):
+        """
+        Возвращает пары (интерфейс, кортеж_из_8_счетчиков) из /sys/class/net/*/statistics
+        """
+        net_root = os.path.join(self.sys_root, 'class', 'net')
+        try:
+            names = os.listdir(net_root)
+        except OSError:
+            return
+        for name in names:
+            values = []
+            try:
+                for counter in NET_COUNTERS:
+                    with open(os.path.join(net_root, name, 'statistics', counter), 'rb') as f:
+                        values.append(int(f.read()))
+            except (OSError, ValueError):
+                continue  # Интерфейс удален во время чтения
+            yield name, tuple(values)
+
+    def sample(self):
+        """
+        Делает снимок счетчиков всех интерфейсов
+        Возвращает True, если доступны значения за интервал (сделано не меньше двух снимков)
+        """
+        now = time.monotonic()
+        raw, counters = self.raw, self.counters
+        deltas = {}
+        seen = set()
+        from_proc = self.source == 'proc'
+        for name, line in (self.read_proc() if from_proc else self.read_sysfs()):
+            seen.add(name)
+            if raw.get(name) == line:
+                continue  # Счетчики не менялись - разница нулевая
+            if from_proc:
+                parts = line.split()
+                if len(parts) < 16:
+                    continue
+                values = [int(parts[column]) for column in NET_DEV_COLUMNS]
+            else:
+                values = line
+            raw[name] = line
+            current = counters.get(name)
+            if current is None:
+                # Новый интерфейс: первая разница появится в следующем снимке
+                counters[name] = array('Q', values)
+                continue
+            # Если счетчик уменьшился (интерфейс пересоздан с тем же именем), считаем разницу нулевой
+            deltas[name] = [value - old if value >= old else 0 for value, old in zip(values, current)]
+            for index, value in enumerate(values):
+                current[index] = value
+
+        # Исчезнувшие интерфейсы удаляем, чтобы память не росла при смене контейнеров
+        if len(seen) != len(counters):
+            for name in counters.keys() - seen:
+                del counters[name]
+                raw.pop(name, None)
+        self.deltas = deltas
+
+        ready = self.sample_time is not None
+        self.elapsed = now - self.sample_time if ready else 0.0
+        self.sample_time = now
+        return ready
+
+    def interface_rates(self, name):
+        """
+        Возвращает скорости интерфейса за последний интервал:
+        (прием_байт_с, передача_байт_с, прием_пакетов_с, передача_пакетов_с, ошибок_с, отброшено_с)
+        или None, если интерфейса нет
+        """
+        if name not in self.counters or self.elapsed <= 0:
+            return None
+        deltas = self.deltas.get(name)
+        if deltas is None:
+            return 0.0, 0.0, 0.0, 0.0, 0.0, 0.0
+        elapsed = self.elapsed
+        return (deltas[0] / elapsed, deltas[4] / elapsed, deltas[1] / elapsed, deltas[5] / elapsed,
+                (deltas[2] + deltas[6]) / elapsed, (deltas[3] + deltas[7]) / elapsed)
+
+    def rates(self, active_only=False):
+        """
+        Возвращает список (интерфейс, прием_байт_с, передача_байт_с, прием_пакетов_с,
+        передача_пакетов_с, ошибок_с, отброшено_с); active_only оставляет только интерфейсы с трафиком
+        """
+        result = []
+        # Для active_only достаточно обойти изменившиеся интерфейсы, а не все
+        for name in (self.deltas if active_only else self.counters):
+            rates = self.interface_rates(name)
+            if rates is None or (active_only and not any(rates)):
+                continue
+            result.append((name, *rates))
+        return result
+
+    def close(self):
+        if self.reader:
+            self.reader.close()
+
+
+def benchmark_net_sampler(interface_count=5000, iterations=20):
+    """
+    Измеряет стоимость одного снимка /proc/net/dev с interface_count интерфейсами
+    Возвращает кортеж: (мс_если_все_простаивают, мс_если_все_изменились, допустимая_частота_при_1%_ядра_Гц)
+    Частота считается по худшему случаю, когда изменились счетчики всех интерфейсов
+    """
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as root:
+        os.makedirs(os.path.join(root, 'net'))
+        with open(os.path.join(root, 'net', 'dev'), 'w') as f:
+            f.write("Inter-|   Receive                                                |  Transmit\n"
+                    " face |bytes    packets errs drop fifo frame compressed multicast"
+                    "|bytes    packets errs drop fifo colls carrier compressed\n")
+            for index in range(interface_count):
+                f.write(f"veth{index:05d}: {index * 1000} {index} 0 0 0 0 0 0 {index * 2000} {index * 2}"
+                        f" 0 0 0 0 0 0\n")
+        sampler = NetDevSampler(root)
+        try:
+            sampler.sample()
+            sampler.sample()
+            timings = []
+            for forget in (False, True):
+                started = time.perf_counter()
+                for _ in range(iterations):
+                    if forget:
+                        # Забытые строки разбираются заново, как если бы изменились все интерфейсы
+                        sampler.raw.clear()
+                    sampler.sample()
+                    sampler.rates(active_only=True)
+                timings.append((time.perf_counter() - started) / iterations)
+        finally:
+            sampler.close()
+    idle, busy = timings
+    return idle * 1000, busy * 1000, 0.01 / busy
+
+
+# Лимит памяти cgroup v1, начиная с которого считается, что лимита нет
+# (ядро записывает "без ограничения" как 9223372036854771712)
+CGROUP_V1_UNLIMITED = 1 << 62
+# Ресурсы, для которых читается давление (PSI)
+PSI_RESOURCES = ('cpu', 'memory', 'io')
+
+
+def parse_cgroup_membership(text):
+    """
+    Разбирает /proc/self/cgroup (строки "номер:контроллеры:путь")
+    Возвращает словарь: контроллер -> путь; для cgroup v2 ключ - пустая строка
+    """
+    membership = {}
+    for line in text.splitlines():
+        parts = line.split(':', 2)
+        if len(parts) != 3:
+            continue
+        for controller in parts[1].split(',') if parts[1] else ['']:
+            membership[controller] = parts[2]
+    return membership
+
+
+def parse_cgroup_mounts(mountinfo_text):
+    """
+    Находит в /proc/self/mountinfo точки монтирования cgroup
+    Возвращает список кортежей: (точка_монтирования, корень_внутри_ФС, тип_ФС, набор_контроллеров)
+    """
+    mounts = []
+    for line in mountinfo_text.splitlines():
+        # Поля до " - " - сведения о монтировании, после - тип ФС, источник и параметры суперблока
+        head, separator, tail = line.partition(' - ')
+        fields, fs_fields = head.split(), tail.split()
+        if not separator or len(fields) < 5 or len(fs_fields) < 3:
+            continue
+        if fs_fields[0] not in ('cgroup', 'cgroup2'):
+            continue
+        mounts.append((fields[4], fields[3], fs_fields[0], set(fs_fields[2].split(','))))
+    return mounts
+
+
+def parse_flat_keyed(text):
+    """
+    Разбирает файлы вида "ключ значение" (cpu.stat, memory.stat) в словарь целых чисел
+    """
+    values = {}
+    for line in text.splitlines():
+        key, _, value = line.partition(' ')
+        if value.isdigit():
+            values[key] = int(value)
+    return values
+
+
+def parse_pressure(text):
+    """
+    Разбирает файл давления PSI (строки "some avg10=... avg60=... avg300=... total=...")
+    Возвращает кортеж: (some_avg10, some_avg60, some_avg300, full_avg10, full_avg60, full_avg300);
+    значения full равны None, если ядро их не сообщает (cpu до версии 5.13)
+    """
+    values = {'some': (None, None, None), 'full': (None, None, None)}
+    for line in text.splitlines():
+        kind, _, fields = line.partition(' ')
+        averages = dict(field.split('=', 1) for field in fields.split())
+        values[kind] = (float(averages['avg10']), float(averages['avg60']), float(averages['avg300']))
+    return values['some'] + values['full']
+
+
+class CgroupLimits:
+    """
+    Лимиты и потребление памяти и CPU для cgroup текущего процесса (v1 и v2) и давление (PSI)
+    Расположение файлов определяется один раз по /proc/self/cgroup и /proc/self/mountinfo,
+    после чего все нужные файлы держатся открытыми (ProcFileReader), так что каждый
+    следующий снимок - это несколько preadv без разбора путей
+    Эффективный лимит учитывает все родительские cgroup: действует самый строгий
+    """
+
+    def __init__(self, proc_root=None, sys_root=None):
+        self.proc_root = proc_root or PROC_ROOT
+        self.sys_root = sys_root or SYS_ROOT
+        self.version = None  # 1 или 2; None, если cgroup не найдены
+        self.readers = []  # Все открытые файлы, чтобы закрыть их в close()
+        self.memory_max = []  # v2: memory.max текущей и всех родительских cgroup
+        self.memory_current = None  # v2: memory.current, v1: memory.usage_in_bytes
+        self.memory_stat = None  # memory.stat (v1 содержит и иерархический лимит)
+        self.cpu_max = []  # v2: cpu.max по цепочке; v1: пары (cpu.cfs_quota_us, cpu.cfs_period_us)
+        self.cpu_stat = None  # cpu.stat: периоды и троттлинг (v2 - еще и потребление)
+        self.cpu_usage = None  # v1: cpuacct.usage (наносекунды)
+        self.pressure_files = {}  # ресурс -> файл давления (cgroup v2 или /proc/pressure)
+        self.discover()
+
+        # Значения последнего снимка
+        self.memory_limit = None  # Эффективный лимит памяти в байтах (None - без лимита)
+        self.memory_usage = None  # Потребление памяти в байтах
+        self.working_set = None  # Потребление без неактивного файлового кэша (его ядро вытеснит первым)
+        self.cpu_limit = None  # Эффективный лимит в процессорах (например 1.5), None - без лимита
+        self.cpu_used = None  # Процессоров использовано за интервал между снимками
+        self.throttled_percent = None  # Доля периодов планировщика с троттлингом за интервал
+        self.pressure = {}  # ресурс -> кортеж parse_pressure
+        self.previous = None  # (время, потребление_мкс, периодов, периодов_с_троттлингом)
+
+    def open(self, *parts, buffer_size=4096):
+        """
+        Открывает файл для постоянного чтения; возвращает None, если его нет
+        """
+        try:
+            reader = ProcFileReader(os.path.join(*parts), buffer_size)
+        except OSError:
+            return None
+        self.readers.append(reader)
+        return reader
+
+    def sys_path(self, mount_point):
+        """
+        Переводит точку монтирования из mountinfo в путь внутри текущего корня /sys
+        """
+        if mount_point == '/sys' or mount_point.startswith('/sys/'):
+            return self.sys_root + mount_point[4:]
+        return mount_point
+
+    def cgroup_chain(self, mount_point, mount_root, path):
+        """
+        Возвращает каталоги cgroup процесса от собственного до точки монтирования
+        """
+        top = self.sys_path(mount_point)
+        # Путь в /proc/self/cgroup отсчитывается от корня иерархии, а не от корня монтирования
+        if mount_root != '/' and (path == mount_root or path.startswith(mount_root + '/')):
+            path = path[len(mount_root):]
+        directory = os.path.normpath(os.path.join(top, path.lstrip('/')))
+        if not os.path.isdir(directory):
+            # Контейнер без своего пространства имен cgroup видит путь хоста,
+            # но его собственная cgroup смонтирована в корень
+            directory = top
+        chain = [directory]
+        while directory != top and directory.startswith(top):
+            directory = os.path.dirname(directory)
+            chain.append(directory)
+        return chain
+
+    def discover(self):
+        """
+        Находит cgroup процесса и открывает файлы лимитов, потребления и давления
+        """
+        try:
+            with open(os.path.join(self.proc_root, 'self', 'cgroup'), 'r') as f:
+                membership = parse_cgroup_membership(f.read())
+            with open(os.path.join(self.proc_root, 'self', 'mountinfo'), 'r') as f:
+                mounts = parse_cgroup_mounts(f.read())
+        except OSError:
+            mounts, membership = [], {}
+
+        v1 = {}  # контроллер -> (точка_монтирования, корень)
+        v2 = None
+        for mount_point, mount_root, fs_type, options in mounts:
+            if fs_type == 'cgroup2':
+                v2 = (mount_point, mount_root)
+            else:
+                for controller in options & {'memory', 'cpu', 'cpuacct'}:
+                    v1[controller] = (mount_point, mount_root)
+
+        if 'memory' in v1 or 'cpu' in v1:
+            # Иерархия v1 (на гибридных системах v2 смонтирована рядом, но без контроллеров)
+            self.version = 1
+            if 'memory' in v1 and 'memory' in membership:
+                memory_dir = self.cgroup_chain(*v1['memory'], membership['memory'])[0]
+                self.memory_current = self.open(memory_dir, 'memory.usage_in_bytes', buffer_size=64)
+                # memory.stat содержит hierarchical_memory_limit - лимит с учетом родителей
+                self.memory_stat = self.open(memory_dir, 'memory.stat', buffer_size=8192)
+            if 'cpu' in v1 and 'cpu' in membership:
+                chain = self.cgroup_chain(*v1['cpu'], membership['cpu'])
+                for directory in chain:
+                    quota = self.open(directory, 'cpu.cfs_quota_us', buffer_size=64)
+                    period = self.open(directory, 'cpu.cfs_period_us', buffer_size=64)
+                    if quota and period:
+                        self.cpu_max.append((quota, period))
+                self.cpu_stat = self.open(chain[0], 'cpu.stat')
+            if 'cpuacct' in v1 and 'cpuacct' in membership:
+                self.cpu_usage = self.open(self.cgroup_chain(*v1['cpuacct'], membership['cpuacct'])[0],
+                                           'cpuacct.usage', buffer_size=64)
+        elif v2 is not None and '' in membership:
+            self.version = 2
+            chain = self.cgroup_chain(*v2, membership[''])
+            for directory in chain:
+                # В корневой cgroup файлов лимитов нет
+                memory_max = self.open(directory, 'memory.max', buffer_size=64)
+                if memory_max:
+                    self.memory_max.append(memory_max)
+                cpu_max = self.open(directory, 'cpu.max', buffer_size=64)
+                if cpu_max:
+                    self.cpu_max.append(cpu_max)
+            self.memory_current = self.open(chain[0], 'memory.current', buffer_size=64)
+            self.memory_stat = self.open(chain[0], 'memory.stat', buffer_size=8192)
+            self.cpu_stat = self.open(chain[0], 'cpu.stat')
+            # Давление внутри cgroup точнее общего по хосту
+            for resource in PSI_RESOURCES:
+                reader = self.open(chain[0], f'{resource}.pressure', buffer_size=256)
+                if reader:
+                    self.pressure_files[resource] = reader
+
+        for resource in PSI_RESOURCES:
+            if resource not in self.pressure_files:
+                reader = self.open(self.proc_root, 'pressure', resource, buffer_size=256)
+                if reader:
+                    self.pressure_files[resource] = reader
+
+    def read_memory(self):
+        """
+        Возвращает кортеж: (лимит_байт или None, потребление_байт, рабочий_набор_байт)
+        """
+        stat = parse_flat_keyed(self.memory_stat.text()) if self.memory_stat else {}
+        limit = None
+        if self.version == 2:
+            for reader in self.memory_max:
+                value = reader.text().strip()
+                if value != 'max':
+                    limit = int(value) if limit is None else min(limit, int(value))
+            inactive_file = stat.get('inactive_file', 0)
+        else:
+            limit = stat.get('hierarchical_memory_limit')
+            inactive_file = stat.get('total_inactive_file', 0)
+        if limit is not None and limit >= CGROUP_V1_UNLIMITED:
+            limit = None
+        usage = int(self.memory_current.text()) if self.memory_current else None
+        working_set = max(0, usage - inactive_file) if usage is not None else None
+        return limit, usage, working_set
+
+    def read_cpu(self):
+        """
+        Возвращает кортеж: (лимит_процессоров или None, потребление_мкс или None,
+        периодов_планировщика, периодов_с_троттлингом)
+        """
+        limit = None
+        for entry in self.cpu_max:
+            if self.version == 2:
+                quota, _, period = entry.text().partition(' ')
+            else:
+                quota, period = entry[0].text(), entry[1].text()
+            quota = quota.strip()
+            if quota == 'max' or quota.startswith('-'):
+                continue  # Без ограничения на этом уровне
+            cpus = int(quota) / int(period)
+            limit = cpus if limit is None else min(limit, cpus)
+
+        stat = parse_flat_keyed(self.cpu_stat.text()) if self.cpu_stat else {}
+        if self.version == 2:
+            usage = stat.get('usage_usec')
+        else:
+            usage = int(self.cpu_usage.text()) // 1000 if self.cpu_usage else None
+        return limit, usage, stat.get('nr_periods', 0), stat.get('nr_throttled', 0)
+
+    def sample(self):
+        """
+        Делает снимок лимитов, потребления и давления
+        Возвращает True, если доступны значения за интервал (сделано не меньше двух снимков)
+        """
+        now = time.monotonic()
+        if self.version is not None:
+            self.memory_limit, self.memory_usage, self.working_set = self.read_memory()
+            self.cpu_limit, usage, periods, throttled = self.read_cpu()
+        else:
+            usage, periods, throttled = None, 0, 0
+        self.pressure = {resource: parse_pressure(reader.text())
+                         for resource, reader in self.pressure_files.items()}
+
+        ready = self.previous is not None
+        if ready:
+            previous_time, previous_usage, previous_periods, previous_throttled = self.previous
+            elapsed = now - previous_time
+            if usage is not None and previous_usage is not None and elapsed > 0:
+                self.cpu_used = max(0, usage - previous_usage) / 1_000_000 / elapsed
+            delta_periods = periods - previous_periods
+            self.throttled_percent = ((throttled - previous_throttled) * 100 / delta_periods
+                                      if delta_periods > 0 else 0.0)
+        self.previous = (now, usage, periods, throttled)
+        return ready
+
+    def info(self):
+        """
+        Возвращает кортеж для отчета и снимка:
+        (лимит_памяти_МБ или None, рабочий_набор_МБ или None, лимит_процессоров или None, давление,
+         использовано_процессоров или None, доля_периодов_с_троттлингом_% или None)
+        давление - словарь: ресурс -> кортеж parse_pressure; значения за интервал появляются
+        со второго снимка
+        """
+        to_mb = lambda value: value // (1024 * 1024) if value is not None else None
+        return (to_mb(self.memory_limit), to_mb(self.working_set), self.cpu_limit, self.pressure,
+                self.cpu_used, self.throttled_percent)
+
+    def close(self):
+        for reader in self.readers:
+            reader.close()
+        self.readers = []
+
+
+def get_cgroup_info():
+    """
+    Получает лимиты cgroup текущего процесса и давление (PSI), см. CgroupLimits.info
+    Расположение файлов определяется при первом вызове, а сами файлы остаются открытыми,
+    поэтому следующие вызовы - только несколько preadv (подходит для опроса раз в секунду)
+    Возвращает None, если ни cgroup, ни файлов давления найти не удалось
+    """
+    global _cgroup_limits
+    try:
+        with _cgroup_limits_lock:
+            if _cgroup_limits is None:
+                _cgroup_limits = CgroupLimits()
+            limits = _cgroup_limits
+            if limits.version is None and not limits.pressure_files:
+                return None
+            limits.sample()
+            return limits.info()
+    except Exception as e:
+        # Если произошла ошибка при чтении или разборе, возвращаем None
+        return None
+
+
+def format_pressure(pressure):
+    """
+    Форматирует давление PSI: "cpu 2.12/0.00, memory 0.00/0.00" (some/full avg10, %)
+    """
+    parts = []
+    for resource, values in pressure.items():
+        full = f"{values[3]:.2f}" if values[3] is not None else "-"
+        parts.append(f"{resource} {values[0]:.2f}/{full}")
+    return ', '.join(parts)
+
+
+def benchmark_cgroup_limits(iterations=2000):
+    """
+    Измеряет стоимость одного снимка CgroupLimits на текущем хосте
+    Возвращает кортеж: (мкс_на_снимок, версия_cgroup)
+    """
+    limits = CgroupLimits()
+    try:
+        limits.sample()
+        started = time.perf_counter()
+        for _ in range(iterations):
+            limits.sample()
+        per_sample = (time.perf_counter() - started) / iterations
+    finally:
+        limits.close()
+    return per_sample * 1_000_000, limits.version
+
+
+# Каталоги процессоров и узлов NUMA внутри корня /sys
+CPU_SYS_PATH = ('devices', 'system', 'cpu')
+NODE_SYS_PATH = ('devices', 'system', 'node')
+# Поля meminfo узла NUMA (в КБ), которые перечитываются на каждом снимке
+NODE_MEMINFO_FIELDS = ('MemTotal', 'MemFree', 'MemUsed')
+# Суффиксы названий кэшей по типу: L1d, L1i, L2
+CACHE_TYPE_SUFFIXES = {'Data': 'd', 'Instruction': 'i', 'Unified': ''}
+
+
+def parse_cpu_list(text):
+    """
+    Разбирает список процессоров в формате ядра ("0-63,128-191") в список номеров
+    """
+    cpus = []
+    for part in text.strip().split(','):
+        if not part:
+            continue
+        first, _, last = part.partition('-')
+        cpus.extend(range(int(first), int(last or first) + 1))
+    return cpus
+
+
+def parse_cache_size(text):
+    """
+    Переводит размер кэша из /sys ("48K", "32M") в килобайты
+    """
+    text = text.strip()
+    if text.endswith('K'):
+        return int(text[:-1])
+    if text.endswith('M'):
+        return int(text[:-1]) * 1024
+    return int(text) // 1024
+
+
+def read_sys_text(*parts):
+    """
+    Читает небольшой файл /sys целиком; возвращает None, если его нет или он не читается
+    """
+    try:
+        with open(os.path.join(*parts), 'r') as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+class CpuTopology:
+    """
+    Топология процессоров и узлов NUMA по /sys/devices/system/cpu и /sys/devices/system/node
+    Неизменная часть (сокеты, ядра, потоки SMT, кэши, узлы NUMA и расстояния между ними)
+    читается один раз и хранится в массивах array по элементу на процессор
+    На каждом снимке перечитываются только изменчивые файлы - scaling_cur_freq каждого
+    процессора и meminfo каждого узла; они держатся открытыми (ProcFileReader)
+    Маска online тоже перечитывается на каждом снимке: если процессор включили или отключили,
+    топология читается заново
+    """
+
+    def __init__(self, sys_root=None):
+        self.cpu_root = os.path.join(sys_root or SYS_ROOT, *CPU_SYS_PATH)
+        self.node_root = os.path.join(sys_root or SYS_ROOT, *NODE_SYS_PATH)
+        self.readers = []  # Все открытые файлы, чтобы закрыть их в close()
+        self.discover()
+
+    def open(self, *parts, buffer_size=64):
+        """
+        Открывает файл для постоянного чтения; возвращает None, если его нет
+        """
+        try:
+            reader = ProcFileReader(os.path.join(*parts), buffer_size)
+        except OSError:
+            return None
+        self.readers.append(reader)
+        return reader
+
+    def discover(self):
+        """
+        Читает неизменную часть топологии и открывает изменчивые файлы
+        """
+        self.close()
+        self.online_reader = self.open(self.cpu_root, 'online', buffer_size=1024)
+        # Маска online в формате ядра (например "0-255") на момент чтения топологии
+        self.online = self.online_reader.text().strip() if self.online_reader else None
+        cpus = parse_cpu_list(self.online) if self.online else list(range(os.cpu_count() or 1))
+        position = {cpu: index for index, cpu in enumerate(cpus)}
+
+        # По элементу на процессор из маски online; -1 - значение неизвестно
+        self.cpus = array('I', cpus)
+        self.packages = array('i')  # physical_package_id (сокет)
+        self.core_ids = array('i')  # core_id внутри сокета
+        self.nodes = array('i', [-1]) * len(cpus)  # Узел NUMA
+        self.max_frequencies = array('I')  # cpuinfo_max_freq, кГц (0 - неизвестна)
+        self.frequencies = array('I', [0]) * len(cpus)  # scaling_cur_freq последнего снимка, кГц
+        self.frequency_readers = []
+        self.caches = {}  # Название (L1d, L2, ...) -> [размер_КБ, экземпляров]
+        seen_caches = set()  # (индекс, shared_cpu_list) уже учтенных кэшей
+
+        for cpu in cpus:
+            directory = os.path.join(self.cpu_root, f'cpu{cpu}')
+            package = read_sys_text(directory, 'topology', 'physical_package_id')
+            core = read_sys_text(directory, 'topology', 'core_id')
+            self.packages.append(int(package) if package else -1)
+            self.core_ids.append(int(core) if core else -1)
+            maximum = read_sys_text(directory, 'cpufreq', 'cpuinfo_max_freq')
+            self.max_frequencies.append(int(maximum) if maximum else 0)
+            self.frequency_readers.append(self.open(directory, 'cpufreq', 'scaling_cur_freq'))
+
+            # Кэш, общий для нескольких процессоров, учитывается один раз: у всех его процессоров
+            # одинаковые индекс и shared_cpu_list, и остальные файлы читать уже не нужно
+            cache_root = os.path.join(directory, 'cache')
+            try:
+                indexes = [name for name in os.listdir(cache_root) if name.startswith('index')]
+            except OSError:
+                indexes = []
+            for index in indexes:
+                shared = read_sys_text(cache_root, index, 'shared_cpu_list')
+                if (index, shared) in seen_caches:
+                    continue
+                seen_caches.add((index, shared))
+                level, kind, size = (read_sys_text(cache_root, index, name) for name in ('level', 'type', 'size'))
+                if not level or not size:
+                    continue
+                name = f"L{level}{CACHE_TYPE_SUFFIXES.get(kind, '')}"
+                entry = self.caches.setdefault(name, [parse_cache_size(size), 0])
+                entry[1] += 1
+
+        # Узлы NUMA: процессоры каждого узла, расстояния и постоянно открытый meminfo
+        self.node_ids = array('I')
+        self.node_distances = []
+        self.node_readers = []
+        node_online = read_sys_text(self.node_root, 'online')
+        for node in parse_cpu_list(node_online) if node_online else []:
+            directory = os.path.join(self.node_root, f'node{node}')
+            self.node_ids.append(node)
+            for cpu in parse_cpu_list(read_sys_text(directory, 'cpulist') or ''):
+                if cpu in position:
+                    self.nodes[position[cpu]] = node
+            self.node_distances.append(tuple(map(int, (read_sys_text(directory, 'distance') or '').split())))
+            self.node_readers.append(self.open(directory, 'meminfo', buffer_size=4096))
+        # Значения NODE_MEMINFO_FIELDS каждого узла последнего снимка
+        self.node_memory = [None] * len(self.node_ids)
+
+        known_cores = {(package, core) for package, core in zip(self.packages, self.core_ids) if core >= 0}
+        self.core_count = len(known_cores) or len(cpus)  # Физических ядер
+        self.socket_count = len({package for package in self.packages if package >= 0}) or 1
+
+    def sample(self):
+        """
+        Перечитывает текущие частоты процессоров и память узлов NUMA
+        """
+        if self.online_reader and self.online_reader.text().strip() != self.online:
+            self.discover()  # Процессор включили или отключили
+        frequencies = self.frequencies
+        for index, reader in enumerate(self.frequency_readers):
+            if reader:
+                reader.read()
+                # int принимает bytes с переводом строки, декодировать буфер не нужно
+                frequencies[index] = int(reader.buffer[:reader.length])
+        for index, reader in enumerate(self.node_readers):
+            if reader is None:
+                continue
+            values = {}
+            for line in reader.text().splitlines():
+                # Формат строки: "Node 0 MemTotal:       131072 kB"
+                parts = line.split()
+                if len(parts) >= 4:
+                    values[parts[2].rstrip(':')] = int(parts[3])
+            self.node_memory[index] = tuple(values.get(field) for field in NODE_MEMINFO_FIELDS)
+
+    def info(self):
+        """
+        Возвращает словарь для отчета:
+        online - маска online, cpus/cores/sockets - число потоков, физических ядер и сокетов,
+        caches - название кэша -> (размер_КБ, экземпляров),
+        nodes - список (узел, процессоров, всего_МБ, свободно_МБ, расстояния до узлов),
+        frequency_mhz - (мин, средняя, макс) текущая частота или None, max_frequency_mhz,
+        а также массивы по процессорам: cpu_ids, packages, core_ids, cpu_nodes, frequencies_khz
+        """
+        current = [frequency for frequency in self.frequencies if frequency]
+        frequency = ((min(current) // 1000, sum(current) // len(current) // 1000, max(current) // 1000)
+                     if current else None)
+        nodes = []
+        for index, node in enumerate(self.node_ids):
+            memory = self.node_memory[index] or (None,) * len(NODE_MEMINFO_FIELDS)
+            total_kb, free_kb = memory[0], memory[1]
+            nodes.append((node, self.nodes.count(node), total_kb // 1024 if total_kb is not None else None,
+                          free_kb // 1024 if free_kb is not None else None, self.node_distances[index]))
+        return {
+            'online': self.online,
+            'cpus': len(self.cpus),
+            'cores': self.core_count,
+            'sockets': self.socket_count,
+            'caches': {name: tuple(entry) for name, entry in self.caches.items()},
+            'nodes': nodes,
+            'frequency_mhz': frequency,
+            'max_frequency_mhz': max(self.max_frequencies, default=0) // 1000 or None,
+            'cpu_ids': self.cpus,
+            'packages': self.packages,
+            'core_ids': self.core_ids,
+            'cpu_nodes': self.nodes,
+            'frequencies_khz': array('I', self.frequencies),  # Копия: массив перезаписывается на снимке
+        }
+
+    def close(self):
+        for reader in self.readers:
+            reader.close()
+        self.readers = []
+
+
+def get_topology_info():
+    """
+    Получает топологию процессоров и узлов NUMA, см. CpuTopology.info
+    Топология читается при первом вызове и хранится в модуле; следующие вызовы
+    перечитывают только частоты и память узлов
+    Возвращает None, если прочитать /sys не удалось
+    """
+    global _cpu_topology
+    try:
+        with _cpu_topology_lock:
+            if _cpu_topology is None:
+                _cpu_topology = CpuTopology()
+            _cpu_topology.sample()
+            return _cpu_topology.info()
+    except Exception as e:
+        # Если произошла ошибка при чтении или разборе, возвращаем None
+        return None
+
+
+def format_topology(topology):
+    """
+    Форматирует топологию для отчета: строки "Топология", "Кэши", "Частота" и по строке на узел NUMA
+    """
+    threads = topology['cpus'] // topology['cores'] if topology['cores'] else 1
+    lines = [f"Топология: сокетов {topology['sockets']}, ядер {topology['cores']},"
+             f" потоков {topology['cpus']} ({threads} на ядро), в сети {topology['online'] or '-'}"]
+    if topology['caches']:
+        lines.append("Кэши: " + ', '.join(f"{name} {size_kb} КБ x{count}"
+                                          for name, (size_kb, count) in sorted(topology['caches'].items())))
+    if topology['frequency_mhz']:
+        low, average, high = topology['frequency_mhz']
+        maximum = f" (наибольшая {topology['max_frequency_mhz']} МГц)" if topology['max_frequency_mhz'] else ""
+        lines.append(f"Частота: {low}-{high} МГц, в среднем {average} МГц{maximum}")
+    for node, cpu_count, total_mb, free_mb, distances in topology['nodes']:
+        memory = f", {free_mb} МБ свободно / всего {total_mb} МБ" if total_mb is not None else ""
+        lines.append(f"Узел NUMA {node}: процессоров {cpu_count}{memory},"
+                     f" расстояния {' '.join(map(str, distances)) or '-'}")
+    return lines
+
+
+def benchmark_topology(cpus=256, sockets=2, threads_per_core=2, iterations=200):
+    """
+    Измеряет чтение топологии искусственного двухсокетного хоста с cpus потоками
+    (см. fixtures.build_topology_fixture) и стоимость снимка изменчивой части
+    Возвращает кортеж: (мс_на_чтение_топологии, мкс_на_снимок, сокетов, ядер, узлов NUMA)
+    """
+    import random
+    import tempfile
+
+    import fixtures
+
+    with tempfile.TemporaryDirectory() as root:
+        fixtures.build_topology_fixture(root, cpus, sockets, threads_per_core, 64, random.Random(0))
+        started = time.perf_counter()
+        topology = CpuTopology(root)
+        discover_ms = (time.perf_counter() - started) * 1000
+        try:
+            topology.sample()
+            started = time.perf_counter()
+            for _ in range(iterations):
+                topology.sample()
+            sample_us = (time.perf_counter() - started) / iterations * 1_000_000
+        finally:
+            topology.close()
+    return discover_ms, sample_us, topology.socket_count, topology.core_count, len(topology.node_ids)
+
+
+def get_mounts_info(timeout=STATVFS_TIMEOUT, mount_table=None, pool=None):
     """
     Получает информацию о смонтированных файловых системах
     Читает /proc/mounts и использует statvfs для получения статистики использования
+    Возвращает список кортежей, см. stat_mount_table
+    Точки монтирования, не ответившие за timeout секунд, возвращаются
+    со значениями объема, равными None
+    Если передан mount_table (MountTableCache), таблица монтирования берется из кэша,
+    а если передан pool (StatvfsPool) - statvfs выполняется в его потоках
     """
     mounts = []  # Создаем пустой список для хранения информации о точках монтирования
 
     try:
+        if mount_table is not None:
+            # Кэш перечитывает таблицу только при ее изменении
+            return stat_mount_table(mount_table.entries(), timeout, pool=pool)
+
         # Читаем файл /proc/mounts который содержит информацию о всех смонтированных ФС
-        with open('/proc/mounts', 'r') as f:
-            # Читаем файл построчно
-            for line in f:
-                parts = line.split()  # Разбиваем строку по пробелам
-                if len(parts) >= 4:  # Проверяем, что строка содержит достаточно полей
-                    # Извлекаем информацию из полей: устройство, точка_монтирования, тип_ФС
-                    device, mount_point, fs_type = parts[0], parts[1], parts[2]
-
-                    # Пропускаем специальные файловые системы которые не представляют интереса
-                    special_fs = ['/proc', '/sys', '/dev', '/run', '/tmp']
-                    # Проверяем, начинается ли точка монтирования с любого из специальных префиксов
-                    if any(mount_point.startswith(fs) for fs in special_fs):
-                        continue  # Пропускаем эту файловую систему
-
-                    try:
-                        # Используем os.statvfs для получения статистики файловой системы
-                        # statvfs возвращает информацию о свободном/общем месте на ФС
-                        stat = os.statvfs(mount_point)
-                        # Вычисляем общий объем: количество блоков * размер блока
-                        total_bytes = stat.f_blocks * stat.f_frsize
-                        # Вычисляем свободный объем: количество свободных блоков * размер блока
-                        free_bytes = stat.f_bfree * stat.f_frsize
-
-                        # Конвертируем байты в гигабайты (деление на 1024^3)
-                        total_gb = total_bytes // (1024 * 1024 * 1024)
-                        free_gb = free_bytes // (1024 * 1024 * 1024)
-
-                        # Добавляем информацию о точке монтирования в список
-                        mounts.append((mount_point, fs_type, free_gb, total_gb))
-                    except:
-                        # Если не удалось получить статистику (нет прав доступа и т.д.), пропускаем
-                        continue
+        with open(proc_path('mounts'), 'r') as f:
+            # Разбор строк и statvfs выполняются в отдельной функции
+            mounts = parse_mounts_info(f.read(), timeout)
     except Exception as e:
         # Если произошла ошибка при чтении /proc/mounts, просто продолжаем
         pass
@@ -155,6 +1444,388 @@ def get_mounts_info():
     return mounts
 
 
+def parse_mounts_info(mounts_text, timeout=STATVFS_TIMEOUT, statvfs=None):
+    """
+    Разбирает содержимое /proc/mounts, уже прочитанное в строку,
+    и получает статистику использования каждой точки монтирования через statvfs
+    statvfs для всех точек выполняется параллельно, см. stat_mounts_parallel
+    """
+    return stat_mount_table(parse_mount_table(mounts_text), timeout, statvfs)
+
+
+def parse_mount_table(mounts_text):
+    """
+    Разбирает содержимое /proc/mounts и отбрасывает специальные файловые системы
+    Возвращает список кортежей (точка_монтирования, тип_ФС, устройство)
+    """
+    candidates = []  # Список кортежей (точка_монтирования, тип_ФС, устройство) для опроса
+
+    # Проходим по файлу построчно
+    for line in mounts_text.splitlines():
+        parts = line.split()  # Разбиваем строку по пробелам
+        if len(parts) >= 4:  # Проверяем, что строка содержит достаточно полей
+            # Извлекаем информацию из полей: устройство, точка_монтирования, тип_ФС
+            device, mount_point, fs_type = parts[0], parts[1], parts[2]
+
+            # Пропускаем специальные файловые системы которые не представляют интереса
+            # startswith с кортежем проверяет все префиксы за один вызов
+            if mount_point.startswith(SPECIAL_FS_PREFIXES):
+                continue  # Пропускаем эту файловую систему
+
+            candidates.append((mount_point, fs_type, device))
+
+    return candidates
+
+
+def stat_mount_table(candidates, timeout=STATVFS_TIMEOUT, statvfs=None, pool=None):
+    """
+    Получает статистику использования для списка (точка_монтирования, тип_ФС, устройство)
+    Возвращает список кортежей (точка_монтирования, тип_ФС, свободно_ГБ, всего_ГБ, свободно_байт, всего_байт):
+    целые гигабайты для отчета и точные байты statvfs для экспорта метрик (см. metrics.py)
+    pool - необязательный StatvfsPool, потоки которого переиспользуются между вызовами
+    """
+    # Опрашиваем все точки монтирования одновременно
+    stats = stat_mounts_parallel([entry[0] for entry in candidates],
+                                 timeout, statvfs=statvfs, pool=pool)
+
+    mounts = []  # Создаем пустой список для хранения информации о точках монтирования
+    for (mount_point, fs_type, device), stat in zip(candidates, stats):
+        if stat is None:
+            # Если не удалось получить статистику (нет прав доступа и т.д.), пропускаем
+            continue
+        if stat is TIMED_OUT:
+            # Точка монтирования не ответила вовремя - сообщаем об этом, а не пропускаем
+            mounts.append((mount_point, fs_type, None, None, None, None))
+            continue
+
+        # Вычисляем общий объем: количество блоков * размер блока
+        total_bytes = stat.f_blocks * stat.f_frsize
+        # Вычисляем свободный объем: количество свободных блоков * размер блока
+        free_bytes = stat.f_bfree * stat.f_frsize
+
+        # Конвертируем байты в гигабайты (деление на 1024^3)
+        total_gb = total_bytes // (1024 * 1024 * 1024)
+        free_gb = free_bytes // (1024 * 1024 * 1024)
+
+        # Добавляем информацию о точке монтирования в список
+        mounts.append((mount_point, fs_type, free_gb, total_gb, free_bytes, total_bytes))
+
+    # Возвращаем список с информацией о всех точках монтирования
+    return mounts
+
+
+def stat_mounts_parallel(mount_points, timeout=STATVFS_TIMEOUT, max_workers=STATVFS_WORKERS,
+                         statvfs=None, pool=None):
+    """
+    Выполняет statvfs для списка точек монтирования в пуле потоков
+    Для каждой точки отсчитывается свой срок timeout с момента начала ее опроса,
+    поэтому одна зависшая точка не задерживает остальные
+    Возвращает список той же длины: результат statvfs, None при ошибке
+    или TIMED_OUT, если точка не ответила вовремя
+    Если передан pool (StatvfsPool), используются его потоки, иначе пул создается
+    на один вызов (режим наблюдения держит свой пул, чтобы не запускать потоки на каждом такте)
+    """
+    if pool is not None:
+        return pool.stat(mount_points, timeout, statvfs)
+    pool = StatvfsPool(max_workers)
+    try:
+        return pool.stat(mount_points, timeout, statvfs)
+    finally:
+        pool.close()
+
+
+class StatvfsPool:
+    """
+    Постоянный пул потоков для statvfs: потоки запускаются при первом опросе
+    и ждут следующих, поэтому повторные опросы не создают новых потоков
+    Поток, чей statvfs не ответил за отведенное время, считается зависшим: вместо него
+    запускается новый, а зависший завершается, когда statvfs все-таки вернется
+    Потоки - демоны: зависший в ядре statvfs не помешает завершению программы
+    """
+
+    def __init__(self, max_workers=STATVFS_WORKERS):
+        self.max_workers = max_workers
+        self.condition = threading.Condition()
+        self.tasks = deque()  # Очередь (опрос, индекс_точки)
+        self.workers = 0  # Сколько потоков запущено и еще не завершилось
+        self.idle = 0  # Сколько потоков ждут задач
+        self.stuck = 0  # Сколько потоков выполняют statvfs, срок которого уже истек
+        self.started_workers = 0  # Сколько потоков запущено за все время
+        self.closed = False
+
+    def stat(self, mount_points, timeout=STATVFS_TIMEOUT, statvfs=None):
+        """
+        Выполняет statvfs для списка точек монтирования, см. stat_mounts_parallel
+        """
+        # os.statvfs берется в момент вызова, а не при определении функции,
+        # чтобы подмена профилировщиком (см. profiling.Profiler) учитывала эти вызовы
+        if statvfs is None:
+            statvfs = os.statvfs
+        count = len(mount_points)
+        # Состояние одного опроса: список точек, функция, результаты, моменты начала
+        # опроса каждой точки (monotonic) и признаки окончательного ответа
+        request = (mount_points, statvfs, [None] * count, [None] * count, [False] * count)
+        results, started, done = request[2], request[3], request[4]
+        condition = self.condition
+        with condition:
+            self.tasks.extend((request, index) for index in range(count))
+            self.start_workers()
+            condition.notify_all()
+            while not all(done):
+                now = time.monotonic()
+                nearest_deadline = None
+                for index in range(count):
+                    if done[index] or started[index] is None:
+                        continue
+                    deadline = started[index] + timeout
+                    if deadline <= now:
+                        # Точка не ответила вовремя: помечаем ее, а поток считаем зависшим
+                        # и запускаем ему замену, чтобы оставшиеся точки не ждали в очереди
+                        results[index] = TIMED_OUT
+                        done[index] = True
+                        self.stuck += 1
+                        self.start_workers()
+                    elif nearest_deadline is None or deadline < nearest_deadline:
+                        nearest_deadline = deadline
+                if all(done):
+                    break
+                # Спим до ближайшего срока или до ответа одного из потоков
+                condition.wait(nearest_deadline - now if nearest_deadline is not None else timeout)
+        return results
+
+    def start_workers(self):
+        """
+        Запускает недостающие потоки для задач в очереди (вызывается под self.condition)
+        """
+        while self.idle < len(self.tasks) and self.workers - self.stuck < self.max_workers:
+            self.workers += 1
+            self.idle += 1
+            self.started_workers += 1
+            threading.Thread(target=self.worker, name='statvfs', daemon=True).start()
+
+    def worker(self):
+        condition = self.condition
+        while True:
+            with condition:
+                # Ждем задачу; лишние потоки (после возврата зависших) и потоки закрытого пула завершаются
+                while not self.tasks and not self.closed:
+                    condition.wait()
+                if self.closed or self.workers - self.stuck > self.max_workers:
+                    self.idle -= 1
+                    self.workers -= 1
+                    return
+                request, index = self.tasks.popleft()
+                self.idle -= 1
+                request[3][index] = time.monotonic()
+            mount_points, statvfs, results, started, done = request
+            mount_point = mount_points[index]
+
+            with _hung_mounts_lock:
+                # Если прошлый statvfs этой точки еще не вернулся, сразу считаем ее зависшей
+                hung = mount_point in _hung_mounts
+                if not hung:
+                    _hung_mounts.add(mount_point)
+            if hung:
+                result = TIMED_OUT
+            else:
+                try:
+                    result = statvfs(mount_point)
+                except Exception:
+                    result = None  # Нет прав доступа, точка исчезла и т.д.
+                with _hung_mounts_lock:
+                    _hung_mounts.discard(mount_point)
+
+            with condition:
+                if done[index]:
+                    # Ответ пришел после истечения срока: не учитываем его, поток больше не зависший
+                    self.stuck -= 1
+                else:
+                    results[index] = result
+                    done[index] = True
+                self.idle += 1
+                condition.notify_all()
+
+    def close(self):
+        """
+        Завершает ожидающие потоки; зависшие завершатся, когда их statvfs вернется
+        """
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+
+def benchmark_mounts_statvfs(mount_count=20, delay=0.05, timeout=0.5):
+    """
+    Сравнивает последовательный и параллельный statvfs на искусственно медленных
+    точках монтирования: каждая отвечает через delay секунд, а одна не отвечает вовсе
+    Возвращает кортеж: (секунд_последовательно, секунд_параллельно,
+                        секунд_параллельно_с_зависшей_точкой, число_таймаутов)
+    Последовательный вариант измеряется без зависшей точки, иначе он бы не завершился
+    """
+    hang = threading.Event()  # Никогда не устанавливается - имитирует зависший NFS
+    healthy = [f"/bench/slow{index}" for index in range(mount_count)]
+
+    def slow_statvfs(mount_point):
+        if mount_point == '/bench/hung':
+            hang.wait()
+        time.sleep(delay)
+        return os.statvfs('/')
+
+    started = time.perf_counter()
+    for mount_point in healthy:
+        slow_statvfs(mount_point)
+    sequential = time.perf_counter() - started
+
+    started = time.perf_counter()
+    stat_mounts_parallel(healthy, timeout, max_workers=mount_count, statvfs=slow_statvfs)
+    parallel = time.perf_counter() - started
+
+    started = time.perf_counter()
+    results = stat_mounts_parallel(healthy + ['/bench/hung'], timeout,
+                                   max_workers=mount_count + 1, statvfs=slow_statvfs)
+    parallel_with_hung = time.perf_counter() - started
+
+    return sequential, parallel, parallel_with_hung, sum(result is TIMED_OUT for result in results)
+
+
+# Используемые поля строки /proc/diskstats после major, minor и имени устройства:
+# reads, reads_merged, sectors_read, ms_reading, writes, writes_merged, sectors_written,
+# ms_writing, ios_in_progress, ms_doing_io, weighted_ms
+DISKSTATS_FIELDS = 11
+# Размер сектора в /proc/diskstats всегда 512 байт, независимо от устройства
+DISKSTATS_SECTOR_SIZE = 512
+
+
+class DiskStatsSampler:
+    """
+    Нагрузка на блочные устройства по данным /proc/diskstats
+    Для каждого устройства хранятся два массива array('Q') со счетчиками - текущий
+    и предыдущий снимок; при новом снимке они меняются местами, поэтому
+    на каждом такте новые массивы не создаются
+    """
+
+    def __init__(self, proc_root=None):
+        self.reader = ProcFileReader(os.path.join(proc_root or PROC_ROOT, 'diskstats'), 16384)
+        self.counters = {}  # имя_устройства -> [текущие_счетчики, предыдущие_счетчики]
+        self.sample_time = None  # Время последнего снимка (monotonic)
+        self.elapsed = 0.0  # Секунд между двумя последними снимками
+        self.seen = set()  # Устройства, найденные в последнем снимке
+        self.device_names = {}  # Путь из /proc/mounts -> имя в /proc/diskstats (только текущие монтирования)
+
+    def sample(self):
+        """
+        Делает снимок счетчиков всех устройств
+        Возвращает True, если доступны значения за интервал (сделано не меньше двух снимков)
+        """
+        now = time.monotonic()
+        text = self.reader.text()
+        seen = set()
+        counters = self.counters
+        for line in text.splitlines():
+            parts = line.split()
+            if len(parts) < 3 + DISKSTATS_FIELDS:
+                continue
+            name = parts[2]
+            pair = counters.get(name)
+            if pair is None:
+                # Новое устройство: оба снимка совпадают, разница будет нулевой
+                pair = counters[name] = [array('Q', bytes(8 * DISKSTATS_FIELDS)),
+                                         array('Q', bytes(8 * DISKSTATS_FIELDS))]
+                fresh = True
+            else:
+                # Текущий снимок становится предыдущим, старый массив переиспользуем
+                pair[0], pair[1] = pair[1], pair[0]
+                fresh = False
+            current = pair[0]
+            for field in range(DISKSTATS_FIELDS):
+                current[field] = int(parts[3 + field])
+            if fresh:
+                pair[1][:] = current
+            seen.add(name)
+
+        # Исчезнувшие устройства (отключенные диски) удаляем
+        for name in counters.keys() - seen:
+            del counters[name]
+        self.seen = seen
+
+        ready = self.sample_time is not None
+        self.elapsed = now - self.sample_time if ready else 0.0
+        self.sample_time = now
+        return ready
+
+    def device_rates(self, name):
+        """
+        Возвращает нагрузку устройства за последний интервал:
+        (операций_в_секунду, байт_в_секунду, среднее_ожидание_мс, загрузка_%) или None
+        """
+        pair = self.counters.get(name)
+        if pair is None or self.elapsed <= 0:
+            return None
+        current, previous = pair
+        reads = current[0] - previous[0]
+        writes = current[4] - previous[4]
+        sectors = current[2] - previous[2] + current[6] - previous[6]
+        io_ms = current[3] - previous[3] + current[7] - previous[7]  # Время выполнения запросов
+        busy_ms = current[9] - previous[9]  # Время, когда у устройства были запросы
+        operations = reads + writes
+        return (operations / self.elapsed,
+                sectors * DISKSTATS_SECTOR_SIZE / self.elapsed,
+                io_ms / operations if operations else 0.0,
+                min(100.0, busy_ms / (self.elapsed * 1000) * 100))
+
+    def rates(self):
+        """
+        Возвращает список (устройство, операций_в_с, байт_в_с, ожидание_мс, загрузка_%)
+        для всех устройств
+        """
+        result = []
+        for name in self.counters:
+            rates = self.device_rates(name)
+            if rates is not None:
+                result.append((name, *rates))
+        return result
+
+    def by_mount(self, mount_entries):
+        """
+        Сопоставляет устройства точкам монтирования
+        mount_entries - список (точка_монтирования, тип_ФС, устройство), как из parse_mount_table
+        Возвращает список (точка_монтирования, устройство, операций_в_с, байт_в_с, ожидание_мс, загрузка_%)
+        """
+        result = []
+        # Кэш имен строится заново по текущей таблице: устройства отмонтированных ФС
+        # в нем не накапливаются
+        previous_names = self.device_names
+        names = {}
+        for mount_point, fs_type, device in mount_entries:
+            if device in previous_names:
+                name = names[device] = previous_names[device]
+            elif device in names:
+                name = names[device]
+            else:
+                name = names[device] = block_device_name(device)
+            rates = self.device_rates(name) if name else None
+            if rates is not None:
+                result.append((mount_point, name, *rates))
+        self.device_names = names
+        return result
+
+    def close(self):
+        self.reader.close()
+
+
+def block_device_name(device):
+    """
+    Переводит устройство из /proc/mounts в имя из /proc/diskstats:
+    /dev/sda1 -> sda1, /dev/mapper/vg-root -> dm-0 (по символической ссылке)
+    Для псевдоустройств (tmpfs, overlay и т.д.) возвращает None
+    Результаты кэширует DiskStatsSampler.by_mount для текущей таблицы монтирования
+    """
+    if not device.startswith('/dev/'):
+        return None
+    # realpath раскрывает ссылки /dev/mapper/*, /dev/disk/by-uuid/* и т.д.
+    return os.path.basename(os.path.realpath(device))
+
+
 def get_user_and_host_info():
     """
     Получает информацию о текущем пользователе и имени хоста
@@ -168,9 +1839,8 @@ def get_user_and_host_info():
         user_name = "Неизвестно"
 
     try:
-        # Получаем имя хоста (компьютера)
-        # platform.node() возвращает сетевое имя хоста
-        host_name = platform.node()
+        # Получаем имя хоста (компьютера) из кэша сведений о хосте
+        host_name = get_host_facts()['hostname']
     except:
         # Если не удалось получить имя хоста, используем значение по умолчанию
         host_name = "Неизвестно"
@@ -179,64 +1849,957 @@ def get_user_and_host_info():
     return user_name, host_name
 
 
-def main():
+class ProcFileReader:
+    """
+    Держит файл из /proc постоянно открытым и перечитывает его с нулевого смещения
+    через os.preadv в заранее выделенный буфер, без повторного открытия файла
+    """
+
+    def __init__(self, path, buffer_size=4096):
+        self.path = path  # Путь к файлу (например, /proc/meminfo)
+        # Открываем файл один раз на все время работы
+        self.fd = os.open(path, os.O_RDONLY)
+        # Буфер выделяется один раз и переиспользуется на каждом такте
+        self.buffer = bytearray(buffer_size)
+        self.length = 0  # Количество байт, прочитанных в последний раз
+
+    def read(self):
+        """
+        Перечитывает файл в буфер и возвращает количество прочитанных байт
+        """
+        while True:
+            # preadv читает с нулевого смещения прямо в наш буфер, не создавая новых объектов bytes
+            self.length = os.preadv(self.fd, [self.buffer], 0)
+            # Если файл поместился в буфер целиком, чтение закончено
+            if self.length < len(self.buffer):
+                return self.length
+            # Иначе файл вырос (например, добавились точки монтирования) - удваиваем буфер один раз
+            self.buffer = bytearray(len(self.buffer) * 2)
+
+    def text(self):
+        """
+        Перечитывает файл и возвращает его содержимое в виде строки
+        """
+        self.read()
+        # Декодируем только заполненную часть буфера
+        return self.buffer[:self.length].decode('utf-8', 'replace')
+
+    def close(self):
+        """
+        Закрывает файловый дескриптор
+        """
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+class MountTableCache:
+    """
+    Кэш таблицы монтирования: /proc/self/mounts перечитывается и разбирается
+    только когда таблица действительно изменилась, в остальное время
+    возвращается готовый отфильтрованный список (точка_монтирования, тип_ФС, устройство)
+
+    Ядро сообщает об изменении таблицы событием POLLPRI (вместе с POLLERR)
+    на открытом файле mounts, поэтому проверка стоит один вызов poll с нулевым таймаутом
+    Обычные файлы (подставной proc_root с тестовыми данными) таких событий не дают,
+    для них изменение определяется по времени модификации и размеру файла
+    """
+
+    def __init__(self, proc_root=None):
+        # Постоянно открытый файл таблицы монтирования
+        self.reader = ProcFileReader(os.path.join(proc_root or PROC_ROOT, 'self', 'mounts'), 16384)
+        # Файлы /proc имеют нулевой размер, у тестовых файлов он ненулевой
+        self.pollable = os.fstat(self.reader.fd).st_size == 0
+        if self.pollable:
+            # Подписываемся на событие изменения таблицы
+            self.poller = select.poll()
+            self.poller.register(self.reader.fd, select.POLLPRI | select.POLLERR)
+        self.signature = None  # (mtime, размер) для обычных файлов
+        self.cached = None  # Отфильтрованный список (точка_монтирования, тип_ФС, устройство)
+        self.reloads = 0  # Сколько раз таблица разбиралась заново
+
+    def changed(self):
+        """
+        Проверяет, изменилась ли таблица монтирования с момента последнего разбора
+        """
+        if self.cached is None:
+            return True  # Таблица еще ни разу не читалась
+        if self.pollable:
+            # Нулевой таймаут: только проверяем наличие события, не ждем
+            return any(events & (select.POLLPRI | select.POLLERR)
+                       for fd, events in self.poller.poll(0))
+        stat = os.fstat(self.reader.fd)
+        return (stat.st_mtime_ns, stat.st_size) != self.signature
+
+    def entries(self):
+        """
+        Возвращает отфильтрованный список (точка_монтирования, тип_ФС, устройство),
+        перечитывая файл только если таблица изменилась
+        """
+        if self.changed():
+            if not self.pollable:
+                stat = os.fstat(self.reader.fd)
+                self.signature = (stat.st_mtime_ns, stat.st_size)
+            self.cached = parse_mount_table(self.reader.text())
+            self.reloads += 1
+        return self.cached
+
+    def close(self):
+        """
+        Закрывает файл таблицы монтирования
+        """
+        if self.pollable:
+            self.poller.unregister(self.reader.fd)
+            self.pollable = False
+        self.reader.close()
+
+
+class ProcessScanner:
+    """
+    Таблица процессов по данным /proc/[pid]
+
+    Каталог /proc открывается один раз, а файлы процессов открываются относительно
+    его дескриптора (os.open с dir_fd, как openat), поэтому путь не разбирается
+    ядром заново для каждого файла. При обходе всех процессов читается только
+    /proc/[pid]/stat (в нем есть и тики CPU, и RSS); statm и status дочитываются
+    только для процессов, попавших в топ
+    Топ-N выбирается кучей (heapq.nlargest), без полной сортировки
+    """
+
+    def __init__(self, proc_root=None):
+        # Дескриптор каталога /proc, относительно которого открываются файлы процессов
+        self.proc_fd = os.open(proc_root or PROC_ROOT, os.O_RDONLY | os.O_DIRECTORY)
+        self.page_kb = os.sysconf('SC_PAGE_SIZE') // 1024  # Размер страницы в КБ
+        self.clock_ticks = os.sysconf('SC_CLK_TCK')  # Тиков CPU в секунду
+        self.previous = {}  # pid -> (время_запуска, тики_CPU) с прошлого обхода
+        self.previous_time = None  # Момент прошлого обхода (monotonic)
+        self.processes = []  # Результат последнего обхода
+
+    def read_file(self, pid, name):
+        """
+        Читает /proc/[pid]/name относительно открытого каталога /proc
+        Возвращает строку или None, если процесс уже завершился
+        """
+        try:
+            fd = os.open(f"{pid}/{name}", os.O_RDONLY, dir_fd=self.proc_fd)
+        except OSError:
+            return None
+        try:
+            return os.read(fd, 8192).decode('utf-8', 'replace')
+        except OSError:
+            return None
+        finally:
+            os.close(fd)
+
+    def scan(self):
+        """
+        Обходит все процессы и возвращает список кортежей
+        (pid, имя, RSS_КБ, тики_CPU_с_прошлого_обхода, загрузка_CPU_%)
+        При первом обходе тики и проценты считаются нулевыми
+        """
+        now = time.monotonic()
+        elapsed = now - self.previous_time if self.previous_time is not None else 0
+        current = {}
+        processes = []
+
+        # scandir по дескриптору каталога не строит полных путей для записей
+        with os.scandir(self.proc_fd) as entries:
+            for entry in entries:
+                if not entry.name.isdigit():
+                    continue  # Не процесс (meminfo, self, sys и т.д.)
+                stat = self.read_file(entry.name, 'stat')
+                if not stat:
+                    continue  # Процесс завершился между scandir и чтением
+                # Имя процесса в скобках может содержать пробелы и скобки,
+                # поэтому поля после него отделяем по последней ")"
+                head, _, tail = stat.rpartition(')')
+                fields = tail.split()
+                if len(fields) < 22:
+                    continue
+                pid = int(entry.name)
+                name = head.partition('(')[2]
+                ticks = int(fields[11]) + int(fields[12])  # utime + stime
+                start_time = int(fields[19])  # Время запуска: отличает повторно выданный pid
+                rss_kb = int(fields[21]) * self.page_kb
+
+                current[pid] = (start_time, ticks)
+                previous = self.previous.get(pid)
+                delta = ticks - previous[1] if previous and previous[0] == start_time else 0
+                cpu_percent = delta / self.clock_ticks / elapsed * 100 if elapsed > 0 else 0.0
+                processes.append((pid, name, rss_kb, delta, cpu_percent))
+
+        self.previous = current
+        self.previous_time = now
+        self.processes = processes
+        return processes
+
+    def top_by_rss(self, count):
+        """
+        Возвращает count процессов с наибольшим RSS из последнего обхода
+        """
+        return heapq.nlargest(count, self.processes, key=lambda process: process[2])
+
+    def top_by_cpu(self, count):
+        """
+        Возвращает count процессов с наибольшим расходом CPU между двумя последними обходами
+        """
+        return heapq.nlargest(count, self.processes, key=lambda process: process[3])
+
+    def details(self, pid):
+        """
+        Дочитывает подробности процесса из statm и status
+        Возвращает словарь или None, если процесс уже завершился
+        """
+        statm = self.read_file(pid, 'statm')
+        status = self.read_file(pid, 'status')
+        if statm is None or status is None:
+            return None
+        size, resident, shared = (int(value) * self.page_kb for value in statm.split()[:3])
+        info = {'size_kb': size, 'resident_kb': resident, 'shared_kb': shared}
+        for line in status.splitlines():
+            key, _, value = line.partition(':')
+            if key in ('Name', 'State', 'Threads'):
+                info[key.lower()] = value.strip()
+            elif key == 'Uid':
+                info['uid'] = int(value.split()[0])  # Реальный UID
+        return info
+
+    def close(self):
+        """
+        Закрывает дескриптор каталога /proc
+        """
+        if self.proc_fd >= 0:
+            os.close(self.proc_fd)
+            self.proc_fd = -1
+
+
+def benchmark_process_scanner(count=10000, top=10):
+    """
+    Измеряет обход искусственного дерева /proc с count процессами
+    Возвращает кортеж: (мс_на_обход, мс_на_выбор_топа, найдено_процессов)
+    """
+    import tempfile
+
+    import fixtures
+
+    with tempfile.TemporaryDirectory() as root:
+        fixtures.build_process_fixture(root, count)
+        scanner = ProcessScanner(root)
+        try:
+            scanner.scan()  # Первый обход запоминает тики для расчета разницы
+            started = time.perf_counter()
+            processes = scanner.scan()
+            scan_ms = (time.perf_counter() - started) * 1000
+            started = time.perf_counter()
+            scanner.top_by_rss(top)
+            scanner.top_by_cpu(top)
+            top_ms = (time.perf_counter() - started) * 1000
+        finally:
+            scanner.close()
+    return scan_ms, top_ms, len(processes)
+
+
+def run_watch(interval, mount_timeout=STATVFS_TIMEOUT, output_format='text', top=0, disk_io=False,
+              network=False, profiler=None, alert_rules=None, history_directory=None):
+    """
+    Режим непрерывного наблюдения: раз в interval секунд перечитывает
+    /proc/meminfo и /proc/loadavg через постоянно открытые дескрипторы
+    (таблица монтирования перечитывается только при изменении, см. MountTableCache,
+    а statvfs повторяется при ее изменении или раз в WATCH_MOUNTS_INTERVAL секунд)
+    и выводит одну строку на такт вместе с затратами CPU самого сборщика на весь предыдущий
+    такт: сбор, снимок, хранилище, оповещения, история и вывод (затраты текущего такта
+    в его же строку не попадают - она выводится до конца такта); при выходе в stderr
+    выводятся средние затраты такта за весь сеанс
+    В машиночитаемых форматах (ndjson, binary) на каждый такт выводится один снимок
+    Если top > 0, после каждого такта выводятся top процессов с наибольшим расходом CPU
+    Если disk_io, после каждого такта выводится нагрузка на устройства каждой точки монтирования
+    Если network, после каждого такта выводится трафик сетевых интерфейсов, у которых он был
+    Если передан profiler (profiling.Profiler), время каждого шага такта учитывается в нем
+    Лимиты cgroup и давление (PSI) читаются на каждом такте; если лимиты строже,
+    они заменяют память хоста, и строка такта дополняется потреблением CPU внутри квоты
+    Все значения сохраняются в хранилище временных рядов фиксированного размера,
+    по которому в текстовом режиме выводятся скользящие средние и p95
+    Если переданы правила оповещений (alert_rules, см. alerts.parse_rules), они проверяются
+    на каждом такте; сработавшие и снятые оповещения выводятся сразу (в машиночитаемых
+    форматах - в stderr, чтобы не смешивать с данными)
+    Если задан history_directory, каждый снимок дописывается в историю на диске (см. history.py)
+    """
+    import snapshot
+    import timeseries
+
+    # Открываем все файлы один раз перед началом цикла
+    meminfo_reader = ProcFileReader(proc_path('meminfo'))
+    loadavg_reader = ProcFileReader(proc_path('loadavg'), 256)
+    mount_table = MountTableCache()
+    # Потоки statvfs создаются один раз на сеанс наблюдения, а не на каждом такте
+    statvfs_pool = StatvfsPool()
+    cpu_sampler = CpuStatSampler()
+    process_scanner = ProcessScanner() if top > 0 else None
+    disk_sampler = DiskStatsSampler() if disk_io else None
+    net_sampler = NetDevSampler() if network else None
+    cgroup_limits = CgroupLimits()
+    interval_ns = int(interval * 1_000_000_000)  # Интервал в наносекундах
+    # Сведения об ОС, хосте и процессоре не меняются между тактами - собираем их один раз
+    os_info = get_os_info()
+    user_host_info = get_user_and_host_info()
+    facts = get_host_facts()
+    processor_count, architecture = facts['cpu_count'], facts['architecture']
+    # Хранилище последних значений всех метрик с окнами в 60 и 300 тактов; размер ограничен
+    # бюджетом в байтах, ряды исчезнувших точек монтирования удаляются, а значения,
+    # не поместившиеся в бюджет, выводятся в stderr
+    store = timeseries.TimeSeriesStore(max_metrics=None, max_bytes=WATCH_STORE_BYTES)
+    reported_drops = 0
+    # Правила оповещений компилируются в план один раз, при первой проверке
+    alert_engine = None
+    if alert_rules:
+        import alerts
+        alert_engine = alerts.AlertEngine(alert_rules)
+    history_writer = None
+    if history_directory:
+        import history
+        history_writer = history.HistoryWriter(history_directory)
+
+    # Шаги такта; при профилировании каждый оборачивается один раз до начала цикла
+    read_memory = lambda: parse_memory_info(meminfo_reader.text())
+    read_load = lambda: parse_load_avg(loadavg_reader.text())
+    read_mounts = lambda entries: stat_mount_table(entries, mount_timeout, pool=statvfs_pool)
+    # Заполненность ФС опрашивается заново, только если изменилась таблица монтирования
+    # или прошло WATCH_MOUNTS_INTERVAL секунд (но не реже чем раз в такт)
+    mounts_refresh_ns = max(interval_ns, int(WATCH_MOUNTS_INTERVAL * 1_000_000_000))
+    mounts_info = None
+    mounts_reloads = None  # mount_table.reloads при последнем опросе
+    mounts_due = 0  # Такт (monotonic_ns), начиная с которого ФС опрашиваются снова
+    sample_cpu = cpu_sampler.sample
+    scan_processes = process_scanner.scan if process_scanner else None
+    sample_disks = disk_sampler.sample if disk_sampler else None
+    sample_net = net_sampler.sample if net_sampler else None
+    sample_cgroup = cgroup_limits.sample
+    check_alerts = alert_engine.evaluate if alert_engine else None
+    append_history = history_writer.append if history_writer else None
+    if profiler:
+        read_memory = profiler.wrap('memory', read_memory)
+        read_load = profiler.wrap('load', read_load)
+        read_mounts = profiler.wrap('mounts', read_mounts)
+        sample_cpu = profiler.wrap('cpu', sample_cpu)
+        scan_processes = scan_processes and profiler.wrap('processes', scan_processes)
+        sample_disks = sample_disks and profiler.wrap('disk_io', sample_disks)
+        sample_net = sample_net and profiler.wrap('net', sample_net)
+        sample_cgroup = profiler.wrap('cgroup', sample_cgroup)
+        check_alerts = check_alerts and profiler.wrap('alerts', check_alerts)
+        append_history = append_history and profiler.wrap('history', append_history)
+
+    tick_count = 0  # Сколько тактов выполнено
+    total_tick_cpu_ns = 0  # Затраты CPU на все такты
+    try:
+        # Время следующего такта считаем от монотонных часов, чтобы интервал не "уплывал"
+        next_tick = time.monotonic_ns()
+        tick_cpu_ns = None  # Затраты CPU на весь предыдущий такт
+        while True:
+            # Запоминаем процессорное время до начала сбора
+            cpu_start = time.process_time_ns()
+
+            # Перечитываем файлы в их буферы и разбираем содержимое
+            memory_info = read_memory()
+            load_avg = read_load()
+            mount_entries = mount_table.entries()
+            mounts_refreshed = mount_table.reloads != mounts_reloads or next_tick >= mounts_due
+            if mounts_refreshed:
+                mounts_info = read_mounts(mount_entries)
+                if mount_table.reloads != mounts_reloads:
+                    # Ряды отмонтированных точек больше не пополняются - освобождаем их место
+                    store.retain_disks(entry[0] for entry in mount_entries)
+                mounts_reloads = mount_table.reloads
+                mounts_due = next_tick + mounts_refresh_ns
+            cpu_ready = sample_cpu()
+            if scan_processes:
+                scan_processes()
+            disk_ready = sample_disks() if sample_disks else False
+            net_ready = sample_net() if sample_net else False
+            cgroup_ready = sample_cgroup()
+
+            # Снимок такта сохраняем в хранилище временных рядов
+            processor_info = (processor_count, architecture, load_avg)
+            cgroup_info = cgroup_limits.info()
+            sample = snapshot.linux_snapshot(os_info, user_host_info, processor_info, memory_info, mounts_info,
+                                             cgroup_info)
+            # Ряды дисков пополняются только новыми значениями statvfs
+            store.record(sample, disks=mounts_refreshed)
+            if store.dropped > reported_drops:
+                print(f"{time.strftime('%H:%M:%S')} хранилище временных рядов заполнено"
+                      f" ({store.used_bytes // (1024 * 1024)} МБ, {len(store.series)} метрик):"
+                      f" отброшено значений {store.dropped - reported_drops}",
+                      file=sys.stderr, flush=True)
+                reported_drops = store.dropped
+            if append_history:
+                append_history(sample)
+            if cpu_ready:
+                for name, value in zip(('cpu_user', 'cpu_system', 'cpu_iowait', 'cpu_steal'),
+                                       cpu_sampler.total()):
+                    store.append(name, value, sample.timestamp)
+            alert_events = ()
+            if check_alerts:
+                # Занятость каждого ядра (cpu_busy:<номер>) есть, начиная со второго снимка /proc/stat
+                metrics = alerts.metrics_from_snapshot(sample, cores=cpu_sampler.cores() if cpu_ready else None)
+                alert_events = check_alerts(metrics)
+
+            if output_format != 'text':
+                # Один снимок на такт в выбранном формате
+                snapshot.write_snapshot(sample, output_format)
+                for name, state, value, severity in alert_events:
+                    print(f"{time.strftime('%H:%M:%S')} {format_alert_event(name, state, value, severity)}",
+                          file=sys.stderr, flush=True)
+            else:
+                # Выводим одну строку на такт
+                if memory_info:
+                    # В снимке память уже ограничена лимитом cgroup, если он строже
+                    memory_text = f"{sample.mem_available_mb}/{sample.mem_total_mb} МБ"
+                    if sample.mem_total_mb != memory_info[0]:
+                        memory_text += " (cgroup)"
+                else:
+                    memory_text = "нет данных"
+                if cpu_ready:
+                    # Загрузка всей системы между двумя последними тактами
+                    user, system, iowait, steal = cpu_sampler.total()
+                    cpu_text = f"{user:.1f}/{system:.1f}/{iowait:.1f}/{steal:.1f}%"
+                else:
+                    cpu_text = "-"
+                # Скользящие среднее и p95 нагрузки за последние 60 тактов
+                load_summary = store.summary('load1', 60)
+                if load_summary:
+                    load_min, load_max, load_mean, load_p95 = load_summary
+                    load_text = f"{', '.join(load_avg)} (60 тактов: ср {load_mean:.2f}, p95 {load_p95:.2f})"
+                else:
+                    load_text = "нет данных"  # /proc/loadavg пуст или не прочитан
+                if tick_cpu_ns is not None:
+                    # Доля одного ядра при заданном интервале
+                    tick_text = f"{tick_cpu_ns // 1000} мкс CPU ({tick_cpu_ns * 100 / interval_ns:.3f}% ядра)"
+                else:
+                    tick_text = "-"
+                print(f"{time.strftime('%H:%M:%S')} память: {memory_text}"
+                      f" нагрузка: {load_text}"
+                      f" CPU usr/sys/io/steal: {cpu_text}"
+                      f" дисков: {len(mounts_info)}"
+                      f" прошлый такт: {tick_text}", flush=True)
+                for name, state, value, severity in alert_events:
+                    print(f"   {format_alert_event(name, state, value, severity)}")
+                if cgroup_ready and (sample.cpu_limit is not None or cgroup_limits.throttled_percent):
+                    # Потребление CPU внутри квоты cgroup и доля периодов с троттлингом
+                    used = f"{cgroup_limits.cpu_used:.2f}" if cgroup_limits.cpu_used is not None else "-"
+                    limit = f"{sample.cpu_limit:g}" if sample.cpu_limit is not None else "без квоты"
+                    print(f"   cgroup: CPU {used} из {limit}, троттлинг {cgroup_limits.throttled_percent:.1f}%"
+                          f" периодов, PSI: {format_pressure(cgroup_limits.pressure)}")
+                if process_scanner and cpu_ready:
+                    # Процессы с наибольшим расходом CPU за прошедший такт
+                    for pid, name, rss_kb, delta, cpu_percent in process_scanner.top_by_cpu(top):
+                        print(f"   {pid} {name} {cpu_percent:.1f}% CPU {rss_kb // 1024} МБ")
+                if disk_ready:
+                    # Нагрузка на устройства точек монтирования за прошедший такт
+                    for mount_point, device, iops, bytes_per_second, await_ms, utilization in \
+                            disk_sampler.by_mount(mount_entries):
+                        print(f"   {mount_point} ({device}): {iops:.0f} оп/с,"
+                              f" {bytes_per_second / (1024 * 1024):.2f} МБ/с,"
+                              f" ожидание {await_ms:.1f} мс, загрузка {utilization:.0f}%")
+                if net_ready:
+                    # Трафик интерфейсов за прошедший такт (интерфейсы без трафика пропускаем)
+                    for name, rx_bytes, tx_bytes, rx_packets, tx_packets, errors, dropped in \
+                            net_sampler.rates(active_only=True):
+                        print(f"   {name}: прием {rx_bytes / 1024:.1f} КБ/с ({rx_packets:.0f} пак/с),"
+                              f" передача {tx_bytes / 1024:.1f} КБ/с ({tx_packets:.0f} пак/с),"
+                              f" ошибок {errors:.0f}/с, отброшено {dropped:.0f}/с")
+
+            # Затраты CPU на весь такт, включая вывод
+            tick_cpu_ns = time.process_time_ns() - cpu_start
+            tick_count += 1
+            total_tick_cpu_ns += tick_cpu_ns
+
+            # Ждем до следующего такта; если сбор занял больше интервала, пропускаем такты
+            next_tick += interval_ns
+            now = time.monotonic_ns()
+            if next_tick < now:
+                next_tick = now
+            time.sleep((next_tick - now) / 1_000_000_000)
+    except KeyboardInterrupt:
+        # Завершение по Ctrl+C - штатный выход из режима наблюдения
+        pass
+    finally:
+        if tick_count:
+            average_ns = total_tick_cpu_ns / tick_count
+            print(f"тактов: {tick_count}, в среднем {average_ns / 1000:.0f} мкс CPU на такт"
+                  f" ({average_ns * 100 / interval_ns:.3f}% ядра)", file=sys.stderr, flush=True)
+        # Закрываем все дескрипторы
+        meminfo_reader.close()
+        loadavg_reader.close()
+        mount_table.close()
+        statvfs_pool.close()
+        cpu_sampler.close()
+        if process_scanner:
+            process_scanner.close()
+        if disk_sampler:
+            disk_sampler.close()
+        if net_sampler:
+            net_sampler.close()
+        cgroup_limits.close()
+        if history_writer:
+            history_writer.close()
+
+
+def format_alert_event(name, state, value, severity):
+    """
+    Строка о сработавшем или снятом оповещении
+    """
+    if state == 'firing':
+        return f"ОПОВЕЩЕНИЕ [{severity}] {name}: {value:.2f}"
+    return f"снято оповещение {name}: {value:.2f}"
+
+
+def parse_args():
+    """
+    Разбирает аргументы командной строки
+    """
+    # Значения по умолчанию и допустимые варианты берутся из модулей соответствующих режимов
+    import agent
+    import diskusage
+    import metrics
+    import profiling
+    import snapshot
+
+    parser = argparse.ArgumentParser(description="Системная информация - Linux")
+    # --watch INTERVAL включает режим непрерывного наблюдения с заданным интервалом в секундах
+    parser.add_argument('--watch', type=float, metavar='INTERVAL',
+                        help="непрерывный сбор с интервалом INTERVAL секунд")
+    # --mount-timeout задает срок ответа statvfs для одной точки монтирования
+    parser.add_argument('--mount-timeout', type=float, default=STATVFS_TIMEOUT, metavar='SECONDS',
+                        help="сколько секунд ждать statvfs одной точки монтирования")
+    # --top N выводит N процессов с наибольшим потреблением памяти (в режиме --watch - CPU)
+    parser.add_argument('--top', type=int, default=0, metavar='N',
+                        help="показать N самых тяжелых процессов")
+    # --deadline задает общий срок сбора отчета
+    parser.add_argument('--deadline', type=float, default=engine.DEFAULT_DEADLINE, metavar='SECONDS',
+                        help="общий срок сбора отчета в секундах")
+    # --serve ADDRESS запускает режим агента: снимки отдаются по сокету unix:/путь или хост:порт
+    parser.add_argument('--serve', metavar='ADDRESS',
+                        help="режим агента: отдавать снимки по адресу unix:/путь или хост:порт")
+    parser.add_argument('--serve-max-age', type=float, default=agent.DEFAULT_MAX_AGE, metavar='SECONDS',
+                        help="сколько секунд агент отдает один и тот же снимок")
+    # --metrics ADDRESS запускает HTTP-сервер страницы /metrics в формате Prometheus
+    parser.add_argument('--metrics', metavar='ADDRESS',
+                        help=f"отдавать /metrics для Prometheus по адресу хост:порт (:{metrics.DEFAULT_PORT} - только"
+                             f" 127.0.0.1, 0.0.0.0:{metrics.DEFAULT_PORT} - все интерфейсы)")
+    parser.add_argument('--metrics-max-age', type=float, default=metrics.DEFAULT_MAX_AGE, metavar='SECONDS',
+                        help="сколько секунд /metrics отдает один и тот же снимок")
+    # --adaptive опрашивает сборщики агента и /metrics в фоне, у каждого свой интервал (см. scheduler.py)
+    parser.add_argument('--adaptive', action='store_true',
+                        help="в режимах --serve и --metrics опрашивать сборщики по адаптивным интервалам")
+    # --poll ADDRESS... опрашивает агентов и выводит их снимки строками NDJSON
+    parser.add_argument('--poll', nargs='+', metavar='ADDRESS',
+                        help="опросить агентов по указанным адресам")
+    # --disk-io в режиме --watch выводит нагрузку на диски по данным /proc/diskstats
+    parser.add_argument('--disk-io', action='store_true',
+                        help="в режиме --watch показывать операции, пропускную способность и загрузку дисков")
+    # --net в режиме --watch выводит трафик сетевых интерфейсов по данным /proc/net/dev
+    parser.add_argument('--net', action='store_true',
+                        help="в режиме --watch показывать трафик сетевых интерфейсов")
+    # --format выбирает вид вывода: текст для человека или машиночитаемые форматы
+    parser.add_argument('--format', choices=snapshot.OUTPUT_FORMATS, default='text',
+                        help="формат вывода (по умолчанию text)")
+    # --proc-root, --sys-root и --etc-root подменяют корни, например деревом из fixtures.py
+    parser.add_argument('--proc-root', metavar='PATH', help="читать /proc из каталога PATH")
+    parser.add_argument('--sys-root', metavar='PATH', help="читать /sys из каталога PATH")
+    parser.add_argument('--etc-root', metavar='PATH', help="читать /etc из каталога PATH")
+    # --usage ищет, что занимает место на точке монтирования (наибольшие каталоги и файлы)
+    parser.add_argument('--usage', metavar='MOUNT_POINT',
+                        help="вывести наибольшие каталоги и файлы на точке монтирования (аналог du)")
+    parser.add_argument('--usage-cache', metavar='FILE',
+                        help="кэш сводок каталогов для --usage: неизменившиеся каталоги не перечитываются")
+    # --history задает каталог, в который режим --watch дописывает снимки
+    parser.add_argument('--history', metavar='DIRECTORY',
+                        help="дописывать снимки режима --watch в историю на диске (см. history.py)")
+    # --alerts включает проверку правил оповещений: из файла FILE или встроенных (alerts.DEFAULT_RULES)
+    parser.add_argument('--alerts', nargs='?', const='', metavar='FILE',
+                        help="проверять правила оповещений (из файла FILE, без него - встроенные)")
+    # --profile включает профилирование сборщиков; отчет выводится в stderr по завершении
+    parser.add_argument('--profile', nargs='?', const='timing', choices=profiling.PROFILE_MODES,
+                        help="профилировать сборщики: timing (по умолчанию), cprofile или tracemalloc")
+    # --benchmark запускает микробенчмарки разбора вместо вывода отчета
+    parser.add_argument('--benchmark', action='store_true',
+                        help="запустить микробенчмарки сборщиков")
+    # --benchmark-usage-files задает размер дерева для замера анализа занятого места
+    # (дерево создается во временном каталоге и удаляется после замера)
+    parser.add_argument('--benchmark-usage-files', type=int, default=diskusage.BENCHMARK_FILE_COUNT,
+                        metavar='N', help="сколько файлов создать для замера --usage (например, 1000000)")
+    return parser.parse_args()
+
+
+def collect_all(mount_timeout=STATVFS_TIMEOUT, deadline=engine.DEFAULT_DEADLINE, profiler=None):
+    """
+    Запускает все сборщики одновременно (см. engine.collect) и ждет их не дольше deadline секунд
+    Возвращает словарь с ключами os, user_host, processor, topology, memory, mounts, cgroup;
+    сборщики, не успевшие к сроку, получают значение engine.MISSED
+    Если передан profiler (profiling.Profiler), каждый сборщик выполняется через его обертку
+    """
+    collectors = {
+        'os': get_os_info,
+        'user_host': get_user_and_host_info,
+        'processor': get_processor_info,
+        'topology': get_topology_info,
+        'memory': get_memory_info,
+        'mounts': lambda: get_mounts_info(mount_timeout),
+        'cgroup': get_cgroup_info,
+    }
+    if profiler:
+        collectors = profiler.wrap_all(collectors)
+    return engine.collect(collectors, deadline)
+
+
+def main(mount_timeout=STATVFS_TIMEOUT, top=0, deadline=engine.DEFAULT_DEADLINE, profiler=None,
+         alert_rules=None):
     """
     Основная функция программы для Linux
     Организует сбор и отображение всей системной информации
+    Все сборщики запускаются одновременно; не успевшие к сроку deadline отмечаются в отчете
+    Если переданы правила оповещений, в конце отчета выводятся нарушенные правила
     """
+    import snapshot
+
+    # Собираем все сведения одновременно, до начала вывода
+    results = collect_all(mount_timeout, deadline, profiler)
+    missed = "нет данных (превышен срок сбора)"
+
     # Выводим заголовок программы
     print("=" * 50)  # Печатаем разделительную строку
     print("СИСТЕМНАЯ ИНФОРМАЦИЯ - LINUX")
     print("=" * 50)
 
-    # 1. Получаем и выводим информацию об операционной системе и ядре
-    distro_info, kernel_version = get_os_info()  # Получаем информацию об ОС
+    # 1. Выводим информацию об операционной системе и ядре
+    distro_info, kernel_version = results['os'] or (missed, missed)  # Информация об ОС
     print(f"ОС: {distro_info}")  # Выводим название дистрибутива
     print(f"Ядро: Linux {kernel_version}")  # Выводим версию ядра
 
-    # 2. Получаем и выводим информацию о пользователе и хосте
-    user_name, host_name = get_user_and_host_info()  # Получаем информацию о пользователе и хосте
+    # 2. Выводим информацию о пользователе и хосте
+    user_name, host_name = results['user_host'] or (missed, missed)  # Информация о пользователе и хосте
     print(f"Имя хоста: {host_name}")  # Выводим имя хоста (компьютера)
     print(f"Пользователь: {user_name}")  # Выводим имя пользователя
 
-    # 3. Получаем и выводим информацию о процессоре
-    processor_info = get_processor_info()  # Получаем информацию о процессоре
+    # Лимиты cgroup, если они строже, заменяют в отчете память и число процессоров хоста
+    cgroup_info = results['cgroup']
+
+    # 3. Выводим информацию о процессоре
+    processor_info = results['processor']  # Информация о процессоре
+    if processor_info is engine.MISSED:
+        print(f"Процессор: {missed}")
     if processor_info:  # Проверяем, что данные получены успешно
         # Распаковываем кортеж с информацией о процессоре
         processor_count, architecture, load_avg = processor_info
         print(f"Архитектура: {architecture}")  # Выводим архитектуру процессора
-        print(f"Процессоры: {processor_count}")  # Выводим количество процессоров
+        cpus, cpu_limited = snapshot.effective_limits(None, None, processor_count, cgroup_info)[2::2]
+        if cpu_limited:
+            # Квота CPU cgroup меньше числа процессоров хоста
+            print(f"Процессоры: {cpus:g} (квота cgroup, на хосте {processor_count})")
+        else:
+            print(f"Процессоры: {processor_count}")  # Выводим количество процессоров
         # Выводим среднюю загрузку за 1, 5 и 15 минут, объединяя значения через запятую
         print(f"Средняя нагрузка: {', '.join(load_avg)}")
 
-    # 4. Получаем и выводим информацию о памяти
-    memory_info = get_memory_info()  # Получаем информацию о памяти
+    # Топология процессоров: сокеты, ядра, кэши, текущие частоты и узлы NUMA
+    topology_info = results['topology']
+    if topology_info is engine.MISSED:
+        print(f"Топология: {missed}")
+    if topology_info:
+        for line in format_topology(topology_info):
+            print(line)
+
+    # 4. Выводим информацию о памяти
+    memory_info = results['memory']  # Информация о памяти
+    if memory_info is engine.MISSED:
+        print(f"Оперативная память: {missed}")
     if memory_info:  # Проверяем, что данные получены успешно
         # Распаковываем кортеж с информацией о памяти
         mem_total_mb, mem_available_mb, swap_total_mb, swap_free_mb, vmalloc_total_mb = memory_info
-        # Выводим информацию об оперативной памяти
-        print(f"Оперативная память: {mem_available_mb} МБ свободно / {mem_total_mb} МБ всего")
+        # Выводим информацию об оперативной памяти (с учетом лимита cgroup, если он есть)
+        limit_mb, available_mb, _, memory_limited, _ = snapshot.effective_limits(
+            mem_total_mb, mem_available_mb, None, cgroup_info)
+        if memory_limited:
+            print(f"Оперативная память: {available_mb} МБ свободно / {limit_mb} МБ всего"
+                  f" (лимит cgroup, на хосте {mem_total_mb} МБ)")
+        else:
+            print(f"Оперативная память: {mem_available_mb} МБ свободно / {mem_total_mb} МБ всего")
         # Выводим информацию о разделе подкачки (swap)
         print(f"Раздел подкачки: {swap_total_mb} МБ всего / {swap_free_mb} МБ свободно")
         # Если доступна информация о виртуальной памяти, выводим ее
         if vmalloc_total_mb > 0:
             print(f"Виртуальная память: {vmalloc_total_mb} МБ")
+    if cgroup_info and cgroup_info[3]:
+        # Давление (PSI): доля времени за 10 секунд, когда задачи простаивали в ожидании ресурса
+        print(f"Давление (PSI avg10 some/full, %): {format_pressure(cgroup_info[3])}")
 
-    # 5. Получаем и выводим информацию о дисках
+    # 5. Выводим информацию о дисках
     print("\nДиски:")  # Печатаем заголовок для раздела дисков
-    mounts_info = get_mounts_info()  # Получаем информацию о смонтированных файловых системах
+    mounts_info = results['mounts']  # Информация о смонтированных файловых системах
+    if mounts_info is engine.MISSED:
+        print(f" {missed}")
+        mounts_info = []
+    elif mounts_info is None:
+        mounts_info = []
     # Проходим по всем точкам монтирования в цикле
-    for mount_point, fs_type, free_gb, total_gb in mounts_info:
+    for mount_point, fs_type, free_gb, total_gb, free_bytes, total_bytes in mounts_info:
         # Для каждой точки монтирования выводим информацию в формате:
         # /home ext4 40 ГБ свободно / всего 100 ГБ
+        if total_gb is None:
+            # Точка монтирования не ответила за отведенное время (например, зависший NFS)
+            print(f" {mount_point} {fs_type} нет ответа (таймаут)")
+            continue
         print(f" {mount_point} {fs_type} {free_gb} ГБ свободно / всего {total_gb} ГБ")
 
+    # 6. Если запрошено, выводим процессы с наибольшим потреблением памяти
+    if top > 0:
+        print(f"\nПроцессы (топ-{top} по памяти):")
+        scanner = ProcessScanner()
+        try:
+            scanner.scan()
+            for pid, name, rss_kb, delta, cpu_percent in scanner.top_by_rss(top):
+                # Подробности из statm и status дочитываем только для процессов из топа
+                details = scanner.details(pid)
+                if details:
+                    print(f" {pid} {name} {rss_kb // 1024} МБ (общей памяти {details['shared_kb'] // 1024} МБ,"
+                          f" потоков: {details.get('threads', '?')}, UID {details.get('uid', '?')})")
+                else:
+                    print(f" {pid} {name} {rss_kb // 1024} МБ")
+        finally:
+            scanner.close()
+
+    # 7. Проверяем правила оповещений на собранных значениях
+    if alert_rules:
+        import alerts
+        sample = snapshot.linux_snapshot(results['os'], results['user_host'], processor_info, memory_info,
+                                         mounts_info, cgroup_info)
+        alert_engine = alerts.AlertEngine(alert_rules)
+        alert_engine.evaluate(alerts.metrics_from_snapshot(sample))
+        firing, pending = alert_engine.firing(), alert_engine.pending()
+        print("\nОповещения:" if firing or pending else "\nОповещения: нет")
+        for name, value, severity in firing:
+            print(f" [{severity}] {name}: {value:.2f}")
+        # Однократный отчет не может дождаться таймера for - показываем такие правила отдельно
+        for name, value, severity, remaining in pending:
+            print(f" [{severity}] {name}: {value:.2f} (условие выполняется, сработает через {remaining:g} с)")
+
+
+def collect_snapshot(mount_timeout=STATVFS_TIMEOUT, deadline=engine.DEFAULT_DEADLINE, profiler=None):
+    """
+    Собирает всю системную информацию в один снимок (см. snapshot.Snapshot)
+    Значения сборщиков, не успевших к сроку, в снимке отсутствуют
+    """
+    import snapshot
+
+    results = collect_all(mount_timeout, deadline, profiler)
+    return snapshot.linux_snapshot(results['os'], results['user_host'], results['processor'],
+                                   results['memory'], results['mounts'] or [], results['cgroup'])
+
+
+def processor_urgent(processor_info):
+    """
+    Загрузка за минуту превышает ADAPTIVE_LOAD_PER_CPU на процессор
+    """
+    processor_count, architecture, load_avg = processor_info
+    return float(load_avg[0]) > ADAPTIVE_LOAD_PER_CPU * processor_count
+
+
+def memory_urgent(memory_info):
+    """
+    Доступной памяти меньше доли ADAPTIVE_MEMORY_AVAILABLE
+    """
+    mem_total_mb, mem_available_mb = memory_info[:2]
+    return mem_available_mb < ADAPTIVE_MEMORY_AVAILABLE * mem_total_mb
+
+
+def mounts_urgent(mounts_info):
+    """
+    Хотя бы на одной точке монтирования свободно меньше доли ADAPTIVE_MOUNT_FREE или она не ответила
+    """
+    return any(total_bytes is None or free_bytes < ADAPTIVE_MOUNT_FREE * total_bytes
+               for mount_point, fs_type, free_gb, total_gb, free_bytes, total_bytes in mounts_info)
+
+
+def adaptive_schedules(mount_timeout=STATVFS_TIMEOUT, profiler=None):
+    """
+    Расписания сборщиков для режима --adaptive (см. scheduler.Schedule и ADAPTIVE_INTERVALS)
+    Таблица монтирования перечитывается только при изменении /proc/mounts,
+    потоки statvfs создаются один раз и переиспользуются
+    """
+    import scheduler
+
+    mount_table = MountTableCache()
+    statvfs_pool = StatvfsPool()
+    collectors = {
+        'os': get_os_info,
+        'user_host': get_user_and_host_info,
+        'processor': get_processor_info,
+        'memory': get_memory_info,
+        'mounts': lambda: get_mounts_info(mount_timeout, mount_table, statvfs_pool),
+        'cgroup': get_cgroup_info,
+    }
+    if profiler:
+        collectors = profiler.wrap_all(collectors)
+    urgent = {'processor': processor_urgent, 'memory': memory_urgent, 'mounts': mounts_urgent}
+    return [scheduler.Schedule(name, function, *ADAPTIVE_INTERVALS[name], urgent=urgent.get(name),
+                               blocking=name in ADAPTIVE_BLOCKING)
+            for name, function in collectors.items()]
+
+
+def start_adaptive(mount_timeout=STATVFS_TIMEOUT, profiler=None):
+    """
+    Запускает планировщик сборщиков в фоновом потоке (блокирующие сборщики - в своих,
+    см. ADAPTIVE_BLOCKING) и возвращает функцию, которая без обращения к /proc собирает
+    снимок из последних значений сборщиков
+    Перед возвратом все сборщики выполняются один раз, поэтому первый снимок не пустой;
+    если statvfs не ответил за scheduler.DEFAULT_PRIME_TIMEOUT, диски в первых снимках пусты
+    """
+    import scheduler
+    import snapshot
+
+    adaptive = scheduler.Scheduler(adaptive_schedules(mount_timeout, profiler))
+    adaptive.start()
+
+    def collect():
+        values = adaptive.values()
+        return snapshot.linux_snapshot(values['os'], values['user_host'], values['processor'],
+                                       values['memory'], values['mounts'] or [], values['cgroup'])
+    return collect
+
+
+def run_benchmarks(usage_files=None):
+    """
+    Запускает все микробенчмарки и выводит их результаты
+    usage_files - число файлов в дереве для замера анализа занятого места
+    """
+    import agent
+    import alerts
+    import diskusage
+    import history
+    import metrics
+    import profiling
+    import scheduler
+    import snapshot
+    import sysinfo
+
+    # Микробенчмарк разбора /proc/meminfo
+    regex_us, report_us, regex_all_us, all_us = benchmark_memory_parser()
+    print(f"meminfo: поля отчета - регулярные выражения {regex_us:.2f} мкс, MemInfo {report_us:.2f} мкс;"
+          f" все поля - re.findall {regex_all_us:.2f} мкс, MemInfo {all_us:.2f} мкс")
+    # Параллельный statvfs на искусственно медленных точках монтирования
+    sequential_s, parallel_s, hung_s, timed_out = benchmark_mounts_statvfs()
+    print(f"statvfs: последовательно {sequential_s:.2f} с, параллельно {parallel_s:.2f} с,"
+          f" с зависшей точкой {hung_s:.2f} с (таймаутов: {timed_out})")
+    # Стоимость сериализации одного снимка в каждом формате
+    costs = snapshot.benchmark_serialization(collect_snapshot())
+    print("сериализация снимка: " + ", ".join(f"{name} {cost:.2f} мкс" for name, cost in costs.items()))
+    # Название дистрибутива без запуска lsb_release и кэш сведений о хосте
+    lsb_ms, files_ms, cached_us = benchmark_host_facts()
+    lsb_text = f"{lsb_ms:.1f} мс" if lsb_ms is not None else "нет в системе"
+    print(f"дистрибутив: lsb_release {lsb_text}, файлы {files_ms:.3f} мс, кэш {cached_us:.2f} мкс")
+    # Снимок /proc/net/dev на хосте с 5000 veth-интерфейсов
+    net_idle_ms, net_busy_ms, net_hz = benchmark_net_sampler()
+    print(f"сеть: снимок 5000 интерфейсов {net_idle_ms:.2f} мс без трафика, {net_busy_ms:.2f} мс"
+          f" при трафике на всех (до {net_hz:.1f} Гц при 1% ядра)")
+    # Обход искусственного дерева /proc с 10 000 процессов
+    scan_ms, top_ms, process_count = benchmark_process_scanner()
+    print(f"процессы: обход {process_count} pid {scan_ms:.1f} мс, выбор топа {top_ms:.2f} мс")
+    # Одновременный запуск сборщиков против последовательного
+    sequential_s, concurrent_s = engine.benchmark_engine()
+    print(f"сборщики: последовательно {sequential_s:.2f} с, одновременно {concurrent_s:.2f} с")
+    # Агрегатор: снимков в секунду от 10 локальных агентов
+    rate, received = agent.benchmark_aggregator([sys.executable, os.path.abspath(__file__), '--serve'])
+    print(f"агрегатор: {rate:.0f} снимков/с ({received} снимков от 10 агентов)")
+    # Нагрузочный тест /metrics: опросов в секунду из 50 постоянных соединений
+    scrape_rate, scrapes, page_bytes = metrics.benchmark_scrapes([sys.executable, os.path.abspath(__file__),
+                                                                  '--metrics'])
+    print(f"/metrics: {scrape_rate:.0f} опросов/с ({scrapes} опросов, страница {page_bytes} байт)")
+    # Топология двухсокетного хоста с 256 потоками: чтение один раз и снимок частот и памяти узлов
+    discover_ms, topology_us, sockets, cores, nodes = benchmark_topology()
+    print(f"топология: {sockets} сокета, {cores} ядер, {nodes} узла NUMA прочитаны за {discover_ms:.1f} мс,"
+          f" снимок частот и памяти узлов {topology_us:.0f} мкс")
+    # Снимок лимитов cgroup и давления, выполняемый на каждом такте --watch
+    cgroup_us, cgroup_version = benchmark_cgroup_limits()
+    print(f"cgroup: снимок лимитов и PSI {cgroup_us:.1f} мкс (cgroup v{cgroup_version or '-'})")
+    # Проверка правил оповещений на хосте с 5000 точками монтирования и 256 ядрами
+    rule_count, evaluation_us, rule_ns, compile_ms = alerts.benchmark_engine()
+    print(f"оповещения: {rule_count} правил за {evaluation_us / 1000:.2f} мс ({rule_ns:.0f} нс на правило),"
+          f" компиляция плана {compile_ms:.1f} мс")
+    # Обход сгенерированного дерева без кэша и повторно с кэшем
+    full_s, cached_s, file_count = diskusage.benchmark_usage(usage_files or diskusage.BENCHMARK_FILE_COUNT)
+    print(f"занятое место: {file_count} файлов за {full_s:.2f} с, повторно с кэшем {cached_s:.2f} с")
+    # История снимков: размер записи против NDJSON и запрос за последний час
+    record_bytes, ndjson_bytes, append_us, query_ms = history.benchmark_history()
+    print(f"история: {record_bytes:.1f} байт на снимок (NDJSON {ndjson_bytes:.0f} байт),"
+          f" запись {append_us:.1f} мкс, максимум за час {query_ms:.2f} мс")
+    # Адаптивный планировщик: опросов за час против опроса всех сборщиков раз в секунду
+    adaptive_runs, fixed_runs, step_us, burst = scheduler.benchmark_scheduler()
+    print(f"планировщик: {adaptive_runs:.0f} опросов за час вместо {fixed_runs:.0f}, шаг колеса {step_us:.1f} мкс,"
+          f" не более {burst} из 100 хостов в одном шаге")
+    # Цена профилирования одного сборщика
+    plain_us, profiled_us = profiling.benchmark_overhead(get_memory_info, 2000)
+    print(f"профилирование: get_memory_info {plain_us:.1f} мкс без профилировщика, {profiled_us:.1f} мкс с ним")
+    # Время импорта единого интерфейса и отсутствие лишних модулей
+    import_ms, budget_ms, loaded = sysinfo.benchmark_import()
+    print(f"импорт sysinfo: {import_ms:.2f} мс (бюджет {budget_ms:.1f} мс)"
+          + (f", загружены лишние модули: {', '.join(loaded)}" if loaded else ""))
+
 
 # Стандартная конструкция для Python: код выполняется только если скрипт запущен напрямую
 if __name__ == "__main__":
+    profiler = None
     try:
-        main()  # Вызываем основную функцию
+        args = parse_args()  # Разбираем аргументы командной строки
+        set_roots(args.proc_root, args.sys_root, args.etc_root)
+        alert_rules = None
+        if args.alerts is not None:
+            # Оповещения проверяются только по явному запросу, отчет по умолчанию не меняется
+            import alerts
+            alert_rules = alerts.load_rules(args.alerts or None)
+        if args.profile:
+            # Профилировщик включается только по запросу, иначе сборщики не оборачиваются
+            import profiling
+            profiler = profiling.Profiler(args.profile)
+            profiler.enable()
+        if args.benchmark:
+            run_benchmarks(args.benchmark_usage_files)  # Микробенчмарки вместо отчета
+        elif args.serve or args.metrics:
+            if args.adaptive:
+                # Сборщики опрашиваются планировщиком, снимок составляется из их последних значений
+                collect = start_adaptive(args.mount_timeout, profiler)
+            else:
+                collect = lambda: collect_snapshot(args.mount_timeout, args.deadline, profiler)
+            if args.serve:
+                # Режим агента: снимки собираются с общим сроком и отдаются по сокету
+                import agent
+                agent.serve(collect, args.serve, args.serve_max_age)
+            else:
+                # Сервер /metrics: снимок собирается не чаще раза в --metrics-max-age секунд
+                import metrics
+                metrics.serve(collect, args.metrics, args.metrics_max_age)
+        elif args.poll:
+            # Агрегатор: одновременный опрос всех агентов
+            import agent
+            agent.write_poll_results(agent.poll_once(args.poll))
+        elif args.usage:
+            # Анализ занятого места вместо отчета; --top задает длину списков
+            import diskusage
+            diskusage.write_report(os.path.abspath(args.usage),
+                                   diskusage.scan_usage(args.usage, args.top or diskusage.DEFAULT_TOP,
+                                                        cache_path=args.usage_cache))
+        elif args.watch:
+            run_watch(args.watch, args.mount_timeout, args.format, args.top, args.disk_io,
+                      args.net, profiler, alert_rules, args.history)  # Режим непрерывного наблюдения
+        elif args.format != 'text':
+            # Машиночитаемый снимок вместо текстового отчета
+            import snapshot
+            snapshot.write_snapshot(collect_snapshot(args.mount_timeout, args.deadline, profiler), args.format)
+        else:
+            main(args.mount_timeout, args.top, args.deadline, profiler, alert_rules)  # Вызываем основную функцию
     except Exception as e:
         # Если произошла непредвиденная ошибка, выводим сообщение и завершаем программу
         print(f"Произошла ошибка: {e}")
-        sys.exit(1)  # Завершаем программу с кодом возврата 1 (ошибка)
\ No newline at end of file
+        sys.exit(1)  # Завершаем программу с кодом возврата 1 (ошибка)
+    finally:
+        if profiler:
+            profiler.disable()
+            profiler.write_report()